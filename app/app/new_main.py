@@ -11,6 +11,7 @@ import sys
 import logging
 from dotenv import load_dotenv
 from soap_service import app as soap_app
+from utils.log_setup import configure_logging
 
 # Cargar variables de entorno
 load_dotenv()
@@ -19,11 +20,8 @@ load_dotenv()
 SERVICE_HOST = os.getenv('SERVICE_HOST', '0.0.0.0')
 SERVICE_PORT = int(os.getenv('SERVICE_PORT', '8080'))
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configurar logging (cola con escritura en otro hilo, ver utils/log_setup.py)
+configure_logging('app')
 logger = logging.getLogger(__name__)
 
 # Función principal para iniciar el servidor
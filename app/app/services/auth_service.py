@@ -20,6 +20,7 @@ from spyne.model.complex import ComplexModel
 from spyne.model.fault import Fault
 from requests_oauthlib import OAuth2Session
 from dotenv import load_dotenv
+from utils.resilience import protect
 
 # Cargar variables de entorno
 load_dotenv()
@@ -40,6 +41,7 @@ OAUTH_FACEBOOK_CLIENT_ID = os.getenv('OAUTH_FACEBOOK_CLIENT_ID', '')
 OAUTH_FACEBOOK_CLIENT_SECRET = os.getenv('OAUTH_FACEBOOK_CLIENT_SECRET', '')
 OAUTH_MICROSOFT_CLIENT_ID = os.getenv('OAUTH_MICROSOFT_CLIENT_ID', '')
 OAUTH_MICROSOFT_CLIENT_SECRET = os.getenv('OAUTH_MICROSOFT_CLIENT_SECRET', '')
+OAUTH_TIMEOUT = int(os.getenv('OAUTH_TIMEOUT', '10'))
 
 # Configurar logging
 logging.basicConfig(
@@ -120,16 +122,19 @@ class AuthService(ServiceBase):
                 scope=oauth_config['scope']
             )
             
-            # Obtener token
-            token = oauth.fetch_token(
-                oauth_config['token_url'],
-                client_secret=oauth_config['client_secret'],
-                code=authorization_code
-            )
-            
-            # Obtener información del usuario
-            user_info_response = oauth.get(oauth_config['userinfo_url'])
-            user_info = user_info_response.json()
+            # Las llamadas al proveedor pasan por su bulkhead y circuit breaker
+            with protect('oauth'):
+                # Obtener token
+                token = oauth.fetch_token(
+                    oauth_config['token_url'],
+                    client_secret=oauth_config['client_secret'],
+                    code=authorization_code,
+                    timeout=OAUTH_TIMEOUT
+                )
+                
+                # Obtener información del usuario
+                user_info_response = oauth.get(oauth_config['userinfo_url'], timeout=OAUTH_TIMEOUT)
+                user_info = user_info_response.json()
             
             # Extraer datos del usuario según el proveedor
             if provider == 'google':
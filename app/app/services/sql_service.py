@@ -19,6 +19,7 @@ from spyne import Application, ServiceBase, rpc, Integer, Unicode, Boolean, Arra
 from spyne.model.complex import ComplexModel
 from spyne.model.fault import Fault
 from dotenv import load_dotenv
+from utils.serializer import RowSerializer, json_with_rows
 
 # Cargar variables de entorno
 load_dotenv()
@@ -903,7 +904,7 @@ class SQLService(ServiceBase):
                 password=MYSQL_PASSWORD,
                 database=database_name
             )
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
             
             # Construir SQL para consultar
             sql = f"SELECT {fields} FROM `{table_name}`"
@@ -917,28 +918,16 @@ class SQLService(ServiceBase):
             
             # Ejecutar consulta
             cursor.execute(sql, where_values)
-            results = cursor.fetchall()
-            
-            # Convertir resultados a formato serializable
-            serializable_results = []
-            for row in results:
-                serializable_row = {}
-                for key, value in row.items():
-                    if isinstance(value, (datetime.date, datetime.datetime)):
-                        serializable_row[key] = value.isoformat()
-                    elif isinstance(value, (bytes, bytearray)):
-                        serializable_row[key] = value.hex()
-                    else:
-                        serializable_row[key] = value
-                serializable_results.append(serializable_row)
             
-            return json.dumps({
+            # Serializar los resultados con un conversor por columna
+            data_json, count = RowSerializer(cursor.description).dumps_rows(cursor.fetchall())
+            
+            return json_with_rows({
                 "success": True,
                 "database": database_name,
                 "table": table_name,
-                "count": len(serializable_results),
-                "data": serializable_results
-            })
+                "count": count
+            }, "data", data_json)
             
         except mysql.connector.Error as e:
             if e.errno == errorcode.ER_BAD_DB_ERROR:
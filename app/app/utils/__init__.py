@@ -6,4 +6,27 @@ Utilidades para la SOA Database
 """
 
 # Importar utilidades para que sean accesibles desde el paquete
-from .helpers import create_error_response, create_success_response, format_datetime, is_valid_identifier
\ No newline at end of file
+from .helpers import create_error_response, create_success_response, format_datetime, is_valid_identifier
+from .db_pool import get_mysql_connection, get_mongo_client
+from .cursors import CursorRegistry, ServerCursor, CursorError, cursor_registry
+from .where_compiler import WhereCompiler, WhereError, TableCatalog, where_compiler, table_catalog
+from .sql_builder import parse_aggregates, build_aggregate_query
+from .serializer import RowSerializer, json_with_rows, parse_format, documents_to_format
+from .mtom import MtomError, Attachment, AttachmentCollector, parse_mtom, build_multipart
+from .compression import CompressionError, negotiate, compress, decompress, compress_response
+from .singleflight import SingleFlight, single_flight
+from .resilience import BackendUnavailable, CircuitBreaker, Bulkhead, protect, backend_status
+from .deadline import DeadlineExceeded, operation_timeout, request_deadline
+from .replicas import ReplicaRouter, replica_router
+from .placement import PlacementDirectory, PlacementError, placement_directory
+from .jobs import JobError, JobManager, job_manager, report_progress
+from .export import export_rows, export_documents, parse_export_format
+from .importer import ImportReport, iter_records, run_import
+from .bulk_write import parse_operations, run_bulk_write
+from .find import FindPage, open_find, parse_find_options
+from .indexes import parse_index_spec, mysql_create_index_sql, group_mysql_indexes, merge_mongo_indexes
+from .explain import parse_mysql_plan, parse_mongo_plan
+from .advisor import QueryAdvisor, query_advisor
+from .slowlog import SlowOperationLog, slow_operation_log
+from .log_setup import configure_logging, logging_stats
+from .tracing import Tracer, tracer
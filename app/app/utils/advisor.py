@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Asesor de consultas lentas
+Las consultas (select, join, aggregate, findDocument, aggregateDocuments) que
+superan SLOW_QUERY_THRESHOLD_MS se registran en un buffer circular junto con
+su plan, obtenido en segundo plano en modo explain=plan (sin volver a
+ejecutarlas). Los recorridos completos repetidos de una misma tabla o
+colección por los mismos campos generan sugerencias de índices en el formato
+de index_json de createIndex.
+"""
+
+import os
+import logging
+import datetime
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+ADVISOR_ENABLED = os.getenv('ADVISOR_ENABLED', 'true').lower() == 'true'
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '1000'))
+# Consultas lentas que se conservan (las más antiguas se descartan)
+ADVISOR_BUFFER_SIZE = int(os.getenv('ADVISOR_BUFFER_SIZE', '200'))
+# Recorridos completos por los mismos campos necesarios para sugerir un índice
+ADVISOR_MIN_OCCURRENCES = int(os.getenv('ADVISOR_MIN_OCCURRENCES', '3'))
+# Planes pendientes de obtener; si hay más, la consulta se registra sin plan
+ADVISOR_MAX_PENDING = int(os.getenv('ADVISOR_MAX_PENDING', '10'))
+
+# Operaciones con modo explain: (servicio, operación) -> parámetro con la tabla o colección
+EXPLAINABLE_OPERATIONS = {
+    ('sql', 'select'): 'table_name',
+    ('sql', 'join'): None,
+    ('sql', 'aggregate'): 'table_name',
+    ('nosql', 'findDocument'): 'collection_name',
+    ('nosql', 'aggregateDocuments'): 'collection_name'
+}
+
+# Parámetros que describen la consulta (nunca se guarda el token de sesión)
+QUERY_PARAMETERS = ('where_json', 'join_query', 'group_by', 'order_by', 'filter_json', 'sort_json', 'pipeline_json', 'hint')
+
+logger = logging.getLogger(__name__)
+
+class QueryAdvisor:
+    """Registro de consultas lentas y sugerencias de índices."""
+
+    def __init__(self, threshold_ms=SLOW_QUERY_THRESHOLD_MS, capacity=ADVISOR_BUFFER_SIZE,
+                 min_occurrences=ADVISOR_MIN_OCCURRENCES, max_pending=ADVISOR_MAX_PENDING, enabled=ADVISOR_ENABLED):
+        self.threshold_ms = threshold_ms
+        self.min_occurrences = min_occurrences
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self.explainer = None
+        self._entries = deque(maxlen=capacity)
+        # (backend, base de datos, tabla o colección, campos) -> recorridos completos
+        self._scans = {}
+        self._pending = 0
+        self._observed = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def configure(self, explainer):
+        """
+        Args:
+            explainer: Función (servicio, operación, parámetros) que devuelve el plan normalizado
+        """
+        self.explainer = explainer
+
+    def observe(self, service, operation, parameters, duration_ms):
+        """
+        Registra una operación si es una consulta lenta.
+
+        El plan se obtiene en un hilo de fondo para no retrasar la respuesta.
+        """
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return
+        if (service, operation) not in EXPLAINABLE_OPERATIONS or parameters.get('explain'):
+            return
+
+        with self._lock:
+            self._observed += 1
+            explain = self.explainer is not None and self._pending < self.max_pending
+            if explain:
+                self._pending += 1
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='query-advisor')
+
+        if not explain:
+            self.record(service, operation, parameters, duration_ms, None)
+            return
+        self._executor.submit(self._explain_and_record, service, operation, dict(parameters), duration_ms)
+
+    def _explain_and_record(self, service, operation, parameters, duration_ms):
+        plan = None
+        try:
+            plan = self.explainer(service, operation, parameters)
+        except Exception as e:
+            logger.warning(f"No se pudo obtener el plan de {service}.{operation}: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+        self.record(service, operation, parameters, duration_ms, plan)
+
+    def record(self, service, operation, parameters, duration_ms, plan):
+        """
+        Añade una consulta lenta al buffer y cuenta sus recorridos completos.
+
+        Args:
+            service: sql o nosql
+            operation: Operación
+            parameters: Parámetros de la operación
+            duration_ms: Duración de la operación
+            plan: Plan normalizado o None si no se pudo obtener
+        """
+        target_parameter = EXPLAINABLE_OPERATIONS.get((service, operation))
+        entry = {
+            "time": datetime.datetime.now().isoformat(),
+            "service": service,
+            "operation": operation,
+            "database": parameters.get('database_name'),
+            "target": parameters.get(target_parameter) if target_parameter else None,
+            "duration_ms": round(duration_ms, 1),
+            "query": {key: parameters[key] for key in QUERY_PARAMETERS if parameters.get(key)},
+            "plan": None,
+            "full_scans": []
+        }
+        if plan is not None:
+            entry["plan"] = {key: value for key, value in plan.items() if key != 'raw'}
+            entry["full_scans"] = plan.get('full_scans', [])
+
+        with self._lock:
+            self._entries.append(entry)
+            for scan in entry["full_scans"]:
+                if not scan.get('fields'):
+                    continue
+                key = (plan['backend'], entry["database"], scan['target'], tuple(scan['fields']))
+                stats = self._scans.setdefault(key, {"occurrences": 0, "max_duration_ms": 0, "last_seen": None})
+                stats["occurrences"] += 1
+                stats["max_duration_ms"] = max(stats["max_duration_ms"], entry["duration_ms"])
+                stats["last_seen"] = entry["time"]
+
+    def slow_operations(self, limit=None):
+        """Consultas lentas registradas, de la más reciente a la más antigua."""
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def suggestions(self):
+        """
+        Índices sugeridos por recorridos completos repetidos.
+
+        Returns:
+            Lista ordenada por número de recorridos con el index_json para createIndex
+        """
+        with self._lock:
+            scans = dict(self._scans)
+
+        result = []
+        for (backend, database, target, fields), stats in scans.items():
+            if stats["occurrences"] < self.min_occurrences:
+                continue
+            result.append({
+                "service": 'sql' if backend == 'mysql' else 'nosql',
+                "database": database,
+                "target": target,
+                "fields": list(fields),
+                "occurrences": stats["occurrences"],
+                "max_duration_ms": stats["max_duration_ms"],
+                "last_seen": stats["last_seen"],
+                "index_json": {"keys": list(fields)},
+                "reason": f"{stats['occurrences']} consultas lentas recorrieron {target} completa filtrando por {', '.join(fields)}"
+            })
+        result.sort(key=lambda item: (-item["occurrences"], -item["max_duration_ms"]))
+        return result
+
+    def stats(self):
+        """Resumen para el health check."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "threshold_ms": self.threshold_ms,
+                "slow_operations": self._observed,
+                "buffered": len(self._entries),
+                "pending_plans": self._pending
+            }
+
+# Asesor global del proceso (soap_service le asigna la función que obtiene los planes)
+query_advisor = QueryAdvisor()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Escrituras masivas en MongoDB (operación bulkWrite)
+Convierte una lista de operaciones en el formato de bulkWrite de MongoDB
+(insertOne, updateOne, updateMany, replaceOne, deleteOne, deleteMany) en
+peticiones de pymongo y las envía por lotes, devolviendo los contadores por
+tipo de operación y los errores con el índice de la operación original.
+"""
+
+import os
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import InsertOne, UpdateOne, UpdateMany, ReplaceOne, DeleteOne, DeleteMany
+from pymongo.errors import BulkWriteError, PyMongoError
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+BULK_WRITE_BATCH_SIZE = int(os.getenv('BULK_WRITE_BATCH_SIZE', '1000'))
+BULK_WRITE_MAX_OPERATIONS = int(os.getenv('BULK_WRITE_MAX_OPERATIONS', '100000'))
+# Lotes enviados a la vez en modo no ordenado
+BULK_WRITE_PARALLELISM = int(os.getenv('BULK_WRITE_PARALLELISM', '4'))
+
+OPERATION_TYPES = ('insertOne', 'updateOne', 'updateMany', 'replaceOne', 'deleteOne', 'deleteMany')
+
+logger = logging.getLogger(__name__)
+
+def _as_update(update):
+    """Igual que updateDocument: un documento sin operadores se aplica con $set."""
+    if isinstance(update, dict) and update and not any(key.startswith('$') for key in update):
+        return {'$set': update}
+    return update
+
+def parse_operation(index, operation):
+    """
+    Convierte una operación en formato bulkWrite en una petición de pymongo.
+
+    Args:
+        index: Posición de la operación (para los mensajes de error)
+        operation: {"insertOne": {"document": {...}}}, {"updateOne": {"filter": ..., "update": ...}}, ...
+
+    Returns:
+        Tupla (tipo de operación, petición de pymongo)
+
+    Raises:
+        ValueError: Si la operación no es válida
+    """
+    if not isinstance(operation, dict) or len(operation) != 1:
+        raise ValueError(f"Operación {index}: se esperaba un objeto con un único tipo de operación")
+    kind, spec = next(iter(operation.items()))
+    if kind not in OPERATION_TYPES:
+        raise ValueError(f"Operación {index}: tipo no soportado {kind}. Use uno de: {', '.join(OPERATION_TYPES)}")
+    if not isinstance(spec, dict):
+        raise ValueError(f"Operación {index} ({kind}): los argumentos deben ser un objeto")
+
+    try:
+        if kind == 'insertOne':
+            return kind, InsertOne(spec['document'])
+        if kind == 'updateOne':
+            return kind, UpdateOne(spec['filter'], _as_update(spec['update']), upsert=bool(spec.get('upsert', False)))
+        if kind == 'updateMany':
+            return kind, UpdateMany(spec['filter'], _as_update(spec['update']), upsert=bool(spec.get('upsert', False)))
+        if kind == 'replaceOne':
+            return kind, ReplaceOne(spec['filter'], spec['replacement'], upsert=bool(spec.get('upsert', False)))
+        if kind == 'deleteOne':
+            return kind, DeleteOne(spec['filter'])
+        return kind, DeleteMany(spec['filter'])
+    except KeyError as e:
+        raise ValueError(f"Operación {index} ({kind}): falta el campo {e}")
+    except TypeError as e:
+        raise ValueError(f"Operación {index} ({kind}): {e}")
+
+def parse_operations(operations):
+    """
+    Valida la lista completa de operaciones antes de enviar ninguna.
+
+    Returns:
+        Tupla (tipos de operación, peticiones de pymongo)
+
+    Raises:
+        ValueError: Si la lista o alguna operación no es válida
+    """
+    if isinstance(operations, dict):
+        operations = [operations]
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations_json debe ser una lista de operaciones no vacía")
+    if len(operations) > BULK_WRITE_MAX_OPERATIONS:
+        raise ValueError(f"Se admiten como máximo {BULK_WRITE_MAX_OPERATIONS} operaciones por llamada")
+
+    kinds, requests = [], []
+    for index, operation in enumerate(operations):
+        kind, request = parse_operation(index, operation)
+        kinds.append(kind)
+        requests.append(request)
+    return kinds, requests
+
+def _execute_batch(collection, start, batch, ordered):
+    """
+    Envía un lote y devuelve su resultado con los índices globales.
+
+    Returns:
+        Diccionario en el formato de BulkWriteResult.bulk_api_result
+    """
+    try:
+        details = collection.bulk_write(batch, ordered=ordered).bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+    except PyMongoError as e:
+        # Error de conexión o del servidor: no se sabe qué se aplicó en modo no ordenado
+        details = {"writeErrors": [{"index": i, "code": None, "errmsg": str(e)} for i in range(len(batch))]}
+        if ordered:
+            details["writeErrors"] = details["writeErrors"][:1]
+
+    for item in details.get('writeErrors', []):
+        item['index'] += start
+    for item in details.get('upserted', []):
+        item['index'] += start
+    # Los errores de write concern afectan al lote entero, no a una operación
+    for item in details.get('writeConcernErrors', []):
+        item['batch'] = start
+    return details
+
+def run_bulk_write(collection, kinds, requests, ordered=True, batch_size=BULK_WRITE_BATCH_SIZE,
+                   parallelism=BULK_WRITE_PARALLELISM):
+    """
+    Ejecuta las operaciones por lotes.
+
+    En modo ordenado los lotes se envían de uno en uno y la ejecución se
+    detiene en el primer error. En modo no ordenado el servidor aplica cada
+    lote en paralelo y se envían hasta parallelism lotes a la vez.
+
+    Args:
+        collection: Colección de pymongo
+        kinds: Tipo de cada operación
+        requests: Peticiones de pymongo
+        ordered: Modo ordenado
+        batch_size: Operaciones por lote
+        parallelism: Lotes simultáneos en modo no ordenado
+
+    Returns:
+        Diccionario con los contadores, los errores por operación y los _id insertados por upsert.
+        Los errores de write concern se añaden al final de errors con index None y el
+        índice de la primera operación de su lote en batch.
+    """
+    batches = [(start, requests[start:start + batch_size]) for start in range(0, len(requests), batch_size)]
+
+    results = []
+    if ordered or parallelism <= 1 or len(batches) == 1:
+        for start, batch in batches:
+            details = _execute_batch(collection, start, batch, ordered)
+            results.append(details)
+            if ordered and details.get('writeErrors'):
+                break
+    else:
+        with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='bulk-write') as executor:
+            futures = [
+                # Cada hilo hereda el contexto (plazo de pymongo.timeout)
+                executor.submit(contextvars.copy_context().run, _execute_batch, collection, start, batch, ordered)
+                for start, batch in batches
+            ]
+            results = [future.result() for future in futures]
+
+    summary = {
+        "ordered": ordered,
+        "batches": len(results),
+        "inserted_count": 0,
+        "matched_count": 0,
+        "modified_count": 0,
+        "deleted_count": 0,
+        "upserted_count": 0,
+        "upserted_ids": [],
+        "counts": {kind: {"requested": 0, "failed": 0} for kind in OPERATION_TYPES if kind in kinds},
+        "errors": [],
+        "not_executed": 0
+    }
+    for kind in kinds:
+        summary["counts"][kind]["requested"] += 1
+
+    for details in results:
+        summary["inserted_count"] += details.get('nInserted', 0)
+        summary["matched_count"] += details.get('nMatched', 0)
+        summary["modified_count"] += details.get('nModified', 0)
+        summary["deleted_count"] += details.get('nRemoved', 0)
+        summary["upserted_count"] += details.get('nUpserted', 0)
+        summary["upserted_ids"].extend({"index": item['index'], "_id": item['_id']} for item in details.get('upserted', []))
+        for item in details.get('writeErrors', []):
+            kind = kinds[item['index']]
+            summary["counts"][kind]["failed"] += 1
+            summary["errors"].append({
+                "index": item['index'],
+                "operation": kind,
+                "code": item.get('code'),
+                "error": item.get('errmsg')
+            })
+
+    # En modo ordenado las operaciones posteriores al primer error no se ejecutan
+    if ordered and summary["errors"]:
+        summary["not_executed"] = len(requests) - summary["errors"][0]["index"] - 1
+
+    summary["errors"].sort(key=lambda item: item["index"])
+    # Las escrituras se aplicaron pero sin la durabilidad pedida
+    for details in results:
+        for item in details.get('writeConcernErrors', []):
+            summary["errors"].append({
+                "index": None,
+                "batch": item.get('batch'),
+                "operation": "writeConcern",
+                "code": item.get('code'),
+                "error": item.get('errmsg')
+            })
+    summary["success"] = not summary["errors"]
+    return summary
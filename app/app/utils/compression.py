@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compresión HTTP (gzip, deflate y zstd) para las peticiones y respuestas SOAP
+"""
+
+import io
+import os
+import gzip
+import zlib
+import logging
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Algoritmos habilitados, en orden de preferencia ante empates de calidad
+COMPRESSION_ALGORITHMS = [
+    algorithm.strip().lower()
+    for algorithm in os.getenv('COMPRESSION_ALGORITHMS', 'zstd,gzip,deflate').split(',')
+    if algorithm.strip()
+]
+# Las respuestas más pequeñas se envían sin comprimir
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_DEFLATE_LEVEL = int(os.getenv('COMPRESSION_DEFLATE_LEVEL', '6'))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv('COMPRESSION_ZSTD_LEVEL', '3'))
+# Tamaño máximo de un cuerpo de petición una vez descomprimido
+MAX_DECOMPRESSED_SIZE = int(os.getenv('MAX_DECOMPRESSED_SIZE', str(512 * 1024 * 1024)))
+
+logger = logging.getLogger(__name__)
+
+class CompressionError(ValueError):
+    """Cuerpo comprimido no válido o codificación no soportada."""
+
+def available_algorithms():
+    """Algoritmos habilitados por configuración y disponibles en el entorno."""
+    return [
+        algorithm for algorithm in COMPRESSION_ALGORITHMS
+        if algorithm in ('gzip', 'deflate') or (algorithm == 'zstd' and zstandard is not None)
+    ]
+
+def negotiate(accept_encoding):
+    """
+    Elige el algoritmo de compresión a partir de la cabecera Accept-Encoding.
+
+    Args:
+        accept_encoding: Valor de la cabecera (puede incluir factores q)
+
+    Returns:
+        Nombre del algoritmo o None si no se debe comprimir
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for item in accept_encoding.split(','):
+        token, _, params = item.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+
+    best, best_quality = None, 0.0
+    for algorithm in available_algorithms():
+        quality = accepted.get(algorithm, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = algorithm, quality
+    return best
+
+def compress(data, algorithm):
+    """
+    Comprime datos con el algoritmo indicado.
+
+    Args:
+        data: Bytes a comprimir
+        algorithm: gzip, deflate o zstd
+
+    Returns:
+        Bytes comprimidos
+    """
+    if algorithm == 'gzip':
+        return gzip.compress(data, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+    if algorithm == 'deflate':
+        return zlib.compress(data, COMPRESSION_DEFLATE_LEVEL)
+    if algorithm == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(data)
+    raise CompressionError(f"Algoritmo de compresión no soportado: {algorithm}")
+
+def compress_stream(chunks, algorithm):
+    """
+    Comprime un flujo de fragmentos sin reunirlo en memoria.
+
+    Args:
+        chunks: Iterable de bytes
+        algorithm: gzip, deflate o zstd
+
+    Returns:
+        Generador de bytes comprimidos
+    """
+    if algorithm == 'gzip':
+        compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    elif algorithm == 'deflate':
+        compressor = zlib.compressobj(COMPRESSION_DEFLATE_LEVEL)
+    elif algorithm == 'zstd' and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+    else:
+        raise CompressionError(f"Algoritmo de compresión no soportado: {algorithm}")
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def decompress(data, content_encoding, max_size=MAX_DECOMPRESSED_SIZE):
+    """
+    Descomprime el cuerpo de una petición según su Content-Encoding.
+
+    Args:
+        data: Cuerpo recibido
+        content_encoding: Valor de la cabecera Content-Encoding
+        max_size: Tamaño máximo admitido una vez descomprimido
+
+    Returns:
+        Bytes descomprimidos
+
+    Raises:
+        CompressionError: Si la codificación no es válida o se supera max_size
+    """
+    encoding = (content_encoding or 'identity').strip().lower()
+    if encoding in ('', 'identity'):
+        return data
+
+    try:
+        if encoding in ('gzip', 'x-gzip'):
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            decompressor = zlib.decompressobj()
+        elif encoding == 'zstd' and zstandard is not None:
+            # Leer por bloques y parar al superar max_size: la cabecera del
+            # frame podría declarar un tamaño enorme
+            reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+            chunks = []
+            total = 0
+            while total <= max_size:
+                chunk = reader.read(min(STREAM_READ_SIZE, max_size + 1 - total))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                total += len(chunk)
+            if total > max_size:
+                raise CompressionError("El cuerpo descomprimido supera el tamaño máximo permitido")
+            return b''.join(chunks)
+        else:
+            raise CompressionError(f"Content-Encoding no soportado: {encoding}")
+
+        # Limitar la salida para no descomprimir bombas sin control
+        result = decompressor.decompress(data, max_size + 1)
+        if len(result) > max_size or decompressor.unconsumed_tail:
+            raise CompressionError("El cuerpo descomprimido supera el tamaño máximo permitido")
+        if not decompressor.eof:
+            raise CompressionError("Cuerpo comprimido truncado")
+        return result
+    except (zlib.error, EOFError) as e:
+        raise CompressionError(f"Cuerpo comprimido no válido: {e}")
+    except CompressionError:
+        raise
+    except Exception as e:
+        raise CompressionError(f"Cuerpo comprimido no válido: {e}")
+
+# Bytes leídos del origen en cada paso de la descompresión en streaming
+STREAM_READ_SIZE = 64 * 1024
+
+class _RawReader(io.RawIOBase):
+    """Adapta a io.RawIOBase cualquier objeto con read() (p. ej. request.stream)."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+class _ZlibReader(io.RawIOBase):
+    """Descomprime gzip o deflate a medida que se lee, sin cargar el cuerpo completo."""
+
+    def __init__(self, stream, wbits):
+        self._stream = stream
+        self._decompressor = zlib.decompressobj(wbits)
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            while not self._pending:
+                data = self._decompressor.unconsumed_tail or self._stream.read(STREAM_READ_SIZE)
+                if not data:
+                    if not self._decompressor.eof:
+                        raise CompressionError("Cuerpo comprimido truncado")
+                    return 0
+                # Salida acotada para no expandir de golpe un bloque muy comprimido
+                self._pending = self._decompressor.decompress(data, STREAM_READ_SIZE)
+        except zlib.error as e:
+            raise CompressionError(f"Cuerpo comprimido no válido: {e}")
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+def decompressing_reader(stream, content_encoding):
+    """
+    Envuelve un flujo de entrada para leerlo descomprimido según su Content-Encoding.
+
+    Args:
+        stream: Objeto con read() (cuerpo de la petición)
+        content_encoding: Valor de la cabecera Content-Encoding
+
+    Returns:
+        io.BufferedReader con el contenido descomprimido
+
+    Raises:
+        CompressionError: Si la codificación no está soportada
+    """
+    encoding = (content_encoding or 'identity').strip().lower()
+    if encoding in ('', 'identity'):
+        return io.BufferedReader(_RawReader(stream))
+    if encoding in ('gzip', 'x-gzip'):
+        return io.BufferedReader(_ZlibReader(stream, 16 + zlib.MAX_WBITS))
+    if encoding == 'deflate':
+        return io.BufferedReader(_ZlibReader(stream, zlib.MAX_WBITS))
+    if encoding == 'zstd' and zstandard is not None:
+        return io.BufferedReader(_RawReader(zstandard.ZstdDecompressor().stream_reader(stream)))
+    raise CompressionError(f"Content-Encoding no soportado: {encoding}")
+
+def compress_response(response, accept_encoding, min_size=COMPRESSION_MIN_SIZE):
+    """
+    Comprime una respuesta Flask si el cliente lo admite y supera el umbral.
+
+    Las respuestas en streaming o ya codificadas se devuelven sin cambios.
+
+    Args:
+        response: flask.Response
+        accept_encoding: Cabecera Accept-Encoding de la petición
+        min_size: Tamaño mínimo para comprimir
+
+    Returns:
+        La misma respuesta, comprimida si procede
+    """
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    algorithm = negotiate(accept_encoding)
+    if algorithm is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    response.set_data(compress(body, algorithm))
+    response.headers['Content-Encoding'] = algorithm
+    return response
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cursores de servidor para la lectura incremental de resultados
+Mantiene vivos cursores MySQL no bufferizados y cursores de pymongo entre
+varias llamadas SOAP, identificados por un cursor_id.
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+from bson import json_util
+from dotenv import load_dotenv
+from .db_pool import MYSQL_POOL_SIZE
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Configuración de cursores
+CURSOR_IDLE_TIMEOUT = int(os.getenv('CURSOR_IDLE_TIMEOUT', '300'))
+CURSOR_MAX_PER_SESSION = int(os.getenv('CURSOR_MAX_PER_SESSION', '5'))
+CURSOR_MAX_TOTAL = int(os.getenv('CURSOR_MAX_TOTAL', '100'))
+# Cada cursor SQL retiene una conexión de su pool: se deja al menos la mitad
+# del pool libre para el resto de peticiones a la misma base de datos
+CURSOR_MAX_PER_POOL = int(os.getenv('CURSOR_MAX_PER_POOL', str(max(1, MYSQL_POOL_SIZE // 2))))
+CURSOR_DEFAULT_PAGE_SIZE = int(os.getenv('CURSOR_DEFAULT_PAGE_SIZE', '1000'))
+CURSOR_MAX_PAGE_SIZE = int(os.getenv('CURSOR_MAX_PAGE_SIZE', '10000'))
+CURSOR_MAX_PAGE_BYTES = int(os.getenv('CURSOR_MAX_PAGE_BYTES', str(8 * 1024 * 1024)))
+
+logger = logging.getLogger(__name__)
+
+class CursorError(Exception):
+    """Error de uso de un cursor (inexistente, expirado o límite alcanzado)."""
+
+class ServerCursor:
+    """
+    Cursor abierto en el servidor y anclado a una conexión.
+
+    Attributes:
+        cursor_id: Identificador público del cursor
+        owner: Token de sesión propietario
+        kind: 'sql' o 'nosql'
+        serializer: RowSerializer del resultado (solo SQL)
+        pool_key: Pool MySQL del que procede la conexión anclada (solo SQL)
+        columns: Columnas del resultado (solo SQL)
+        rows_fetched: Filas/documentos entregados hasta ahora
+        bytes_fetched: Bytes JSON entregados hasta ahora
+    """
+
+    def __init__(self, owner, kind, cursor, connection, serializer=None, pool_key=None):
+        self.cursor_id = str(uuid.uuid4())
+        self.owner = owner
+        self.kind = kind
+        self.cursor = cursor
+        self.connection = connection
+        self.serializer = serializer
+        self.pool_key = pool_key
+        self.columns = serializer.columns if serializer else []
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.rows_fetched = 0
+        self.bytes_fetched = 0
+        self.exhausted = False
+        # Filas leídas del servidor que no cupieron en la página anterior
+        self.pending = deque()
+        self.lock = threading.Lock()
+
+    def _read(self, count):
+        """Lee hasta count registros del cursor subyacente."""
+        if self.kind == 'sql':
+            return self.cursor.fetchmany(count)
+
+        documents = []
+        for document in self.cursor:
+            documents.append(document)
+            if len(documents) >= count:
+                break
+        return documents
+
+    def _dumps(self, row):
+        if self.kind == 'sql':
+            return self.serializer.dumps_row(row)
+        return json_util.dumps(row)
+
+    def fetch(self, page_size, max_bytes=CURSOR_MAX_PAGE_BYTES):
+        """
+        Obtiene la siguiente página de resultados ya serializados.
+
+        La página se corta al alcanzar page_size registros o max_bytes de JSON,
+        lo que ocurra antes (siempre se entrega al menos un registro).
+
+        Args:
+            page_size: Número máximo de registros
+            max_bytes: Tamaño máximo aproximado de la página en bytes
+
+        Returns:
+            Tupla (lista de registros JSON, bytes de la página)
+        """
+        chunks = []
+        page_bytes = 0
+
+        while len(chunks) < page_size and not self.exhausted:
+            if not self.pending:
+                # Leer en bloques pequeños para no superar el presupuesto de memoria
+                batch = self._read(min(page_size - len(chunks), 500))
+                if not batch:
+                    self.exhausted = True
+                    break
+                self.pending.extend(batch)
+
+            chunk = self._dumps(self.pending.popleft())
+            chunks.append(chunk)
+            page_bytes += len(chunk) + 1
+
+            if page_bytes >= max_bytes:
+                break
+
+        self.rows_fetched += len(chunks)
+        self.bytes_fetched += page_bytes
+        self.last_used = time.monotonic()
+        return chunks, page_bytes
+
+    def release(self):
+        """Cierra el cursor y devuelve la conexión anclada a su pool."""
+        if self.kind == 'sql':
+            try:
+                if self.exhausted:
+                    self.cursor.close()
+                else:
+                    # Drenar millones de filas pendientes sería más caro que
+                    # reconectar: el pool reabrirá la conexión al reutilizarla
+                    self.connection.disconnect()
+            except Exception as e:
+                logger.warning(f"Error al cerrar el cursor {self.cursor_id}: {e}")
+            finally:
+                try:
+                    self.connection.close()
+                except Exception:
+                    pass
+        else:
+            try:
+                self.cursor.close()
+            except Exception as e:
+                logger.warning(f"Error al cerrar el cursor {self.cursor_id}: {e}")
+
+        self.pending.clear()
+
+class CursorRegistry:
+    """
+    Registro de cursores abiertos con expiración por inactividad y límites
+    por sesión, por pool de conexiones y globales.
+    """
+
+    def __init__(self, idle_timeout=CURSOR_IDLE_TIMEOUT, max_per_session=CURSOR_MAX_PER_SESSION,
+                 max_total=CURSOR_MAX_TOTAL, max_per_pool=CURSOR_MAX_PER_POOL):
+        self.idle_timeout = idle_timeout
+        self.max_per_session = max_per_session
+        self.max_total = max_total
+        self.max_per_pool = max_per_pool
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+    def expire_idle(self):
+        """
+        Cierra los cursores inactivos durante más de idle_timeout segundos.
+
+        Returns:
+            Número de cursores cerrados
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                c for c in self._cursors.values()
+                if now - c.last_used > self.idle_timeout and not c.lock.locked()
+            ]
+            for server_cursor in expired:
+                del self._cursors[server_cursor.cursor_id]
+
+        for server_cursor in expired:
+            logger.info(f"Cursor {server_cursor.cursor_id} expirado por inactividad")
+            server_cursor.release()
+
+        return len(expired)
+
+    def check_capacity(self, owner, pool_key=None, pending=None):
+        """
+        Verifica que se puede abrir un nuevo cursor para la sesión.
+
+        Args:
+            owner: Token de sesión
+            pool_key: Pool MySQL del que se tomará la conexión (None en NoSQL)
+            pending: Cursor que se va a registrar (no cuenta para sí mismo)
+
+        Raises:
+            CursorError: Si se alcanzó el límite por sesión, por pool o global
+        """
+        self.expire_idle()
+        with self._lock:
+            cursors = [c for c in self._cursors.values() if c is not pending]
+            if len(cursors) >= self.max_total:
+                raise CursorError("Se alcanzó el número máximo de cursores abiertos en el servidor")
+            owned = sum(1 for c in cursors if c.owner == owner)
+            if owned >= self.max_per_session:
+                raise CursorError(f"Se alcanzó el máximo de {self.max_per_session} cursores abiertos por sesión")
+            if pool_key is not None:
+                pinned = sum(1 for c in cursors if c.pool_key == pool_key)
+                if pinned >= self.max_per_pool:
+                    raise CursorError(f"Se alcanzó el máximo de {self.max_per_pool} cursores abiertos sobre esta base de datos")
+
+    def register(self, server_cursor):
+        """
+        Registra un cursor ya abierto.
+
+        Raises:
+            CursorError: Si se alcanzó algún límite (el cursor se libera)
+        """
+        with self._lock:
+            # Registrar antes de comprobar para que dos aperturas simultáneas
+            # no superen juntas los límites
+            self._cursors[server_cursor.cursor_id] = server_cursor
+        try:
+            self.check_capacity(server_cursor.owner, server_cursor.pool_key, pending=server_cursor)
+        except CursorError:
+            with self._lock:
+                self._cursors.pop(server_cursor.cursor_id, None)
+            server_cursor.release()
+            raise
+        return server_cursor
+
+    def get(self, cursor_id, owner):
+        """
+        Obtiene un cursor abierto de la sesión indicada.
+
+        Raises:
+            CursorError: Si el cursor no existe, expiró o pertenece a otra sesión
+        """
+        self.expire_idle()
+        with self._lock:
+            server_cursor = self._cursors.get(cursor_id)
+        if server_cursor is None or server_cursor.owner != owner:
+            raise CursorError(f"Cursor no encontrado o expirado: {cursor_id}")
+        return server_cursor
+
+    def close(self, cursor_id, owner):
+        """
+        Cierra un cursor de la sesión indicada.
+
+        Returns:
+            True si el cursor existía
+        """
+        with self._lock:
+            server_cursor = self._cursors.get(cursor_id)
+            if server_cursor is None or server_cursor.owner != owner:
+                return False
+            del self._cursors[cursor_id]
+
+        with server_cursor.lock:
+            server_cursor.release()
+        return True
+
+    def stats(self):
+        """Devuelve estadísticas de los cursores abiertos."""
+        with self._lock:
+            cursors = list(self._cursors.values())
+        return {
+            "open_cursors": len(cursors),
+            "rows_fetched": sum(c.rows_fetched for c in cursors),
+            "bytes_fetched": sum(c.bytes_fetched for c in cursors),
+            "pending_rows": sum(len(c.pending) for c in cursors)
+        }
+
+def parse_page_size(value):
+    """
+    Normaliza el tamaño de página solicitado por el cliente.
+
+    Args:
+        value: Tamaño de página recibido (string o None)
+
+    Returns:
+        Entero entre 1 y CURSOR_MAX_PAGE_SIZE
+    """
+    if not value:
+        return CURSOR_DEFAULT_PAGE_SIZE
+    return max(1, min(int(value), CURSOR_MAX_PAGE_SIZE))
+
+# Registro global de cursores del proceso
+cursor_registry = CursorRegistry()
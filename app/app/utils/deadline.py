@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Plazos de ejecución de las operaciones
+El proxy envía el tiempo disponible en la cabecera X-Request-Timeout-Ms y cada
+operación tiene un tiempo por defecto y un máximo configurables. El plazo se
+traduce en la pista MAX_EXECUTION_TIME de cada SELECT y un vigilante KILL
+QUERY para MySQL, y en maxTimeMS (pymongo.timeout) para MongoDB.
+"""
+
+import os
+import re
+import time
+import heapq
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+DEADLINE_HEADER = 'X-Request-Timeout-Ms'
+
+# Tiempo por defecto y máximo (segundos) de las operaciones sin configuración propia
+OPERATION_TIMEOUT_DEFAULT = float(os.getenv('OPERATION_TIMEOUT_DEFAULT', '30'))
+OPERATION_TIMEOUT_MAX = float(os.getenv('OPERATION_TIMEOUT_MAX', '120'))
+# Margen antes de que el vigilante cancele una consulta que ignoró MAX_EXECUTION_TIME
+KILL_QUERY_GRACE = float(os.getenv('KILL_QUERY_GRACE', '1'))
+
+# Operaciones con tiempos propios: operación -> (por defecto, máximo)
+OPERATION_TIMEOUTS = {
+    'listDatabases': (10, 30),
+    'listTables': (10, 30),
+    'listCollections': (10, 30),
+    'select': (30, 120),
+    'join': (30, 120),
+    'aggregate': (30, 120),
+    'findDocument': (30, 120),
+    'aggregateDocuments': (60, 300),
+    'insert': (120, 600),
+    'insertDocument': (120, 600),
+    'bulkWrite': (120, 600),
+    'importTable': (300, 3600),
+    'importCollection': (300, 3600),
+    'migrateDatabase': (600, 3600),
+    'createIndex': (600, 3600)
+}
+
+def _parse_overrides(value):
+    """Interpreta OPERATION_TIMEOUTS='join=60:300,select=10'."""
+    overrides = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        operation, _, limits = item.partition('=')
+        default, _, cap = limits.partition(':')
+        try:
+            overrides[operation.strip()] = (float(default), float(cap or default))
+        except ValueError:
+            continue
+    return overrides
+
+OPERATION_TIMEOUTS.update(_parse_overrides(os.getenv('OPERATION_TIMEOUTS', '')))
+
+logger = logging.getLogger(__name__)
+
+# Plazo de la petición en curso (por hilo)
+_state = threading.local()
+
+class DeadlineExceeded(Exception):
+    """El plazo de la petición se agotó antes de poder ejecutar la operación."""
+
+def operation_timeout(operation, requested_ms=None):
+    """
+    Calcula el tiempo disponible para una operación.
+
+    Args:
+        operation: Nombre de la operación
+        requested_ms: Tiempo solicitado por el cliente o el proxy en milisegundos
+
+    Returns:
+        Segundos disponibles: el solicitado (o el por defecto) sin superar el máximo
+    """
+    default, cap = OPERATION_TIMEOUTS.get(operation, (OPERATION_TIMEOUT_DEFAULT, OPERATION_TIMEOUT_MAX))
+    try:
+        requested = float(requested_ms) / 1000 if requested_ms else None
+    except ValueError:
+        requested = None
+    return min(requested if requested is not None else default, cap)
+
+class _Watch:
+    """Acción programada en el vigilante (se descarta si se cancela antes)."""
+
+    __slots__ = ('when', 'function', 'args', 'cancelled')
+
+    def __init__(self, when, function, args):
+        self.when = when
+        self.function = function
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class DeadlineWatchdog:
+    """
+    Un único hilo que ejecuta las acciones de vencimiento de todos los plazos.
+
+    Las acciones se guardan en un montículo ordenado por instante de
+    ejecución; cancelarlas solo las marca, así que programar y cancelar no
+    cuestan un hilo por conexión.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, delay, function, *args):
+        """
+        Programa function(*args) dentro de delay segundos.
+
+        Returns:
+            Acción programada (con método cancel)
+        """
+        watch = _Watch(time.monotonic() + delay, function, args)
+        with self._condition:
+            heapq.heappush(self._heap, (watch.when, next(self._sequence), watch))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='deadline-watchdog', daemon=True)
+                self._thread.start()
+            # Despertar al hilo solo si la nueva acción es la más próxima
+            if self._heap[0][2] is watch:
+                self._condition.notify()
+        return watch
+
+    def pending(self):
+        """Acciones programadas sin cancelar."""
+        with self._condition:
+            return sum(1 for _, _, watch in self._heap if not watch.cancelled)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                wait = self._heap[0][0] - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                watch = heapq.heappop(self._heap)[2]
+                watch.cancelled = True
+            try:
+                watch.function(*watch.args)
+            except Exception as e:
+                logger.error(f"Error en una acción del vigilante de plazos: {e}")
+
+class Deadline:
+    """Plazo de una petición y vigilantes de las consultas MySQL abiertas durante ella."""
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+        self.timers = []
+        self.lock = threading.Lock()
+
+    def remaining(self):
+        """Segundos restantes (puede ser negativo si ya venció)."""
+        return self.expires_at - time.monotonic()
+
+    def expire(self):
+        """Vence el plazo de inmediato y cancela las consultas MySQL vigiladas."""
+        with self.lock:
+            self.expires_at = time.monotonic()
+            timers, self.timers = self.timers, []
+        for timer in timers:
+            if not timer.cancelled:
+                timer.cancel()
+                timer.function(*timer.args)
+
+    def cancel(self):
+        with self.lock:
+            for timer in self.timers:
+                timer.cancel()
+            self.timers = []
+
+@contextmanager
+def request_deadline(seconds):
+    """
+    Establece el plazo de la operación en curso.
+
+    Raises:
+        DeadlineExceeded: Si el plazo ya está agotado al empezar
+    """
+    if seconds <= 0:
+        raise DeadlineExceeded("El plazo de la petición ya venció")
+    previous = getattr(_state, 'deadline', None)
+    deadline = Deadline(seconds)
+    _state.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        deadline.cancel()
+        _state.deadline = previous
+
+def current_deadline():
+    """Plazo de la operación en curso o None."""
+    return getattr(_state, 'deadline', None)
+
+def remaining_seconds():
+    """Segundos restantes de la operación en curso o None si no hay plazo."""
+    deadline = current_deadline()
+    return deadline.remaining() if deadline else None
+
+# SELECT de nivel superior (las únicas sentencias que admiten MAX_EXECUTION_TIME)
+_SELECT = re.compile(r'^(\s*SELECT\b)', re.IGNORECASE)
+_SELECT_BYTES = re.compile(rb'^(\s*SELECT\b)', re.IGNORECASE)
+
+def with_execution_time(statement, milliseconds):
+    """Añade la pista /*+ MAX_EXECUTION_TIME(n) */ a un SELECT; el resto no cambia."""
+    if isinstance(statement, (bytes, bytearray)):
+        return _SELECT_BYTES.sub(rb'\1 /*+ MAX_EXECUTION_TIME(%d) */' % milliseconds, bytes(statement), count=1)
+    return _SELECT.sub(rf'\1 /*+ MAX_EXECUTION_TIME({milliseconds}) */', statement, count=1)
+
+def apply_mysql_deadline(conn, kill_query):
+    """
+    Acota las consultas de una conexión MySQL al plazo de la operación en curso.
+
+    Cada SELECT recibe la pista MAX_EXECUTION_TIME con el tiempo que queda al
+    ejecutarlo (sin una sentencia SET adicional) y el vigilante compartido
+    ejecuta KILL QUERY si la conexión sigue ocupada al vencer el plazo.
+
+    Args:
+        conn: Conexión MySQL recién abierta
+        kill_query: Función que recibe el id de conexión y cancela su consulta
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return
+
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded("El plazo de la petición venció")
+
+    # Los cursores (puro Python y extensión C) ejecutan con cmd_query de la conexión
+    cmd_query = conn.cmd_query
+
+    def bounded_cmd_query(query, *args, **kwargs):
+        milliseconds = max(1, int(deadline.remaining() * 1000))
+        return cmd_query(with_execution_time(query, milliseconds), *args, **kwargs)
+
+    conn.cmd_query = bounded_cmd_query
+
+    timer = watchdog.schedule(remaining + KILL_QUERY_GRACE, _start_kill, kill_query, conn.connection_id)
+    with deadline.lock:
+        deadline.timers.append(timer)
+
+def _start_kill(kill_query, connection_id):
+    # KILL QUERY abre otra conexión: no debe retrasar al resto de vigilantes
+    threading.Thread(target=_kill, args=(kill_query, connection_id), daemon=True).start()
+
+def _kill(kill_query, connection_id):
+    logger.warning(f"Plazo agotado: cancelando la consulta de la conexión {connection_id}")
+    try:
+        kill_query(connection_id)
+    except Exception as e:
+        logger.error(f"No se pudo cancelar la consulta de la conexión {connection_id}: {e}")
+
+# Vigilante de plazos compartido por el proceso
+watchdog = DeadlineWatchdog()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Planes de ejecución de las consultas (modo explain)
+Ejecuta EXPLAIN ANALYZE (o EXPLAIN FORMAT=TREE sin ejecutar la consulta) en
+MySQL y el comando explain con executionStats (o queryPlanner) en MongoDB, y
+convierte ambos resultados a una lista común de etapas que indica las tablas
+o colecciones recorridas completas y los campos por los que se filtraron.
+"""
+
+import re
+import logging
+
+EXPLAIN_MODES = ('analyze', 'plan')
+
+logger = logging.getLogger(__name__)
+
+# "-> Table scan on alumnos  (cost=0.55 rows=3) (actual time=0.028..0.032 rows=3 loops=1)"
+_MYSQL_NODE = re.compile(
+    r'^(?P<indent>\s*)-> (?P<operation>.*?)'
+    r'(?:\s+\(cost=(?P<cost>[\d.e+]+)(?:\.\.[\d.e+]+)? rows=(?P<rows>[\d.e+]+)\))?'
+    r'(?:\s+\(actual time=[\d.e+]+\.\.(?P<time>[\d.e+]+) rows=(?P<actual_rows>[\d.e+]+) loops=(?P<loops>\d+)\)'
+    r'|\s+\((?P<never>never executed)\))?\s*$'
+)
+_MYSQL_TABLE = re.compile(r' on `?(\w+)`?')
+_MYSQL_INDEX = re.compile(r' using `?(\w+)`?')
+_MYSQL_COLUMN = re.compile(r'`?(\w+)`?\.`?(\w+)`?\s*(?:=|<=>|<|>|<=|>=|<>|!=|\bin\b|\blike\b|\bis\b|\bbetween\b)', re.IGNORECASE)
+
+def parse_explain_mode(value):
+    """
+    Modo explain solicitado.
+
+    Returns:
+        'analyze' (ejecuta la consulta y mide cada etapa), 'plan' (solo el plan) o None
+    """
+    if not value:
+        return None
+    value = str(value).strip().lower()
+    if value in ('false', '0', 'no'):
+        return None
+    if value in ('true', '1', 'yes', 'analyze'):
+        return 'analyze'
+    if value == 'plan':
+        return 'plan'
+    raise ValueError(f"Modo explain no válido: {value}. Use true, analyze o plan")
+
+def _number(value, kind=float):
+    return kind(float(value)) if value is not None else None
+
+def parse_mysql_plan(text):
+    """
+    Convierte la salida en árbol de EXPLAIN ANALYZE / FORMAT=TREE en etapas.
+
+    Args:
+        text: Texto del plan
+
+    Returns:
+        Plan normalizado
+    """
+    stages = []
+    for line in text.splitlines():
+        match = _MYSQL_NODE.match(line)
+        if not match:
+            continue
+        operation = match.group('operation')
+        table = _MYSQL_TABLE.search(operation)
+        table = table.group(1) if table else None
+        index = _MYSQL_INDEX.search(operation)
+        stages.append({
+            "depth": len(match.group('indent')) // 4,
+            "operation": operation,
+            "table": table,
+            "index": index.group(1) if index else None,
+            "estimated_rows": _number(match.group('rows')),
+            "cost": _number(match.group('cost')),
+            "actual_rows": _number(match.group('actual_rows')),
+            "actual_time_ms": _number(match.group('time')),
+            "loops": _number(match.group('loops'), int),
+            # Las tablas temporales (<temporary>) no tienen nombre y no admiten índices
+            "full_scan": operation.startswith('Table scan on ') and table is not None
+        })
+
+    # Columnas comparadas en cada tabla recorrida completa (filtros y condiciones de join)
+    full_scans = []
+    for stage in stages:
+        if not stage["full_scan"]:
+            continue
+        fields = []
+        for other in stages:
+            for table, column, in (m.groups() for m in _MYSQL_COLUMN.finditer(other["operation"])):
+                if table == stage["table"] and column not in fields:
+                    fields.append(column)
+        full_scans.append({"target": stage["table"], "fields": fields})
+
+    root = stages[0] if stages else {}
+    return {
+        "backend": "mysql",
+        "stages": stages,
+        "full_scans": full_scans,
+        "rows": root.get("actual_rows"),
+        "time_ms": root.get("actual_time_ms"),
+        "raw": text
+    }
+
+def mysql_explain(conn, sql, params, mode):
+    """
+    Plan de una consulta MySQL.
+
+    Args:
+        conn: Conexión MySQL
+        sql: Consulta
+        params: Parámetros de la consulta
+        mode: 'analyze' o 'plan'
+
+    Returns:
+        Plan normalizado
+    """
+    prefix = "EXPLAIN ANALYZE " if mode == 'analyze' else "EXPLAIN FORMAT=TREE "
+    cursor = conn.cursor()
+    try:
+        cursor.execute(prefix + sql, params)
+        text = "\n".join(row[0] for row in cursor.fetchall())
+    finally:
+        cursor.close()
+    plan = parse_mysql_plan(text)
+    plan["mode"] = mode
+    return plan
+
+def filter_fields(query, fields=None):
+    """Campos de un filtro de MongoDB en orden de aparición (recorre $and, $or y $nor)."""
+    fields = [] if fields is None else fields
+    if isinstance(query, list):
+        for item in query:
+            filter_fields(item, fields)
+    elif isinstance(query, dict):
+        for key, value in query.items():
+            if key in ('$and', '$or', '$nor'):
+                filter_fields(value, fields)
+            elif not key.startswith('$') and key not in fields:
+                fields.append(key)
+    return fields
+
+def pipeline_fields(pipeline):
+    """Campos del $match y $sort iniciales de un pipeline."""
+    fields = []
+    for stage in pipeline or ():
+        if '$match' in stage:
+            filter_fields(stage['$match'], fields)
+        elif '$sort' in stage:
+            fields.extend(field for field in stage['$sort'] if field not in fields)
+        else:
+            break
+    return fields
+
+def _find_planner(explain):
+    """Sección con queryPlanner (en un aggregate puede estar dentro de $cursor)."""
+    if isinstance(explain, dict):
+        if 'queryPlanner' in explain:
+            return explain
+        for value in explain.values():
+            found = _find_planner(value)
+            if found is not None:
+                return found
+    elif isinstance(explain, list):
+        for item in explain:
+            found = _find_planner(item)
+            if found is not None:
+                return found
+    return None
+
+def _walk_mongo_stages(stage, depth, stages):
+    if not isinstance(stage, dict):
+        return
+    stages.append({
+        "depth": depth,
+        "operation": stage.get('stage'),
+        "index": stage.get('indexName'),
+        "returned": stage.get('nReturned'),
+        "keys_examined": stage.get('keysExamined'),
+        "docs_examined": stage.get('docsExamined'),
+        "time_ms": stage.get('executionTimeMillisEstimate'),
+        "full_scan": stage.get('stage') == 'COLLSCAN'
+    })
+    children = stage.get('inputStages') or [stage.get('inputStage')]
+    for child in children:
+        _walk_mongo_stages(child, depth + 1, stages)
+
+def parse_mongo_plan(explain, collection_name, fields):
+    """
+    Convierte el resultado del comando explain en etapas.
+
+    Args:
+        explain: Resultado de explain
+        collection_name: Colección consultada
+        fields: Campos del filtro y del orden (para las sugerencias de índices)
+
+    Returns:
+        Plan normalizado
+    """
+    section = _find_planner(explain) or {}
+    execution = section.get('executionStats') or {}
+    root = execution.get('executionStages') or section.get('queryPlanner', {}).get('winningPlan')
+    if isinstance(root, dict) and 'stage' not in root and 'queryPlan' in root:
+        # Motor SBE: el árbol de etapas está en queryPlan
+        root = root['queryPlan']
+
+    stages = []
+    _walk_mongo_stages(root, 0, stages)
+    full_scan = any(stage["full_scan"] for stage in stages)
+    return {
+        "backend": "mongodb",
+        "stages": stages,
+        "full_scans": [{"target": collection_name, "fields": list(fields)}] if full_scan else [],
+        "rows": execution.get('nReturned'),
+        "time_ms": execution.get('executionTimeMillis'),
+        "keys_examined": execution.get('totalKeysExamined'),
+        "docs_examined": execution.get('totalDocsExamined')
+    }
+
+def mongo_explain(database, command, mode, fields):
+    """
+    Plan de un comando find o aggregate de MongoDB.
+
+    Args:
+        database: Base de datos de pymongo
+        command: Comando (find o aggregate)
+        mode: 'analyze' (executionStats) o 'plan' (queryPlanner)
+        fields: Campos del filtro y del orden
+
+    Returns:
+        Plan normalizado
+    """
+    verbosity = 'executionStats' if mode == 'analyze' else 'queryPlanner'
+    result = database.command({"explain": command, "verbosity": verbosity})
+    collection_name = command.get('find') or command.get('aggregate')
+    plan = parse_mongo_plan(result, collection_name, fields)
+    plan["mode"] = mode
+    return plan
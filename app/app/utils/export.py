@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Exportación en streaming de tablas y colecciones
+Las filas se leen por lotes de un cursor MySQL no bufferizado o de un cursor
+de MongoDB y se emiten como CSV, NDJSON o bloques columnares (un objeto JSON
+con un array por columna en cada línea), de modo que la memoria usada no
+depende del tamaño de la exportación.
+"""
+
+import io
+import os
+import csv
+import logging
+import datetime
+import decimal
+from bson import json_util
+from .serializer import RowSerializer, documents_to_format
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+EXPORT_FORMATS = ('csv', 'ndjson', 'columnar')
+# Filas leídas y emitidas en cada fragmento
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '5000'))
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'columnar': 'application/x-ndjson'
+}
+
+EXPORT_EXTENSIONS = {
+    'csv': 'csv',
+    'ndjson': 'ndjson',
+    'columnar': 'columnar.ndjson'
+}
+
+logger = logging.getLogger(__name__)
+
+def parse_export_format(value):
+    """
+    Normaliza el parámetro format de las exportaciones.
+
+    Raises:
+        ValueError: Si el formato no es válido
+    """
+    if not value:
+        return 'ndjson'
+    value = value.strip().lower()
+    if value not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportación no válido: {value}. Use uno de: {', '.join(EXPORT_FORMATS)}")
+    return value
+
+def _csv_value(value):
+    """Valor de una celda CSV (las celdas vacías representan NULL)."""
+    if value is None:
+        return ''
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json_util.dumps(value)
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerows([[_csv_value(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+def export_rows(cursor, export_format, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Emite las filas de un cursor MySQL ya ejecutado.
+
+    Args:
+        cursor: Cursor (no bufferizado) tras ejecutar la consulta
+        export_format: Uno de EXPORT_FORMATS
+        batch_size: Filas por fragmento
+
+    Returns:
+        Generador de fragmentos de texto
+    """
+    serializer = RowSerializer(cursor.description, use_orjson=False)
+    if export_format == 'csv':
+        yield _csv_lines([[column[0] for column in cursor.description]])
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        if export_format == 'csv':
+            yield _csv_lines(rows)
+        elif export_format == 'ndjson':
+            yield "".join([serializer.dumps_row(row) + "\n" for row in rows])
+        else:
+            yield serializer.dumps_rows(rows, 'columnar')[0] + "\n"
+
+def export_documents(documents, export_format, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Emite los documentos de un cursor de MongoDB.
+
+    En CSV las columnas son las claves de primer nivel del primer lote; los
+    valores anidados se escriben como JSON extendido. Las claves que solo
+    aparecen en lotes posteriores se omiten y se registran en un aviso al
+    terminar (la respuesta lo indica con la cabecera X-Export-Columns).
+
+    Args:
+        documents: Iterable de documentos
+        export_format: Uno de EXPORT_FORMATS
+        batch_size: Documentos por fragmento
+
+    Returns:
+        Generador de fragmentos de texto
+    """
+    columns = None
+    dropped = set()
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) < batch_size:
+            continue
+        chunk, columns = _documents_chunk(batch, export_format, columns, dropped)
+        batch = []
+        yield chunk
+    if batch or (export_format == 'csv' and columns is None):
+        chunk, columns = _documents_chunk(batch, export_format, columns, dropped)
+        yield chunk
+    if dropped:
+        logger.warning(f"Exportación CSV: columnas ausentes del primer lote omitidas: {', '.join(sorted(dropped))}")
+
+def _documents_chunk(batch, export_format, columns, dropped):
+    if export_format == 'ndjson':
+        return "".join([json_util.dumps(document) + "\n" for document in batch]), columns
+    if export_format == 'columnar':
+        return json_util.dumps(documents_to_format(batch, 'columnar')[1]) + "\n", columns
+
+    header = ''
+    if columns is None:
+        columns = documents_to_format(batch, 'rows')[0]
+        header = _csv_lines([columns])
+    known = set(columns)
+    dropped.update(key for document in batch for key in document if key not in known)
+    return header + _csv_lines([[document.get(key) for key in columns] for document in batch]), columns
+
+def closing_stream(chunks, *resources):
+    """
+    Recorre un flujo y cierra los recursos al terminar o si el cliente se desconecta.
+
+    Args:
+        chunks: Iterable de fragmentos
+        resources: Objetos con método close (cursor, conexión, cliente)
+    """
+    try:
+        yield from chunks
+    finally:
+        for resource in resources:
+            try:
+                resource.close()
+            except Exception as e:
+                logger.warning(f"Error al cerrar un recurso de la exportación: {e}")
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Búsquedas paginadas de findDocument
+Aplica limit, skip, batch_size, hint y max_time_ms a un cursor de pymongo,
+recorre los documentos con un generador (sin reunirlos en una lista) y
+devuelve un token de continuación para pedir la página siguiente. Sin orden
+explícito (o con orden por _id) la continuación usa el último _id devuelto,
+de modo que las páginas siguientes no tienen que saltar documentos.
+"""
+
+import os
+import json
+import base64
+import hashlib
+import logging
+from bson import json_util
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Documentos que pymongo pide al servidor en cada lote
+FIND_BATCH_SIZE = int(os.getenv('FIND_BATCH_SIZE', '1000'))
+FIND_MAX_BATCH_SIZE = int(os.getenv('FIND_MAX_BATCH_SIZE', '10000'))
+
+logger = logging.getLogger(__name__)
+
+def _int_option(parameters, name, minimum):
+    value = parameters.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} debe ser un número entero")
+    if value < minimum:
+        raise ValueError(f"{name} debe ser mayor o igual que {minimum}")
+    return value
+
+def parse_sort(sort):
+    """
+    Normaliza el orden recibido como {"campo": 1} o [["campo", 1], ...].
+
+    Returns:
+        Lista de tuplas (campo, dirección) o None
+    """
+    if not sort:
+        return None
+    if isinstance(sort, str):
+        return [(sort, 1)]
+    if isinstance(sort, dict):
+        return list(sort.items())
+    if isinstance(sort, list) and all(isinstance(item, (list, tuple)) and len(item) == 2 for item in sort):
+        return [tuple(item) for item in sort]
+    raise ValueError("sort_json debe ser un objeto {campo: dirección} o una lista de pares")
+
+def parse_hint(value):
+    """hint como nombre de índice o como especificación JSON de sus claves."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith('{') or value.startswith('['):
+        return parse_sort(json.loads(value))
+    return value
+
+def parse_find_options(parameters):
+    """
+    Opciones de paginación de findDocument.
+
+    Returns:
+        Diccionario con limit, skip, batch_size, hint, max_time_ms y continuation
+
+    Raises:
+        ValueError: Si algún parámetro no es válido
+    """
+    batch_size = _int_option(parameters, 'batch_size', 1) or FIND_BATCH_SIZE
+    return {
+        "limit": _int_option(parameters, 'limit', 1),
+        "skip": _int_option(parameters, 'skip', 0) or 0,
+        "batch_size": min(batch_size, FIND_MAX_BATCH_SIZE),
+        "hint": parse_hint(parameters.get('hint')),
+        "max_time_ms": _int_option(parameters, 'max_time_ms', 1),
+        "continuation": parameters.get('continuation') or None
+    }
+
+def query_fingerprint(filter_query, projection, sort, hint):
+    """Huella de la búsqueda: un token solo es válido para la misma consulta."""
+    spec = json_util.dumps([filter_query, projection, sort, hint], sort_keys=True)
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()[:16]
+
+def encode_continuation(state):
+    """Codifica el estado de la página siguiente como texto opaco."""
+    return base64.urlsafe_b64encode(json_util.dumps(state).encode('utf-8')).decode('ascii')
+
+def decode_continuation(token, fingerprint):
+    """
+    Decodifica un token de continuación.
+
+    Raises:
+        ValueError: Si el token no es válido o pertenece a otra búsqueda
+    """
+    try:
+        state = json_util.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError("Token de continuación no válido")
+    if not isinstance(state, dict) or state.get('query') != fingerprint:
+        raise ValueError("El token de continuación no corresponde a esta búsqueda")
+    return state
+
+class FindPage:
+    """
+    Página de resultados de una búsqueda.
+
+    documents() es un generador; al terminar de recorrerlo count y
+    continuation quedan disponibles.
+    """
+
+    def __init__(self, cursor, limit, state):
+        self.cursor = cursor
+        self.limit = limit
+        self.state = state
+        self.count = 0
+        self.continuation = None
+
+    def documents(self):
+        last = None
+        for document in self.cursor:
+            if self.limit is not None and self.count == self.limit:
+                # Se pidió un documento más de la cuenta: hay página siguiente
+                self.continuation = encode_continuation(self._next_state(last))
+                break
+            self.count += 1
+            last = document
+            yield document
+
+    def _next_state(self, last):
+        state = dict(self.state)
+        if state.get('keyset'):
+            state['after'] = last.get('_id')
+        else:
+            state['skip'] = state.get('skip', 0) + self.count
+        return state
+
+def plan_find(filter_query, projection, sort, options):
+    """
+    Resuelve la continuación de una búsqueda.
+
+    Con continuación, la página siguiente se obtiene filtrando por _id
+    posterior al último devuelto (si el orden es por _id) o saltando los
+    documentos ya devueltos (con otros órdenes).
+
+    Args:
+        filter_query: Filtro de la búsqueda
+        projection: Proyección o None
+        sort: Orden normalizado con parse_sort o None
+        options: Resultado de parse_find_options
+
+    Returns:
+        Tupla (filtro, orden, skip, limit, estado de la continuación)
+
+    Raises:
+        ValueError: Si el token de continuación no es válido
+    """
+    fingerprint = query_fingerprint(filter_query, projection, sort, options['hint'])
+    limit = options['limit']
+
+    if options['continuation']:
+        state = decode_continuation(options['continuation'], fingerprint)
+        limit = limit or state.get('limit')
+    else:
+        # Continuar por _id requiere que la proyección lo devuelva (una lista de campos siempre lo incluye)
+        keyset = (sort is None or [field for field, _ in sort] == ['_id']) \
+            and not (isinstance(projection, dict) and not projection.get('_id', 1))
+        state = {"query": fingerprint, "limit": limit, "keyset": keyset, "skip": options['skip']}
+
+    query = filter_query
+    skip = state.get('skip', 0)
+    if state.get('keyset'):
+        direction = sort[0][1] if sort else 1
+        if limit is not None and sort is None:
+            # Orden estable para poder continuar por _id
+            sort = [('_id', 1)]
+        if 'after' in state:
+            operator = '$gt' if direction in (1, '1', 'asc', 'ascending') else '$lt'
+            query = {"$and": [filter_query, {"_id": {operator: state['after']}}]}
+            skip = 0
+    return query, sort, skip, limit, state
+
+def open_find(collection, filter_query, projection, sort, options):
+    """
+    Prepara el cursor de findDocument.
+
+    Args:
+        collection: Colección de pymongo
+        filter_query: Filtro de la búsqueda
+        projection: Proyección o None
+        sort: Orden normalizado con parse_sort o None
+        options: Resultado de parse_find_options
+
+    Returns:
+        FindPage
+
+    Raises:
+        ValueError: Si el token de continuación no es válido
+    """
+    query, sort, skip, limit, state = plan_find(filter_query, projection, sort, options)
+
+    cursor = collection.find(query, projection, batch_size=options['batch_size'])
+    if sort:
+        cursor = cursor.sort(sort)
+    if skip:
+        cursor = cursor.skip(skip)
+    if limit is not None:
+        # Un documento más para saber si existe una página siguiente
+        cursor = cursor.limit(limit + 1)
+    if options['hint']:
+        cursor = cursor.hint(options['hint'])
+    if options['max_time_ms']:
+        cursor = cursor.max_time_ms(options['max_time_ms'])
+    return FindPage(cursor, limit, state)
+
+def find_command(collection_name, filter_query, projection, sort, options):
+    """Comando find equivalente a open_find (para explain)."""
+    query, sort, skip, limit, _ = plan_find(filter_query, projection, sort, options)
+    command = {"find": collection_name, "filter": query}
+    if projection:
+        command["projection"] = projection
+    if sort:
+        command["sort"] = dict(sort)
+    if skip:
+        command["skip"] = skip
+    if limit is not None:
+        command["limit"] = limit
+    hint = options['hint']
+    if hint:
+        command["hint"] = hint if isinstance(hint, str) else dict(hint)
+    return command
+
+def find_response_chunks(page, header):
+    """
+    Respuesta JSON de findDocument emitida documento a documento.
+
+    Cada documento se convierte de BSON a JSON por separado; count y
+    continuation se escriben al final, cuando ya se conocen.
+
+    Args:
+        page: FindPage
+        header: Campos iniciales de la respuesta
+
+    Returns:
+        Generador de fragmentos de texto
+    """
+    opening = json.dumps(header)
+    yield opening[:-1] + (', ' if header else '') + '"documents": ['
+    separator = ''
+    for document in page.documents():
+        yield separator + json_util.dumps(document)
+        separator = ', '
+    yield '], ' + json.dumps({"count": page.count, "continuation": page.continuation})[1:]
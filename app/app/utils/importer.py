@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Importación en streaming de CSV y NDJSON a tablas y colecciones
+Los registros se leen de uno en uno del cuerpo de la petición (o del texto
+recibido) y se escriben por lotes: mientras un hilo escribe un lote se
+analiza el siguiente. Cada lote se confirma por separado y sus errores se
+informan sin detener la importación; next_offset permite reanudarla.
+"""
+
+import io
+import os
+import csv
+import json
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from pymongo.errors import BulkWriteError
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '1000'))
+IMPORT_MAX_BATCH_SIZE = int(os.getenv('IMPORT_MAX_BATCH_SIZE', '10000'))
+# Errores detallados incluidos en la respuesta (el resto solo se cuenta)
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv('IMPORT_MAX_REPORTED_ERRORS', '100'))
+
+logger = logging.getLogger(__name__)
+
+class RecordError(ValueError):
+    """Registro mal formado (se informa y se omite)."""
+
+class ImportReport:
+    """
+    Resultado de una importación.
+
+    Attributes:
+        next_offset: Registros ya escritos o descartados; se envía como offset para reanudar
+        complete: Si se llegó al final de los datos
+    """
+
+    def __init__(self, offset=0):
+        self.offset = offset
+        self.next_offset = offset
+        self.inserted = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+        self.error_count = 0
+        self.complete = False
+        self.message = None
+
+    def add_error(self, start, count, message):
+        self.failed += count
+        self.error_count += 1
+        if len(self.errors) < IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({"offset": start, "count": count, "error": message})
+
+    def as_dict(self):
+        report = {
+            "success": self.complete and not self.failed,
+            "complete": self.complete,
+            "offset": self.offset,
+            "next_offset": self.next_offset,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "batches": self.batches,
+            "errors": self.errors,
+            "errors_omitted": self.error_count - len(self.errors)
+        }
+        if self.message:
+            report["message"] = self.message
+        return report
+
+def parse_import_format(value):
+    """
+    Normaliza el parámetro format de las importaciones.
+
+    Raises:
+        ValueError: Si el formato no es válido
+    """
+    if not value:
+        return 'ndjson'
+    value = value.strip().lower()
+    if value not in IMPORT_FORMATS:
+        raise ValueError(f"Formato de importación no válido: {value}. Use uno de: {', '.join(IMPORT_FORMATS)}")
+    return value
+
+def parse_batch_size(value):
+    """Tamaño de lote solicitado, acotado a IMPORT_MAX_BATCH_SIZE."""
+    if not value:
+        return IMPORT_BATCH_SIZE
+    size = int(value)
+    if size <= 0:
+        raise ValueError("batch_size debe ser mayor que 0")
+    return min(size, IMPORT_MAX_BATCH_SIZE)
+
+def text_stream(data):
+    """
+    Flujo de texto a partir del parámetro data o del cuerpo de la petición.
+
+    Args:
+        data: Texto, bytes u objeto binario con read()
+    """
+    if isinstance(data, str):
+        return io.StringIO(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = io.BytesIO(data)
+    return io.TextIOWrapper(data, encoding='utf-8', newline='')
+
+def iter_records(stream, import_format, loads=json.loads, allow_array=False):
+    """
+    Lee los registros de un flujo de texto sin cargarlo completo.
+
+    En CSV la primera línea contiene los nombres de las columnas y las celdas
+    vacías se importan como NULL. En NDJSON cada línea es un objeto JSON; con
+    allow_array se acepta también un array JSON, que se decodifica completo.
+
+    Args:
+        stream: Flujo de texto
+        import_format: Uno de IMPORT_FORMATS
+        loads: Decodificador de cada línea NDJSON
+        allow_array: Si se admite un array JSON (solo datos ya en memoria,
+            como el parámetro data o un adjunto MTOM)
+
+    Returns:
+        Generador de diccionarios (o RecordError para los registros mal formados)
+    """
+    if import_format == 'csv':
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if header is None:
+            return
+        for values in reader:
+            if not values:
+                continue
+            if len(values) != len(header):
+                yield RecordError(f"Se esperaban {len(header)} columnas y hay {len(values)}")
+                continue
+            yield {key: (value if value != '' else None) for key, value in zip(header, values)}
+        return
+
+    first = True
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        if first and line.startswith('['):
+            if not allow_array:
+                # Decodificarlo exigiría reunir todo el cuerpo de la petición
+                yield RecordError("Un array JSON no se admite en una importación en streaming; envíe NDJSON")
+                return
+            records = loads(line + stream.read())
+            for record in records:
+                yield record if isinstance(record, dict) else RecordError("El registro no es un objeto JSON")
+            return
+        first = False
+        try:
+            record = loads(line)
+        except ValueError as e:
+            yield RecordError(f"JSON no válido: {e}")
+            continue
+        yield record if isinstance(record, dict) else RecordError("El registro no es un objeto JSON")
+
+def run_import(records, write_batch, offset=0, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Escribe los registros por lotes solapando la lectura de un lote con la
+    escritura del anterior.
+
+    Args:
+        records: Iterable de registros (o RecordError)
+        write_batch: Función que escribe una lista de registros y devuelve (insertados, fallidos, error)
+        offset: Registros iniciales que se omiten (ya importados en un intento anterior)
+        batch_size: Registros por lote
+
+    Returns:
+        ImportReport
+    """
+    report = ImportReport(offset)
+    position = 0
+    batch = []
+    batch_start = offset
+    pending = None
+
+    def collect(pending):
+        if pending is None:
+            return
+        future, start, count, end = pending
+        try:
+            inserted, failed, message = future.result()
+        except Exception as e:
+            inserted, failed, message = 0, count, str(e)
+        report.batches += 1
+        report.inserted += inserted
+        if failed:
+            report.add_error(start, failed, message)
+        report.next_offset = max(report.next_offset, end)
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='import-writer') as writer:
+        def submit(batch, start, end):
+            # El hilo escritor hereda el contexto (plazo de pymongo.timeout)
+            future = writer.submit(contextvars.copy_context().run, write_batch, batch)
+            return future, start, len(batch), end
+
+        try:
+            for record in records:
+                position += 1
+                if position <= offset:
+                    continue
+                if isinstance(record, RecordError):
+                    report.add_error(position - 1, 1, str(record))
+                    if not batch and pending is None:
+                        report.next_offset = position
+                    continue
+                if not batch:
+                    batch_start = position - 1
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    collect(pending)
+                    pending = submit(batch, batch_start, position)
+                    batch = []
+            if batch:
+                collect(pending)
+                pending = submit(batch, batch_start, position)
+            collect(pending)
+            report.next_offset = max(report.next_offset, position)
+            report.complete = True
+        except Exception as e:
+            # Datos truncados o ilegibles: se informa de lo ya escrito para reanudar
+            logger.error(f"Importación interrumpida en el registro {position}: {e}")
+            collect(pending)
+            report.message = f"Importación interrumpida en el registro {position}: {e}"
+    return report
+
+def mysql_batch_writer(conn, table_name, table_columns):
+    """
+    Escritor de lotes para una tabla MySQL (un INSERT múltiple y un commit por lote).
+
+    Args:
+        conn: Conexión MySQL sobre la base de datos de la tabla
+        table_name: Tabla de destino
+        table_columns: Columnas existentes de la tabla
+    """
+    def write(batch):
+        columns = list(dict.fromkeys(key for record in batch for key in record))
+        unknown = [column for column in columns if column not in table_columns]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas en la tabla {table_name}: {', '.join(unknown)}")
+
+        sql = (f"INSERT INTO `{table_name}` ({', '.join(f'`{column}`' for column in columns)}) "
+               f"VALUES ({', '.join(['%s'] * len(columns))})")
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(sql, [[record.get(column) for column in columns] for record in batch])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return len(batch), 0, None
+    return write
+
+def mongo_batch_writer(collection):
+    """Escritor de lotes para una colección (insert_many no ordenado)."""
+    def write(batch):
+        try:
+            result = collection.insert_many(batch, ordered=False)
+            return len(result.inserted_ids), 0, None
+        except BulkWriteError as e:
+            inserted = e.details.get('nInserted', 0)
+            errors = e.details.get('writeErrors', [])
+            message = errors[0].get('errmsg') if errors else str(e)
+            if len(errors) > 1:
+                message += f" (y {len(errors) - 1} errores más)"
+            return inserted, len(batch) - inserted, message
+    return write
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Gestión de índices de tablas MySQL y colecciones MongoDB
+Construye las sentencias CREATE INDEX / DROP INDEX (compuestos, únicos, de
+prefijo y con construcción en línea mediante ALGORITHM=INPLACE, LOCK=NONE),
+convierte las especificaciones de índices de MongoDB (compuestos, únicos,
+parciales y TTL) y agrupa la información y las estadísticas de uso de cada
+índice en un formato común para listIndexes.
+"""
+
+import os
+import logging
+from pymongo import ASCENDING, DESCENDING
+from .where_compiler import quote_identifier
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Construcción en línea por defecto (sin bloquear lecturas ni escrituras)
+INDEX_ONLINE_DEFAULT = os.getenv('INDEX_ONLINE_DEFAULT', 'true').lower() == 'true'
+
+MYSQL_MAX_IDENTIFIER = 64
+MONGO_INDEX_TYPES = ('text', 'hashed', '2d', '2dsphere')
+
+logger = logging.getLogger(__name__)
+
+def _direction(value, field):
+    if value in (1, '1', 'asc', 'ASC', None):
+        return 'asc'
+    if value in (-1, '-1', 'desc', 'DESC'):
+        return 'desc'
+    raise ValueError(f"Dirección no válida para {field}: {value}")
+
+def default_index_name(prefix, table_name, fields):
+    """Nombre por defecto idx_<tabla>_<campos>, acotado a la longitud de MySQL."""
+    name = f"{prefix}_{table_name}_{'_'.join(fields)}".replace('.', '_')
+    return name[:MYSQL_MAX_IDENTIFIER]
+
+def parse_index_spec(spec):
+    """
+    Valida la especificación común de createIndex.
+
+    Args:
+        spec: {"keys": [...], "name": ..., "unique": bool, "online": bool, ...}
+
+    Returns:
+        Diccionario con la especificación
+
+    Raises:
+        ValueError: Si faltan las claves o no son válidas
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("index_json debe ser un objeto")
+    keys = spec.get('keys')
+    if isinstance(keys, (str, dict)):
+        keys = [keys]
+    if not keys or not isinstance(keys, list):
+        raise ValueError("El índice debe indicar al menos una clave en keys")
+    return dict(spec, keys=keys)
+
+# MySQL
+def mysql_key_parts(keys):
+    """
+    Columnas de un índice MySQL.
+
+    Cada clave es el nombre de la columna o {"column": ..., "length": n,
+    "order": "asc"|"desc"}; length crea un índice de prefijo.
+
+    Returns:
+        Lista de tuplas (columna, longitud o None, dirección)
+    """
+    parts = []
+    for key in keys:
+        if isinstance(key, str):
+            key = {"column": key}
+        if not isinstance(key, dict) or not key.get('column'):
+            raise ValueError("Cada clave debe ser el nombre de una columna o un objeto con column")
+        length = key.get('length')
+        if length is not None:
+            length = int(length)
+            if length <= 0:
+                raise ValueError(f"La longitud del prefijo de {key['column']} debe ser mayor que 0")
+        parts.append((key['column'], length, _direction(key.get('order'), key['column'])))
+    return parts
+
+def _online_clause(online):
+    # INPLACE con LOCK=NONE permite lecturas y escrituras durante la construcción;
+    # si MySQL no puede hacerlo así la sentencia falla en lugar de bloquear la tabla
+    return " ALGORITHM=INPLACE LOCK=NONE" if online else ""
+
+def mysql_create_index_sql(table_name, spec):
+    """
+    Sentencia CREATE INDEX de una tabla MySQL.
+
+    Args:
+        table_name: Tabla
+        spec: Resultado de parse_index_spec
+
+    Returns:
+        Tupla (nombre del índice, SQL)
+    """
+    parts = mysql_key_parts(spec['keys'])
+    unique = bool(spec.get('unique', False))
+    name = spec.get('name') or default_index_name('uq' if unique else 'idx', table_name, [p[0] for p in parts])
+    columns = ", ".join(
+        quote_identifier(column) + (f"({length})" if length else "") + (" DESC" if direction == 'desc' else "")
+        for column, length, direction in parts
+    )
+    online = spec.get('online', INDEX_ONLINE_DEFAULT)
+    sql = (f"CREATE {'UNIQUE ' if unique else ''}INDEX {quote_identifier(name)} "
+           f"ON {quote_identifier(table_name)} ({columns}){_online_clause(online)}")
+    return name, sql
+
+def mysql_drop_index_sql(table_name, index_name, online=INDEX_ONLINE_DEFAULT):
+    """Sentencia DROP INDEX de una tabla MySQL."""
+    if not index_name:
+        raise ValueError("Se requiere el parámetro index_name")
+    if index_name == 'PRIMARY':
+        raise ValueError("La clave primaria no puede eliminarse con dropIndex")
+    return f"DROP INDEX {quote_identifier(index_name)} ON {quote_identifier(table_name)}{_online_clause(online)}"
+
+MYSQL_LIST_INDEXES_SQL = """
+    SELECT INDEX_NAME, NON_UNIQUE, SEQ_IN_INDEX, COLUMN_NAME, SUB_PART, COLLATION, INDEX_TYPE, CARDINALITY
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+    ORDER BY INDEX_NAME = 'PRIMARY' DESC, INDEX_NAME, SEQ_IN_INDEX
+"""
+
+MYSQL_INDEX_USAGE_SQL = """
+    SELECT INDEX_NAME, COUNT_READ, COUNT_WRITE, COUNT_FETCH, COUNT_INSERT, COUNT_UPDATE, COUNT_DELETE
+    FROM performance_schema.table_io_waits_summary_by_index_usage
+    WHERE OBJECT_SCHEMA = %s AND OBJECT_NAME = %s AND INDEX_NAME IS NOT NULL
+"""
+
+def group_mysql_indexes(rows, usage_rows=None):
+    """
+    Agrupa las filas de information_schema.STATISTICS por índice.
+
+    Args:
+        rows: Filas de MYSQL_LIST_INDEXES_SQL
+        usage_rows: Filas de MYSQL_INDEX_USAGE_SQL o None si performance_schema no está disponible
+
+    Returns:
+        Lista de índices con sus columnas y, si se conocen, sus estadísticas de uso
+    """
+    usage = {}
+    for name, reads, writes, fetches, inserts, updates, deletes in usage_rows or ():
+        usage[name] = {"reads": reads, "writes": writes, "fetches": fetches,
+                       "inserts": inserts, "updates": updates, "deletes": deletes}
+
+    indexes = {}
+    for name, non_unique, _, column, sub_part, collation, index_type, cardinality in rows:
+        index = indexes.setdefault(name, {
+            "name": name,
+            "primary": name == 'PRIMARY',
+            "unique": not int(non_unique),
+            "type": index_type,
+            "keys": [],
+            "cardinality": cardinality
+        })
+        index["keys"].append({
+            "column": column,
+            "length": sub_part,
+            "order": 'desc' if collation == 'D' else 'asc'
+        })
+        # La cardinalidad del índice es la de su última columna
+        index["cardinality"] = cardinality
+
+    result = list(indexes.values())
+    for index in result:
+        index["usage"] = usage.get(index["name"]) if usage_rows is not None else None
+    return result
+
+# MongoDB
+def mongo_index_keys(keys):
+    """
+    Claves de un índice de MongoDB.
+
+    Cada clave es el nombre del campo, {"campo": 1|-1|"text"|...} o
+    {"field": ..., "order": ...}.
+
+    Returns:
+        Lista de tuplas (campo, dirección o tipo)
+    """
+    result = []
+    for key in keys:
+        if isinstance(key, str):
+            result.append((key, ASCENDING))
+            continue
+        if not isinstance(key, dict):
+            raise ValueError("Cada clave debe ser el nombre de un campo o un objeto")
+        if 'field' in key:
+            key = {key['field']: key.get('order', 1)}
+        for field, value in key.items():
+            if value in MONGO_INDEX_TYPES:
+                result.append((field, value))
+            else:
+                result.append((field, ASCENDING if _direction(value, field) == 'asc' else DESCENDING))
+    return result
+
+def mongo_index_options(spec, keys):
+    """
+    Opciones de create_index a partir de la especificación.
+
+    Admite name, unique, sparse, partial_filter (partialFilterExpression) y
+    expire_after_seconds (TTL, solo con una clave). MongoDB construye los
+    índices sin bloquear la colección, por lo que online no cambia nada.
+
+    Returns:
+        Diccionario de argumentos para Collection.create_index
+    """
+    options = {}
+    if spec.get('name'):
+        options['name'] = spec['name']
+    if spec.get('unique'):
+        options['unique'] = True
+    if spec.get('sparse'):
+        options['sparse'] = True
+    partial_filter = spec.get('partial_filter')
+    if partial_filter is not None:
+        if not isinstance(partial_filter, dict):
+            raise ValueError("partial_filter debe ser un objeto")
+        options['partialFilterExpression'] = partial_filter
+    ttl = spec.get('expire_after_seconds')
+    if ttl is not None:
+        if len(keys) != 1:
+            raise ValueError("Un índice TTL solo puede tener un campo")
+        ttl = int(ttl)
+        if ttl < 0:
+            raise ValueError("expire_after_seconds no puede ser negativo")
+        options['expireAfterSeconds'] = ttl
+    return options
+
+def merge_mongo_indexes(indexes, stats):
+    """
+    Combina list_indexes con las estadísticas de $indexStats.
+
+    Args:
+        indexes: Documentos de Collection.list_indexes()
+        stats: Documentos de la etapa $indexStats o None si no están disponibles
+
+    Returns:
+        Lista de índices con sus claves, opciones y uso
+    """
+    usage = {}
+    for item in stats or ():
+        accesses = item.get('accesses', {})
+        usage[item.get('name')] = {"ops": accesses.get('ops'), "since": accesses.get('since')}
+
+    result = []
+    for index in indexes:
+        index = dict(index)
+        name = index.pop('name')
+        keys = index.pop('key')
+        index.pop('v', None)
+        result.append({
+            "name": name,
+            "primary": name == '_id_',
+            "unique": bool(index.pop('unique', False)) or name == '_id_',
+            "keys": [{"field": field, "order": value} for field, value in keys.items()],
+            "options": index,
+            "usage": usage.get(name) if stats is not None else None
+        })
+    return result
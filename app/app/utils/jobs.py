@@ -0,0 +1,483 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Trabajos asíncronos para operaciones largas
+submitJob encola cualquier operación SQL o NoSQL en un pool acotado de hilos
+de fondo. El estado se guarda en la tabla jobs, el resultado se vuelca a un
+fichero del directorio de spool y los trabajos terminados caducan tras
+JOB_RESULT_TTL segundos. Cada proceso renueva periódicamente la concesión
+(heartbeat_at) de sus trabajos activos; los de un proceso que dejó de
+renovarla se dan por interrumpidos.
+"""
+
+import os
+import json
+import uuid
+import time
+import socket
+import logging
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+JOB_MAX_WORKERS = int(os.getenv('JOB_MAX_WORKERS', '4'))
+# Trabajos en espera admitidos además de los que se están ejecutando
+JOB_MAX_QUEUED = int(os.getenv('JOB_MAX_QUEUED', '100'))
+JOB_MAX_PER_SESSION = int(os.getenv('JOB_MAX_PER_SESSION', '10'))
+# Tiempo máximo de ejecución de un trabajo (segundos)
+JOB_TIMEOUT = float(os.getenv('JOB_TIMEOUT', '3600'))
+JOB_SPOOL_DIR = os.getenv('JOB_SPOOL_DIR', '/tmp/soadb-jobs')
+# Segundos que se conservan el estado y el resultado de un trabajo terminado
+JOB_RESULT_TTL = float(os.getenv('JOB_RESULT_TTL', '3600'))
+JOB_CLEANUP_INTERVAL = float(os.getenv('JOB_CLEANUP_INTERVAL', '60'))
+# Intervalo mínimo entre escrituras del progreso en la tabla jobs
+JOB_PROGRESS_INTERVAL = float(os.getenv('JOB_PROGRESS_INTERVAL', '1'))
+# Renovación de la concesión de los trabajos activos y tiempo tras el que caduca
+JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', '15'))
+JOB_LEASE_TIMEOUT = float(os.getenv('JOB_LEASE_TIMEOUT', str(JOB_HEARTBEAT_INTERVAL * 4)))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+logger = logging.getLogger(__name__)
+
+# Trabajo que ejecuta el hilo actual
+_local = threading.local()
+
+class JobError(Exception):
+    """Trabajo inexistente, cola llena o resultado no disponible."""
+
+class Job:
+    """Trabajo asíncrono y su estado."""
+
+    def __init__(self, owner, service, operation, parameters, worker=None):
+        self.job_id = str(uuid.uuid4())
+        self.owner = owner
+        self.service = service
+        self.operation = operation
+        self.parameters = parameters
+        self.database_name = parameters.get('database_name')
+        self.worker = worker
+        self.state = QUEUED
+        self.progress = 0.0
+        self.message = None
+        self.result_path = None
+        self.result_size = None
+        self.created_at = datetime.datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.expires_at = None
+        self.timeout = JOB_TIMEOUT
+        self.cancel_requested = False
+        self.future = None
+        self.deadline = None
+        self.manager = None
+        self._progress_saved = 0.0
+
+    def attach(self, deadline):
+        """Asocia el plazo de la operación en curso para poder cancelarla."""
+        self.deadline = deadline
+        if self.cancel_requested:
+            deadline.expire()
+
+    def as_dict(self):
+        return {
+            "job_id": self.job_id,
+            "service": self.service,
+            "operation": self.operation,
+            "database": self.database_name,
+            "state": self.state,
+            "progress": round(self.progress, 4),
+            "message": self.message,
+            "result_size": self.result_size,
+            "created_at": _isoformat(self.created_at),
+            "started_at": _isoformat(self.started_at),
+            "finished_at": _isoformat(self.finished_at),
+            "expires_at": _isoformat(self.expires_at)
+        }
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def current_job():
+    """Trabajo que ejecuta el hilo actual o None si es una petición normal."""
+    return getattr(_local, 'job', None)
+
+def report_progress(done, total=None):
+    """
+    Informa del avance del trabajo en curso (no hace nada fuera de un trabajo).
+
+    Args:
+        done: Unidades completadas, o fracción entre 0 y 1 si no se indica total
+        total: Unidades totales
+    """
+    job = current_job()
+    if job is None or job.manager is None:
+        return
+    progress = done / total if total else done
+    job.progress = max(0.0, min(1.0, float(progress)))
+    now = time.monotonic()
+    if now - job._progress_saved >= JOB_PROGRESS_INTERVAL:
+        job._progress_saved = now
+        job.manager.save(job)
+
+class JobStore:
+    """Persistencia de los trabajos en la tabla jobs de la base de control."""
+
+    def __init__(self, connect):
+        """
+        Args:
+            connect: Función sin argumentos que abre una conexión a la base de control
+        """
+        self.connect = connect
+
+    def _execute(self, sql, params=(), fetch=False):
+        conn = self.connect()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            rows = cursor.fetchall() if fetch else None
+            conn.commit()
+            cursor.close()
+            return rows
+        finally:
+            conn.close()
+
+    def create(self, job):
+        self._execute(
+            """
+            INSERT INTO jobs (id, owner, service, operation, database_name, state, worker, heartbeat_at, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            (job.job_id, job.owner, job.service, job.operation, job.database_name, job.state, job.worker,
+             datetime.datetime.now(), job.created_at)
+        )
+
+    def update(self, job):
+        self._execute(
+            """
+            UPDATE jobs SET state = %s, progress = %s, message = %s, result_path = %s, result_size = %s,
+                started_at = %s, finished_at = %s, expires_at = %s, heartbeat_at = %s
+            WHERE id = %s
+            """,
+            (job.state, job.progress, job.message, job.result_path, job.result_size,
+             job.started_at, job.finished_at, job.expires_at, datetime.datetime.now(), job.job_id)
+        )
+
+    def heartbeat(self, worker):
+        """Renueva la concesión de los trabajos activos de un proceso."""
+        self._execute(
+            "UPDATE jobs SET heartbeat_at = %s WHERE worker = %s AND state IN (%s, %s)",
+            (datetime.datetime.now(), worker, QUEUED, RUNNING)
+        )
+
+    def get(self, job_id):
+        rows = self._execute("SELECT * FROM jobs WHERE id = %s", (job_id,), fetch=True)
+        return rows[0] if rows else None
+
+    def expired(self, now):
+        """Trabajos terminados cuyo resultado ya caducó."""
+        return self._execute(
+            "SELECT id, result_path FROM jobs WHERE expires_at IS NOT NULL AND expires_at < %s",
+            (now,), fetch=True
+        )
+
+    def delete(self, job_id):
+        self._execute("DELETE FROM jobs WHERE id = %s", (job_id,))
+
+    def mark_abandoned(self, lease_timeout):
+        """
+        Marca como fallidos los trabajos activos cuyo proceso dejó de renovar
+        la concesión (se reinició o cayó); los de otros procesos vivos no cambian.
+        """
+        now = datetime.datetime.now()
+        self._execute(
+            """
+            UPDATE jobs SET state = %s, message = %s, finished_at = %s, expires_at = %s
+            WHERE state IN (%s, %s) AND (heartbeat_at IS NULL OR heartbeat_at < %s)
+            """,
+            (FAILED, "Interrumpido: el proceso que lo ejecutaba dejó de responder", now,
+             now + datetime.timedelta(seconds=JOB_RESULT_TTL), QUEUED, RUNNING,
+             now - datetime.timedelta(seconds=lease_timeout))
+        )
+
+class JobManager:
+    """Ejecuta los trabajos en un pool acotado y vuelca sus resultados a disco."""
+
+    def __init__(self, runner=None, store=None, max_workers=JOB_MAX_WORKERS, max_queued=JOB_MAX_QUEUED,
+                 max_per_owner=JOB_MAX_PER_SESSION, spool_dir=JOB_SPOOL_DIR, result_ttl=JOB_RESULT_TTL,
+                 cleanup_interval=JOB_CLEANUP_INTERVAL, heartbeat_interval=JOB_HEARTBEAT_INTERVAL,
+                 lease_timeout=JOB_LEASE_TIMEOUT):
+        self.runner = runner
+        self.store = store
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_per_owner = max_per_owner
+        self.spool_dir = spool_dir
+        self.result_ttl = result_ttl
+        self.cleanup_interval = cleanup_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.lease_timeout = lease_timeout
+        # Identifica los trabajos de este proceso en la tabla compartida
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._cleaner = None
+
+    def configure(self, runner, store):
+        """
+        Args:
+            runner: Función que recibe el Job y devuelve el resultado JSON de la operación
+            store: JobStore donde se persiste el estado
+        """
+        self.runner = runner
+        self.store = store
+
+    def _start(self):
+        """Arranca (una sola vez) el pool de trabajadores y el hilo de limpieza."""
+        if self._executor is not None:
+            return
+        with self._lock:
+            if self._executor is not None:
+                return
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self.recover()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job-worker')
+            self._cleaner = threading.Thread(target=self._run_cleaner, name='job-cleaner', daemon=True)
+            self._cleaner.start()
+
+    def recover(self):
+        """Da por fallidos los trabajos de procesos cuya concesión caducó."""
+        try:
+            self.store.mark_abandoned(self.lease_timeout)
+        except Exception as e:
+            logger.error(f"No se pudieron marcar los trabajos interrumpidos: {e}")
+
+    def save(self, job):
+        """Persiste el estado del trabajo sin interrumpirlo si la base de control falla."""
+        try:
+            self.store.update(job)
+        except Exception as e:
+            logger.error(f"No se pudo guardar el estado del trabajo {job.job_id}: {e}")
+
+    def submit(self, owner, service, operation, parameters):
+        """
+        Encola una operación.
+
+        Returns:
+            Job encolado
+
+        Raises:
+            JobError: Si la cola o el cupo de la sesión están llenos
+        """
+        self._start()
+        with self._lock:
+            active = [job for job in self._jobs.values() if job.state in ACTIVE_STATES]
+            if len(active) >= self.max_workers + self.max_queued:
+                raise JobError("La cola de trabajos está llena; reintente más tarde")
+            if sum(1 for job in active if job.owner == owner) >= self.max_per_owner:
+                raise JobError(f"Se alcanzó el máximo de {self.max_per_owner} trabajos activos por sesión")
+            job = Job(owner, service, operation, parameters, self.worker_id)
+            job.manager = self
+            self._jobs[job.job_id] = job
+
+        try:
+            self.store.create(job)
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job.job_id, None)
+            raise
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        if job.state != QUEUED:
+            return
+        job.state = RUNNING
+        job.started_at = datetime.datetime.now()
+        self.save(job)
+
+        _local.job = job
+        try:
+            result = self.runner(job)
+            if job.cancel_requested:
+                job.state = CANCELLED
+            elif result.startswith('{"error"'):
+                job.state = FAILED
+                job.message = json.loads(result).get('error')
+            else:
+                job.result_path = self._spool(job, result)
+                job.result_size = os.path.getsize(job.result_path)
+                job.state = SUCCEEDED
+                job.progress = 1.0
+        except Exception as e:
+            logger.error(f"Error en el trabajo {job.job_id} ({job.service}.{job.operation}): {e}")
+            job.state = CANCELLED if job.cancel_requested else FAILED
+            job.message = str(e)
+        finally:
+            _local.job = None
+            job.parameters = None
+            job.deadline = None
+            self._finish(job)
+
+    def _spool(self, job, result):
+        """Escribe el resultado en el directorio de spool (de forma atómica)."""
+        path = os.path.join(self.spool_dir, f"{job.job_id}.json")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(result)
+        os.replace(tmp_path, path)
+        return path
+
+    def _finish(self, job):
+        job.finished_at = datetime.datetime.now()
+        job.expires_at = job.finished_at + datetime.timedelta(seconds=self.result_ttl)
+        self.save(job)
+
+    def get(self, job_id):
+        """
+        Estado de un trabajo (del proceso o de la tabla jobs).
+
+        Returns:
+            Tupla (propietario, diccionario de estado)
+
+        Raises:
+            JobError: Si el trabajo no existe o ya caducó
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.owner, job.as_dict()
+
+        row = self.store.get(job_id)
+        if row is None:
+            raise JobError(f"Trabajo no encontrado: {job_id}")
+        return row['owner'], {
+            "job_id": row['id'],
+            "service": row['service'],
+            "operation": row['operation'],
+            "database": row['database_name'],
+            "state": row['state'],
+            "progress": float(row['progress'] or 0),
+            "message": row['message'],
+            "result_size": row['result_size'],
+            "created_at": _isoformat(row['created_at']),
+            "started_at": _isoformat(row['started_at']),
+            "finished_at": _isoformat(row['finished_at']),
+            "expires_at": _isoformat(row['expires_at'])
+        }
+
+    def cancel(self, job_id):
+        """
+        Cancela un trabajo: los encolados no llegan a ejecutarse y los que están
+        en marcha ven vencido su plazo (las consultas MySQL en curso se cancelan).
+
+        Returns:
+            Estado del trabajo tras la cancelación
+
+        Raises:
+            JobError: Si el trabajo no se está ejecutando en este proceso
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobError(f"Trabajo no encontrado o ya terminado: {job_id}")
+        if job.state not in ACTIVE_STATES:
+            return job.as_dict()
+
+        job.cancel_requested = True
+        if job.future is not None and job.future.cancel():
+            job.state = CANCELLED
+            self._finish(job)
+        elif job.deadline is not None:
+            job.deadline.expire()
+        return job.as_dict()
+
+    def read_result(self, job_id, offset=0, max_bytes=None):
+        """
+        Lee (un fragmento de) el resultado volcado a disco.
+
+        Args:
+            job_id: Trabajo
+            offset: Posición en bytes desde la que leer
+            max_bytes: Tamaño máximo del fragmento (None para leerlo completo)
+
+        Returns:
+            Tupla (texto, siguiente posición, si se llegó al final)
+
+        Raises:
+            JobError: Si el trabajo no terminó correctamente o el resultado caducó
+        """
+        job = self._jobs.get(job_id)
+        path = job.result_path if job is not None else (self.store.get(job_id) or {}).get('result_path')
+        if not path or not os.path.exists(path):
+            raise JobError(f"El resultado del trabajo {job_id} no está disponible")
+
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(max_bytes if max_bytes else -1)
+        # No cortar un carácter UTF-8 multibyte entre dos fragmentos
+        for _ in range(3):
+            try:
+                text = chunk.decode('utf-8')
+                break
+            except UnicodeDecodeError:
+                chunk = chunk[:-1]
+        else:
+            text = chunk.decode('utf-8')
+        next_offset = offset + len(chunk)
+        return text, next_offset, next_offset >= size
+
+    def cleanup(self):
+        """Elimina los trabajos terminados y los resultados caducados."""
+        now = datetime.datetime.now()
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job.expires_at is not None and job.expires_at < now:
+                    del self._jobs[job_id]
+        for row in self.store.expired(now):
+            if row['result_path'] and os.path.exists(row['result_path']):
+                os.remove(row['result_path'])
+            self.store.delete(row['id'])
+
+    def heartbeat(self):
+        """Renueva la concesión de los trabajos activos de este proceso."""
+        if any(job.state in ACTIVE_STATES for job in list(self._jobs.values())):
+            self.store.heartbeat(self.worker_id)
+
+    def _run_cleaner(self):
+        last_cleanup = time.monotonic()
+        while True:
+            time.sleep(min(self.heartbeat_interval, self.cleanup_interval))
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error(f"No se pudo renovar la concesión de los trabajos: {e}")
+            if time.monotonic() - last_cleanup < self.cleanup_interval:
+                continue
+            last_cleanup = time.monotonic()
+            self.recover()
+            try:
+                self.cleanup()
+            except Exception as e:
+                logger.error(f"Error al limpiar los trabajos caducados: {e}")
+
+    def stats(self):
+        """Trabajos por estado en este proceso para el health check."""
+        counts = {}
+        for job in list(self._jobs.values()):
+            counts[job.state] = counts.get(job.state, 0) + 1
+        return {"workers": self.max_workers, "jobs": counts}
+
+# Gestor global del proceso (soap_service le asigna el ejecutor y la persistencia)
+job_manager = JobManager()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Soporte de MTOM/XOP para transportar cargas grandes como partes MIME binarias
+Permite recibir parámetros (JSON, NDJSON o binarios) y devolver resultados y
+valores BLOB sin escaparlos en XML ni codificarlos en hexadecimal.
+"""
+
+import re
+import uuid
+import base64
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+XOP_NAMESPACE = 'http://www.w3.org/2004/08/xop/include'
+XOP_INCLUDE_TAG = f'{{{XOP_NAMESPACE}}}Include'
+
+# Tipos de contenido que se entregan a las operaciones como texto
+TEXT_CONTENT_TYPES = ('application/json', 'text/', 'application/xml', 'application/x-ndjson',
+                      'application/ndjson', 'application/xop+xml')
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson')
+
+# Estado de la petición en curso (adjuntos recibidos y adjuntos de respuesta)
+_context = threading.local()
+
+class MtomError(ValueError):
+    """Mensaje MTOM mal formado."""
+
+class Attachment:
+    """Parte MIME de un mensaje MTOM."""
+
+    def __init__(self, content_id, content_type, data):
+        self.content_id = content_id
+        self.content_type = content_type
+        self.data = data
+
+    def as_text(self):
+        """
+        Devuelve el contenido como texto para un parámetro SOAP.
+
+        Las partes NDJSON se convierten en un array JSON sin decodificar cada
+        línea, de modo que las operaciones existentes las aceptan tal cual.
+        """
+        text = self.data.decode('utf-8')
+        if self.content_type.startswith(NDJSON_CONTENT_TYPES):
+            lines = [line for line in text.splitlines() if line.strip()]
+            return "[" + ",".join(lines) + "]"
+        return text
+
+    def as_parameter(self):
+        """Valor del parámetro: texto para partes textuales, bytes para binarias."""
+        if self.content_type.startswith(TEXT_CONTENT_TYPES):
+            return self.as_text()
+        return self.data
+
+def is_multipart(content_type):
+    """Indica si un Content-Type corresponde a un mensaje multipart/related."""
+    return (content_type or '').lower().startswith('multipart/related')
+
+def _header_param(header_value, name):
+    match = re.search(rf'{name}\s*=\s*"?([^";]+)"?', header_value, re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+def _normalize_cid(value):
+    """Normaliza un Content-ID o una referencia cid: para usarlos como clave."""
+    value = unquote(value.strip())
+    if value.lower().startswith('cid:'):
+        value = value[4:]
+    return value.strip('<>')
+
+def _parse_part(raw):
+    """Separa cabeceras y contenido de una parte MIME."""
+    header_end = raw.find(b'\r\n\r\n')
+    separator = 4
+    if header_end == -1:
+        header_end = raw.find(b'\n\n')
+        separator = 2
+    if header_end == -1:
+        raise MtomError("Parte MIME sin cabeceras")
+
+    headers = {}
+    for line in raw[:header_end].decode('latin-1').splitlines():
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+
+    data = raw[header_end + separator:]
+    if headers.get('content-transfer-encoding', '').lower() == 'base64':
+        data = base64.b64decode(data)
+
+    return Attachment(
+        _normalize_cid(headers.get('content-id', '')),
+        headers.get('content-type', 'application/octet-stream').lower(),
+        data
+    )
+
+def parse_mtom(body, content_type):
+    """
+    Divide un mensaje multipart/related en el sobre SOAP y sus adjuntos.
+
+    Args:
+        body: Cuerpo HTTP (bytes)
+        content_type: Cabecera Content-Type de la petición
+
+    Returns:
+        Tupla (sobre SOAP en bytes, diccionario cid -> Attachment)
+
+    Raises:
+        MtomError: Si el mensaje no es válido
+    """
+    boundary = _header_param(content_type, 'boundary')
+    if not boundary:
+        raise MtomError("Falta el parámetro boundary en Content-Type")
+    start = _header_param(content_type, 'start')
+
+    delimiter = b'--' + boundary.encode('latin-1')
+    parts = []
+    position = body.find(delimiter)
+    if position == -1:
+        raise MtomError("No se encontró el delimitador MIME")
+
+    while True:
+        position += len(delimiter)
+        if body[position:position + 2] == b'--':
+            break
+        # Saltar el salto de línea que sigue al delimitador
+        if body[position:position + 2] == b'\r\n':
+            position += 2
+        elif body[position:position + 1] == b'\n':
+            position += 1
+
+        next_position = body.find(delimiter, position)
+        if next_position == -1:
+            raise MtomError("Mensaje MIME truncado")
+
+        end = next_position
+        if body[end - 2:end] == b'\r\n':
+            end -= 2
+        elif body[end - 1:end] == b'\n':
+            end -= 1
+
+        parts.append(_parse_part(body[position:end]))
+        position = next_position
+
+    if not parts:
+        raise MtomError("El mensaje MIME no contiene partes")
+
+    root = parts[0]
+    if start:
+        start_cid = _normalize_cid(start)
+        root = next((part for part in parts if part.content_id == start_cid), root)
+
+    attachments = {part.content_id: part for part in parts if part is not root}
+    return root.data, attachments
+
+def resolve_include(element, attachments):
+    """
+    Devuelve el valor de un parámetro que referencia un adjunto con xop:Include.
+
+    Args:
+        element: Elemento XML del parámetro
+        attachments: Adjuntos de la petición
+
+    Returns:
+        Valor del adjunto, o None si el elemento no contiene xop:Include
+    """
+    for child in element:
+        if child.tag == XOP_INCLUDE_TAG:
+            cid = _normalize_cid(child.get('href', ''))
+            attachment = attachments.get(cid)
+            if attachment is None:
+                raise MtomError(f"Adjunto no encontrado: {cid}")
+            return attachment.as_parameter()
+    return None
+
+class AttachmentCollector:
+    """Acumula las partes binarias que acompañarán a la respuesta MTOM."""
+
+    def __init__(self):
+        self.parts = []
+
+    def add(self, data, content_type='application/octet-stream'):
+        """
+        Registra una parte y devuelve su referencia cid:.
+
+        Args:
+            data: Contenido binario
+            content_type: Tipo MIME de la parte
+
+        Returns:
+            Referencia 'cid:...' para incluir en el JSON de la respuesta
+        """
+        content_id = f"part{len(self.parts) + 1}.{uuid.uuid4().hex}@soadb"
+        self.parts.append(Attachment(content_id, content_type, bytes(data)))
+        return f"cid:{content_id}"
+
+@contextmanager
+def request_context(attachments=None, collector=None):
+    """
+    Publica los adjuntos de la petición y el colector de la respuesta para
+    el hilo que atiende la petición.
+    """
+    _context.attachments = attachments or {}
+    _context.collector = collector
+    try:
+        yield
+    finally:
+        _context.attachments = {}
+        _context.collector = None
+
+def current_collector():
+    """Colector de adjuntos de la respuesta en curso (None si no es MTOM)."""
+    return getattr(_context, 'collector', None)
+
+def resolve_attachment_values(value):
+    """
+    Sustituye en datos JSON decodificados las referencias {"$attachment": "cid:..."}
+    por el contenido binario del adjunto correspondiente.
+
+    Args:
+        value: Estructura decodificada de data_json (dict o lista)
+
+    Returns:
+        La misma estructura con los adjuntos resueltos
+    """
+    attachments = getattr(_context, 'attachments', None)
+    if not attachments:
+        return value
+
+    if isinstance(value, list):
+        return [resolve_attachment_values(item) for item in value]
+    if isinstance(value, dict):
+        if len(value) == 1 and '$attachment' in value:
+            cid = _normalize_cid(str(value['$attachment']))
+            attachment = attachments.get(cid)
+            if attachment is None:
+                raise MtomError(f"Adjunto no encontrado: {cid}")
+            return attachment.data
+        return {key: resolve_attachment_values(item) for key, item in value.items()}
+    return value
+
+def build_multipart(root_xml, parts):
+    """
+    Construye una respuesta multipart/related con el sobre SOAP como parte raíz.
+
+    Args:
+        root_xml: Sobre SOAP en bytes (con los xop:Include ya insertados)
+        parts: Lista de Attachment a enviar tras el sobre
+
+    Returns:
+        Tupla (cuerpo en bytes, valor de la cabecera Content-Type)
+    """
+    boundary = f"MIMEBoundary_{uuid.uuid4().hex}"
+    root_id = "root.message@soadb"
+    delimiter = f"--{boundary}\r\n".encode('ascii')
+
+    chunks = [
+        delimiter,
+        b'Content-Type: application/xop+xml; charset=UTF-8; type="text/xml"\r\n',
+        b'Content-Transfer-Encoding: binary\r\n',
+        f"Content-ID: <{root_id}>\r\n\r\n".encode('ascii'),
+        root_xml,
+        b'\r\n'
+    ]
+    for part in parts:
+        chunks.extend([
+            delimiter,
+            f"Content-Type: {part.content_type}\r\n".encode('ascii'),
+            b'Content-Transfer-Encoding: binary\r\n',
+            f"Content-ID: <{part.content_id}>\r\n\r\n".encode('ascii'),
+            part.data,
+            b'\r\n'
+        ])
+    chunks.append(f"--{boundary}--\r\n".encode('ascii'))
+
+    content_type = (
+        f'multipart/related; type="application/xop+xml"; boundary="{boundary}"; '
+        f'start="<{root_id}>"; start-info="text/xml"'
+    )
+    return b''.join(chunks), content_type
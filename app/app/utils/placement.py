@@ -0,0 +1,406 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Directorio de ubicación de las bases de datos SQL en varios servidores MySQL
+Cada base de datos de usuario vive en un cluster (servidor MySQL). La tabla
+database_placement de la base de control guarda la ubicación, que se elige
+al crear la base de datos con hash consistente o por menor ocupación.
+"""
+
+import os
+import time
+import bisect
+import hashlib
+import logging
+import threading
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+MYSQL_HOST = os.getenv('MYSQL_HOST', 'mysql')
+MYSQL_PORT = int(os.getenv('MYSQL_PORT', '3306'))
+# Clusters adicionales en formato nombre=host[:puerto] separados por comas
+MYSQL_CLUSTERS = os.getenv('MYSQL_CLUSTERS', '')
+# Política de ubicación de las bases de datos nuevas: consistent_hash o least_loaded
+PLACEMENT_POLICY = os.getenv('PLACEMENT_POLICY', 'consistent_hash')
+PLACEMENT_CACHE_TTL = float(os.getenv('PLACEMENT_CACHE_TTL', '30'))
+# Filas copiadas por lote durante una migración
+MIGRATION_BATCH_SIZE = int(os.getenv('MIGRATION_BATCH_SIZE', '1000'))
+# Espera tras liberar el bloqueo del origen antes de comprobar que no cambió
+MIGRATION_VERIFY_DELAY = float(os.getenv('MIGRATION_VERIFY_DELAY', '2'))
+
+# Cluster del servidor MYSQL_HOST (base de control y bases sin ubicación registrada)
+DEFAULT_CLUSTER = 'default'
+
+STATE_ACTIVE = 'active'
+STATE_MIGRATING = 'migrating'
+
+logger = logging.getLogger(__name__)
+
+class PlacementError(Exception):
+    """Error de ubicación (cluster desconocido o base de datos en migración)."""
+
+class Cluster:
+    """Servidor MySQL que aloja bases de datos de usuario."""
+
+    def __init__(self, name, host, port=3306):
+        self.name = name
+        self.host = host
+        self.port = port
+
+    def as_dict(self):
+        return {"name": self.name, "host": self.host, "port": self.port}
+
+def parse_clusters(value, default_host=MYSQL_HOST, default_port=MYSQL_PORT):
+    """
+    Interpreta MYSQL_CLUSTERS='shard1=mysql2:3306,shard2=mysql3'.
+
+    Returns:
+        Diccionario nombre -> Cluster (siempre incluye el cluster por defecto)
+    """
+    clusters = {DEFAULT_CLUSTER: Cluster(DEFAULT_CLUSTER, default_host, default_port)}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        name, _, address = item.partition('=')
+        host, _, port = address.strip().partition(':')
+        clusters[name.strip()] = Cluster(name.strip(), host, int(port or 3306))
+    return clusters
+
+class HashRing:
+    """Anillo de hash consistente con nodos virtuales."""
+
+    def __init__(self, names, replicas=64):
+        self._ring = sorted(
+            (self._hash(f"{name}#{i}"), name)
+            for name in names
+            for i in range(replicas)
+        )
+        self._keys = [key for key, _ in self._ring]
+
+    @staticmethod
+    def _hash(value):
+        return int(hashlib.md5(value.encode('utf-8')).hexdigest()[:16], 16)
+
+    def get(self, key):
+        """Nodo responsable de una clave."""
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+class PlacementDirectory:
+    """
+    Directorio database_name -> cluster con caché en memoria.
+
+    Los métodos reciben una conexión abierta a la base de control, igual que
+    TableCatalog.
+    """
+
+    def __init__(self, clusters=None, policy=PLACEMENT_POLICY, cache_ttl=PLACEMENT_CACHE_TTL):
+        self.clusters = clusters if clusters is not None else parse_clusters(MYSQL_CLUSTERS)
+        self.policy = policy
+        self.cache_ttl = cache_ttl
+        self.ring = HashRing(sorted(self.clusters))
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """Solo hay que consultar el directorio si existe más de un cluster."""
+        return len(self.clusters) > 1
+
+    def cluster(self, name):
+        """
+        Devuelve un cluster por nombre.
+
+        Raises:
+            PlacementError: Si el cluster no está configurado
+        """
+        cluster = self.clusters.get(name or DEFAULT_CLUSTER)
+        if cluster is None:
+            raise PlacementError(f"Cluster no configurado: {name}")
+        return cluster
+
+    def cached(self, database_name):
+        """
+        Ubicación cacheada de una base de datos, sin consultar el directorio.
+
+        Returns:
+            Tupla (Cluster, estado) o None si no está en caché o caducó
+        """
+        with self._lock:
+            cached = self._cache.get(database_name)
+        if cached is not None and cached[2] > time.monotonic():
+            return self.cluster(cached[0]), cached[1]
+        return None
+
+    def lookup(self, conn, database_name, fresh=False):
+        """
+        Ubicación de una base de datos.
+
+        Args:
+            conn: Conexión a la base de control
+            database_name: Base de datos
+            fresh: Ignorar la caché (operaciones de escritura)
+
+        Returns:
+            Tupla (Cluster, estado); las bases sin registro están en el cluster por defecto
+        """
+        if not fresh:
+            cached = self.cached(database_name)
+            if cached is not None:
+                return cached
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT cluster, state FROM database_placement WHERE database_name = %s",
+                (database_name,)
+            )
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+
+        name, state = row if row else (DEFAULT_CLUSTER, STATE_ACTIVE)
+        with self._lock:
+            self._cache[database_name] = (name, state, time.monotonic() + self.cache_ttl)
+        return self.cluster(name), state
+
+    def choose(self, conn, database_name):
+        """
+        Elige el cluster de una base de datos nueva según la política configurada.
+
+        Returns:
+            Cluster
+        """
+        if self.policy == 'least_loaded':
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT cluster, COUNT(*) FROM database_placement GROUP BY cluster")
+                counts = dict(cursor.fetchall())
+            finally:
+                cursor.close()
+            name = min(sorted(self.clusters), key=lambda cluster: counts.get(cluster, 0))
+        else:
+            name = self.ring.get(database_name)
+        return self.clusters[name]
+
+    def register(self, conn, database_name, cluster, state=STATE_ACTIVE):
+        """Registra (o actualiza) la ubicación de una base de datos."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """
+                INSERT INTO database_placement (database_name, cluster, state)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE cluster = VALUES(cluster), state = VALUES(state)
+                """,
+                (database_name, cluster.name, state)
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+        self.invalidate(database_name)
+
+    def remove(self, conn, database_name):
+        """Elimina la ubicación de una base de datos borrada."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM database_placement WHERE database_name = %s", (database_name,))
+            conn.commit()
+        finally:
+            cursor.close()
+        self.invalidate(database_name)
+
+    def invalidate(self, database_name=None):
+        """Olvida la ubicación cacheada de una base de datos (o de todas)."""
+        with self._lock:
+            if database_name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(database_name, None)
+
+    def status(self):
+        """Clusters configurados para el health check."""
+        return {
+            "policy": self.policy,
+            "clusters": [cluster.as_dict() for cluster in self.clusters.values()]
+        }
+
+def copy_database(source, target, database_name, batch_size=MIGRATION_BATCH_SIZE):
+    """
+    Copia el esquema y los datos de todas las tablas de una base de datos.
+
+    Las tablas de origen se bloquean para escritura (FLUSH TABLES ... WITH READ
+    LOCK) mientras dura la copia; las lecturas continúan. El bloqueo sigue
+    activo al terminar: se libera con UNLOCK TABLES o al cerrar la conexión de
+    origen, a cargo del llamador (ver migrate_database).
+
+    Args:
+        source: Conexión al servidor de origen (sin base de datos por defecto)
+        target: Conexión al servidor de destino (sin base de datos por defecto)
+        database_name: Base de datos a copiar
+        batch_size: Filas por INSERT
+
+    Returns:
+        Diccionario tabla -> filas copiadas
+
+    Raises:
+        PlacementError: Si el número de filas de destino no coincide con el origen
+    """
+    src = source.cursor()
+    dst = target.cursor()
+    try:
+        src.execute(f"SHOW FULL TABLES FROM `{database_name}` WHERE Table_type = 'BASE TABLE'")
+        tables = [row[0] for row in src.fetchall()]
+        if tables:
+            src.execute("FLUSH TABLES " + ", ".join(f"`{database_name}`.`{t}`" for t in tables) + " WITH READ LOCK")
+
+        dst.execute(f"CREATE DATABASE IF NOT EXISTS `{database_name}`")
+        dst.execute(f"USE `{database_name}`")
+        dst.execute("SET FOREIGN_KEY_CHECKS = 0")
+
+        copied = {}
+        for table in tables:
+            src.execute(f"SHOW CREATE TABLE `{database_name}`.`{table}`")
+            dst.execute(src.fetchall()[0][1])
+
+            src.execute(f"SELECT * FROM `{database_name}`.`{table}`")
+            columns = ", ".join(f"`{column[0]}`" for column in src.description)
+            placeholders = ", ".join(["%s"] * len(src.description))
+            insert = f"INSERT INTO `{table}` ({columns}) VALUES ({placeholders})"
+            rows = 0
+            while True:
+                batch = src.fetchmany(batch_size)
+                if not batch:
+                    break
+                dst.executemany(insert, batch)
+                target.commit()
+                rows += len(batch)
+
+            dst.execute(f"SELECT COUNT(*) FROM `{table}`")
+            if dst.fetchall()[0][0] != rows:
+                raise PlacementError(f"La copia de la tabla {table} está incompleta")
+            copied[table] = rows
+
+        dst.execute("SET FOREIGN_KEY_CHECKS = 1")
+        return copied
+    finally:
+        dst.close()
+        src.close()
+
+def table_checksums(conn, database_name, tables):
+    """
+    Suma de control de cada tabla (CHECKSUM TABLE) para detectar cambios.
+
+    Returns:
+        Diccionario tabla -> checksum
+    """
+    if not tables:
+        return {}
+    cursor = conn.cursor()
+    try:
+        cursor.execute("CHECKSUM TABLE " + ", ".join(f"`{database_name}`.`{t}`" for t in tables))
+        return {name.split('.', 1)[-1]: checksum for name, checksum in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+def fence_writers(conn, database_name):
+    """
+    Cierra las sesiones del servidor de origen que usan la base de datos.
+
+    Un escritor que resolvió la ubicación antes de la migración puede estar
+    esperando al bloqueo de escritura; si se le dejara continuar confirmaría
+    sus cambios en el origen después de la copia. Solo se respetan las
+    consultas SELECT en curso.
+
+    Returns:
+        Número de sesiones cerradas
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            SELECT ID FROM information_schema.PROCESSLIST
+            WHERE DB = %s AND ID <> CONNECTION_ID()
+              AND NOT (COMMAND = 'Query' AND INFO REGEXP '^[[:space:]]*SELECT' AND STATE NOT LIKE 'Waiting for%%')
+            """,
+            (database_name,)
+        )
+        sessions = [row[0] for row in cursor.fetchall()]
+        fenced = 0
+        for session_id in sessions:
+            try:
+                cursor.execute(f"KILL CONNECTION {int(session_id)}")
+                fenced += 1
+            except Exception as e:
+                # La sesión pudo terminar entretanto
+                logger.debug("No se pudo cerrar la sesión %s: %s", session_id, e)
+        return fenced
+    finally:
+        cursor.close()
+
+def migrate_database(directory, control, source_conn, target_conn, database_name, source, target,
+                     verify_delay=MIGRATION_VERIFY_DELAY):
+    """
+    Mueve una base de datos al cluster de destino sin perder escrituras.
+
+    1. La ubicación pasa a STATE_MIGRATING: las escrituras nuevas se rechazan.
+    2. Se copian los datos con las tablas de origen bloqueadas y se calcula su checksum.
+    3. Se cierran las sesiones de escritores que resolvieron la ubicación
+       antes del cambio de estado (fence_writers) y se libera el bloqueo.
+    4. Tras verify_delay se comprueba que el origen no cambió; solo entonces
+       la ubicación apunta al destino. Si cambió, la migración se deshace.
+
+    Args:
+        directory: PlacementDirectory
+        control: Conexión a la base de control
+        source_conn: Conexión al servidor de origen (sin base de datos por defecto)
+        target_conn: Conexión al servidor de destino (sin base de datos por defecto)
+        database_name: Base de datos a migrar
+        source: Cluster de origen
+        target: Cluster de destino
+        verify_delay: Segundos de espera antes de la comprobación final
+
+    Returns:
+        Tupla (filas copiadas por tabla, checksums del origen)
+
+    Raises:
+        PlacementError: Si la copia no coincide o el origen cambió durante la migración
+    """
+    directory.register(control, database_name, source, STATE_MIGRATING)
+    try:
+        copied = copy_database(source_conn, target_conn, database_name)
+        checksums = table_checksums(source_conn, database_name, list(copied))
+        fenced = fence_writers(source_conn, database_name)
+        if fenced:
+            logger.warning(f"Migración de '{database_name}': {fenced} sesiones de escritura cerradas en {source.name}")
+
+        cursor = source_conn.cursor()
+        try:
+            cursor.execute("UNLOCK TABLES")
+        finally:
+            cursor.close()
+
+        # Un escritor que se conectó justo antes del cierre de sesiones habría escrito ya
+        time.sleep(verify_delay)
+        if table_checksums(source_conn, database_name, list(copied)) != checksums:
+            raise PlacementError(
+                f"La base de datos '{database_name}' recibió escrituras durante la copia; reintente la migración"
+            )
+
+        directory.register(control, database_name, target, STATE_ACTIVE)
+        return copied, checksums
+    except Exception:
+        # Deshacer: la base de datos sigue en el origen
+        cursor = target_conn.cursor()
+        try:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{database_name}`")
+        finally:
+            cursor.close()
+        directory.register(control, database_name, source, STATE_ACTIVE)
+        raise
+
+# Directorio global del proceso
+placement_directory = PlacementDirectory()
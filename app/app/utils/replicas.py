@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Enrutamiento de lecturas SQL a réplicas de MySQL
+Un hilo de monitorización mide el retraso de cada réplica y las lecturas se
+reparten por turnos entre las réplicas sanas cuyo retraso no supera el
+máximo. Las sesiones que acaban de
+escribir leen del primario durante una ventana configurable (read-your-writes).
+"""
+
+import os
+import time
+import logging
+import itertools
+import threading
+import mysql.connector
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Réplicas en formato host[:puerto] separadas por comas
+MYSQL_REPLICAS = os.getenv('MYSQL_REPLICAS', '')
+MYSQL_USER = os.getenv('MYSQL_USER', 'root')
+MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', 'rootpassword')
+# Retraso máximo (segundos) para considerar utilizable una réplica
+MYSQL_REPLICA_MAX_LAG = float(os.getenv('MYSQL_REPLICA_MAX_LAG', '5'))
+MYSQL_REPLICA_CHECK_INTERVAL = float(os.getenv('MYSQL_REPLICA_CHECK_INTERVAL', '5'))
+# Segundos durante los que una sesión lee del primario tras escribir
+READ_YOUR_WRITES_WINDOW = float(os.getenv('READ_YOUR_WRITES_WINDOW', '5'))
+
+logger = logging.getLogger(__name__)
+
+class Replica:
+    """
+    Réplica de lectura y su último estado conocido.
+
+    Attributes:
+        lag: Segundos de retraso respecto al primario (None si se desconoce)
+        healthy: Si la replicación funciona y la réplica responde
+    """
+
+    def __init__(self, host, port=3306):
+        self.host = host
+        self.port = port
+        self.lag = None
+        self.healthy = False
+        self.last_check = 0.0
+        self.last_error = None
+
+    @property
+    def name(self):
+        return f"{self.host}:{self.port}"
+
+    def status(self):
+        return {
+            "healthy": self.healthy,
+            "lag": self.lag,
+            "last_error": self.last_error
+        }
+
+def parse_replicas(value):
+    """Interpreta MYSQL_REPLICAS='replica1:3306,replica2'."""
+    replicas = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        replicas.append(Replica(host, int(port or 3306)))
+    return replicas
+
+def measure_lag(replica, timeout=MYSQL_REPLICA_CHECK_INTERVAL):
+    """
+    Consulta el estado de replicación de una réplica.
+
+    Returns:
+        Segundos de retraso, o None si la replicación está detenida
+    """
+    conn = mysql.connector.connect(
+        host=replica.host,
+        port=replica.port,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        connection_timeout=max(1, int(timeout))
+    )
+    try:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except mysql.connector.Error:
+            # Servidores anteriores a 8.0.22
+            cursor.execute("SHOW SLAVE STATUS")
+        status = cursor.fetchone()
+        cursor.close()
+    finally:
+        conn.close()
+
+    if not status:
+        return None
+    lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    io_running = status.get('Replica_IO_Running', status.get('Slave_IO_Running'))
+    sql_running = status.get('Replica_SQL_Running', status.get('Slave_SQL_Running'))
+    if lag is None or io_running != 'Yes' or sql_running != 'Yes':
+        return None
+    return float(lag)
+
+class ReplicaRouter:
+    """Elige la conexión (réplica o primario) de cada lectura."""
+
+    def __init__(self, replicas=None, max_lag=MYSQL_REPLICA_MAX_LAG, check_interval=MYSQL_REPLICA_CHECK_INTERVAL,
+                 ryw_window=READ_YOUR_WRITES_WINDOW, lag_probe=measure_lag):
+        self.replicas = replicas if replicas is not None else parse_replicas(MYSQL_REPLICAS)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.ryw_window = ryw_window
+        self.lag_probe = lag_probe
+        self._last_writes = {}
+        self._lock = threading.Lock()
+        self._monitor = None
+        # Turno para repartir las lecturas entre las réplicas utilizables
+        self._turn = itertools.count()
+        self.reads_primary = 0
+        self.reads_replica = 0
+
+    @property
+    def enabled(self):
+        return bool(self.replicas)
+
+    def check(self):
+        """Actualiza el retraso y la salud de todas las réplicas."""
+        for replica in self.replicas:
+            try:
+                lag = self.lag_probe(replica)
+                replica.lag = lag
+                replica.healthy = lag is not None
+                replica.last_error = None if lag is not None else "Replicación detenida"
+            except Exception as e:
+                replica.lag = None
+                replica.healthy = False
+                replica.last_error = str(e)
+            replica.last_check = time.monotonic()
+
+    def _run_monitor(self):
+        while True:
+            self.check()
+            time.sleep(self.check_interval)
+
+    def start_monitor(self):
+        """Arranca (una sola vez) el hilo de monitorización del retraso."""
+        if self._monitor is not None or not self.enabled:
+            return
+        with self._lock:
+            if self._monitor is None:
+                self.check()
+                self._monitor = threading.Thread(target=self._run_monitor, name='replica-monitor', daemon=True)
+                self._monitor.start()
+
+    def note_write(self, session_token):
+        """Registra una escritura de la sesión para leer del primario durante la ventana."""
+        if not self.enabled or not session_token:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._last_writes[session_token] = now
+            # Olvidar las sesiones cuya ventana ya terminó
+            if len(self._last_writes) > 10000:
+                self._last_writes = {
+                    token: written for token, written in self._last_writes.items()
+                    if now - written < self.ryw_window
+                }
+
+    def in_write_window(self, session_token):
+        """Indica si la sesión escribió hace menos de ryw_window segundos."""
+        if not self.enabled or not session_token:
+            return False
+        with self._lock:
+            written = self._last_writes.get(session_token)
+        return written is not None and time.monotonic() - written < self.ryw_window
+
+    def choose(self, session_token=None):
+        """
+        Elige la réplica para una lectura.
+
+        Args:
+            session_token: Sesión que realiza la lectura
+
+        Returns:
+            Replica, o None si la lectura debe ir al primario
+        """
+        if not self.enabled:
+            return None
+        self.start_monitor()
+
+        if self.in_write_window(session_token):
+            self.reads_primary += 1
+            return None
+
+        candidates = [r for r in self.replicas if r.healthy and r.lag is not None and r.lag <= self.max_lag]
+        if not candidates:
+            self.reads_primary += 1
+            return None
+        self.reads_replica += 1
+        return candidates[next(self._turn) % len(candidates)]
+
+    def mark_down(self, replica, error):
+        """Retira una réplica que falló hasta la siguiente comprobación."""
+        logger.warning(f"Réplica {replica.name} no disponible: {error}")
+        replica.healthy = False
+        replica.last_error = str(error)
+
+    def status(self):
+        """Estado de las réplicas para el health check."""
+        return {
+            "replicas": {replica.name: replica.status() for replica in self.replicas},
+            "reads_primary": self.reads_primary,
+            "reads_replica": self.reads_replica
+        }
+
+# Enrutador global del proceso
+replica_router = ReplicaRouter()
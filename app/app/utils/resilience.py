@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Circuit breakers y bulkheads entre la aplicación y sus backends
+Cada backend (MySQL, MongoDB, proveedores OAuth) tiene su propio límite de
+concurrencia y su propio circuit breaker, de modo que un backend lento no
+consume los hilos que atienden al resto y las peticiones fallan rápido
+mientras el circuito está abierto.
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from pymongo.monitoring import ServerHeartbeatListener
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+BACKENDS = ('mysql', 'mongodb', 'oauth')
+
+logger = logging.getLogger(__name__)
+
+def _setting(backend, name, default, cast=int):
+    """Valor de configuración por backend (BREAKER_MYSQL_...) con valor general de respaldo."""
+    general = os.getenv(name, str(default))
+    return cast(os.getenv(name.replace('_', f'_{backend.upper()}_', 1), general))
+
+class BackendUnavailable(Exception):
+    """
+    El backend no admite más peticiones por ahora.
+
+    Attributes:
+        backend: Nombre del backend
+        retry_after: Segundos recomendados antes de reintentar
+    """
+
+    def __init__(self, backend, message, retry_after=1):
+        super().__init__(message)
+        self.backend = backend
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+class CircuitBreaker:
+    """
+    Circuit breaker con estados closed, open y half_open.
+
+    Se abre tras failure_threshold fallos consecutivos (las llamadas más lentas
+    que slow_call_seconds cuentan como fallos) y, pasado reset_timeout, deja
+    pasar una única llamada de prueba antes de cerrarse de nuevo.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30, slow_call_seconds=10):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_progress = False
+        self.total_failures = 0
+        self.total_slow_calls = 0
+        self.total_rejected = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Comprueba si se permite una llamada.
+
+        Raises:
+            BackendUnavailable: Si el circuito está abierto
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.total_rejected += 1
+                    raise BackendUnavailable(self.name, f"Backend {self.name} no disponible (circuito abierto)",
+                                             remaining)
+                self.state = self.HALF_OPEN
+                self.trial_in_progress = False
+
+            if self.state == self.HALF_OPEN:
+                if self.trial_in_progress:
+                    self.total_rejected += 1
+                    raise BackendUnavailable(self.name, f"Backend {self.name} en recuperación", 1)
+                self.trial_in_progress = True
+
+    def check(self):
+        """
+        Falla rápido si el circuito está abierto, sin reservar la llamada de prueba.
+
+        Raises:
+            BackendUnavailable: Si el circuito está abierto
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.total_rejected += 1
+                    raise BackendUnavailable(self.name, f"Backend {self.name} no disponible (circuito abierto)",
+                                             remaining)
+
+    def cancel_trial(self):
+        """Libera la llamada de prueba reservada si finalmente no se realizó."""
+        with self._lock:
+            self.trial_in_progress = False
+
+    def record_success(self, duration=0.0):
+        """Registra una llamada terminada; si fue lenta cuenta como fallo."""
+        if duration >= self.slow_call_seconds:
+            with self._lock:
+                self.total_slow_calls += 1
+            self.record_failure()
+            return
+
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuito {self.name} cerrado")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.trial_in_progress = False
+
+    def record_failure(self):
+        """Registra un fallo y abre el circuito si se alcanza el umbral."""
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self.trial_in_progress = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuito {self.name} abierto tras {self.consecutive_failures} fallos")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def status(self):
+        """Estado del circuito para el health check."""
+        with self._lock:
+            status = {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failures": self.total_failures,
+                "slow_calls": self.total_slow_calls,
+                "rejected": self.total_rejected
+            }
+            if self.state == self.OPEN:
+                status["retry_after"] = max(0, round(self.opened_at + self.reset_timeout - time.monotonic(), 1))
+            return status
+
+class Bulkhead:
+    """Límite de llamadas concurrentes a un backend."""
+
+    def __init__(self, name, max_concurrent=20, max_wait=1.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.active = 0
+        self.total_rejected = 0
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Ocupa un hueco esperando como máximo max_wait segundos.
+
+        Raises:
+            BackendUnavailable: Si no hay hueco libre a tiempo
+        """
+        if not self._semaphore.acquire(timeout=self.max_wait):
+            with self._lock:
+                self.total_rejected += 1
+            raise BackendUnavailable(self.name, f"Demasiadas peticiones concurrentes a {self.name}", 1)
+        with self._lock:
+            self.active += 1
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        self._semaphore.release()
+
+    def status(self):
+        with self._lock:
+            return {"active": self.active, "max_concurrent": self.max_concurrent, "rejected": self.total_rejected}
+
+class Backend:
+    """Circuit breaker y bulkhead de un backend."""
+
+    def __init__(self, name):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=_setting(name, 'BREAKER_FAILURE_THRESHOLD', 5),
+            reset_timeout=_setting(name, 'BREAKER_RESET_TIMEOUT', 30, float),
+            slow_call_seconds=_setting(name, 'BREAKER_SLOW_CALL_SECONDS', 10, float)
+        )
+        self.bulkhead = Bulkhead(
+            name,
+            max_concurrent=_setting(name, 'BULKHEAD_MAX_CONCURRENT', 20),
+            max_wait=_setting(name, 'BULKHEAD_MAX_WAIT', 1.0, float)
+        )
+
+_backends = {name: Backend(name) for name in BACKENDS}
+
+# Backends que han fallado durante la llamada protegida en curso (por hilo)
+_call_state = threading.local()
+
+def get_backend(name):
+    """Devuelve el Backend registrado con ese nombre."""
+    return _backends[name]
+
+def check_available(name):
+    """
+    Falla rápido si el circuito del backend está abierto.
+
+    Raises:
+        BackendUnavailable: Si el circuito está abierto
+    """
+    _backends[name].breaker.check()
+
+def mark_failure(name):
+    """Registra un fallo del backend (p. ej. un error de conexión capturado por un manejador)."""
+    _backends[name].breaker.record_failure()
+    failed = getattr(_call_state, 'failed', None)
+    if failed is not None:
+        failed.add(name)
+
+@contextmanager
+def protect(name):
+    """
+    Ejecuta un bloque con el bulkhead y el circuit breaker del backend.
+
+    Las excepciones que escapan del bloque y los fallos registrados con
+    mark_failure cuentan como fallos; las llamadas lentas también.
+
+    Raises:
+        BackendUnavailable: Si el circuito está abierto o el bulkhead está lleno
+    """
+    backend = _backends[name]
+    backend.breaker.before_call()
+    try:
+        backend.bulkhead.acquire()
+    except BackendUnavailable:
+        # La llamada de prueba del estado half_open no llegó a realizarse
+        backend.breaker.cancel_trial()
+        raise
+
+    previous = getattr(_call_state, 'failed', None)
+    _call_state.failed = set()
+    start = time.monotonic()
+    try:
+        yield backend
+    except BackendUnavailable:
+        raise
+    except Exception:
+        if name not in _call_state.failed:
+            backend.breaker.record_failure()
+        raise
+    else:
+        if name not in _call_state.failed:
+            backend.breaker.record_success(time.monotonic() - start)
+    finally:
+        _call_state.failed = previous
+        backend.bulkhead.release()
+
+def backend_status():
+    """Estado de los circuit breakers y bulkheads de todos los backends."""
+    return {
+        name: {"breaker": backend.breaker.status(), "bulkhead": backend.bulkhead.status()}
+        for name, backend in _backends.items()
+    }
+
+class MongoFailureListener(ServerHeartbeatListener):
+    """Registra en el circuit breaker de MongoDB los heartbeats fallidos del cliente."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        logger.warning(f"Heartbeat de MongoDB fallido en {event.connection_id}: {event.reply}")
+        mark_failure('mongodb')
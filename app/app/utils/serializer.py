@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Serialización rápida de filas MySQL a JSON
+El conversor de cada columna se elige una sola vez a partir de
+cursor.description, en lugar de comprobar el tipo de cada valor de cada fila.
+"""
+
+import os
+import json
+import logging
+import datetime
+import decimal
+from json.encoder import encode_basestring_ascii
+from mysql.connector.constants import FieldType
+from .mtom import current_collector
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Backend JSON: auto (orjson si está instalado), orjson o json
+SERIALIZER_BACKEND = os.getenv('SERIALIZER_BACKEND', 'auto').lower()
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Formatos de respuesta para conjuntos de resultados:
+#   objects:  [{"col": valor, ...}, ...]     (formato por defecto)
+#   rows:     [[valor, ...], ...]            (nombres de columna una sola vez)
+#   columnar: {"col": [valor, ...], ...}     (un array por columna)
+RESULT_FORMATS = ('objects', 'rows', 'columnar')
+
+def json_default(value):
+    """Convierte a JSON los tipos devueltos por MySQL que json no soporta."""
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        collector = current_collector()
+        if collector is not None:
+            return {"$attachment": collector.add(value)}
+        return value.hex()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def _dump_generic(value):
+    return json.dumps(value, default=json_default)
+
+def _dump_int(value):
+    return str(int(value))
+
+def _dump_float(value):
+    return float.__repr__(value)
+
+def _dump_decimal(value):
+    # Número JSON exacto: no se pierde precisión pasando por float
+    return str(value)
+
+def _dump_temporal(value):
+    return '"' + value.isoformat() + '"'
+
+def _dump_time(value):
+    # Las columnas TIME llegan como timedelta
+    return '"' + str(value) + '"'
+
+def _dump_text(value):
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if isinstance(value, (bytes, bytearray)):
+        return _dump_bytes(value)
+    return _dump_generic(value)
+
+def _dump_bytes(value):
+    # Columnas binarias (BLOB, BINARY, VARBINARY): en respuestas MTOM viajan
+    # como parte MIME sin codificar; en el resto, en hexadecimal
+    collector = current_collector()
+    if collector is not None:
+        return '{"$attachment": "' + collector.add(value) + '"}'
+    return '"' + value.hex() + '"'
+
+# Conversores por tipo de columna
+_CONVERTERS = {
+    FieldType.TINY: _dump_int,
+    FieldType.SHORT: _dump_int,
+    FieldType.LONG: _dump_int,
+    FieldType.LONGLONG: _dump_int,
+    FieldType.INT24: _dump_int,
+    FieldType.YEAR: _dump_int,
+    FieldType.FLOAT: _dump_float,
+    FieldType.DOUBLE: _dump_float,
+    FieldType.DECIMAL: _dump_decimal,
+    FieldType.NEWDECIMAL: _dump_decimal,
+    FieldType.DATE: _dump_temporal,
+    FieldType.NEWDATE: _dump_temporal,
+    FieldType.DATETIME: _dump_temporal,
+    FieldType.TIMESTAMP: _dump_temporal,
+    FieldType.TIME: _dump_time,
+    FieldType.VARCHAR: _dump_text,
+    FieldType.VAR_STRING: _dump_text,
+    FieldType.STRING: _dump_text,
+    FieldType.ENUM: _dump_text,
+    FieldType.JSON: _dump_text,
+    FieldType.BLOB: _dump_text,
+    FieldType.TINY_BLOB: _dump_text,
+    FieldType.MEDIUM_BLOB: _dump_text,
+    FieldType.LONG_BLOB: _dump_text,
+    FieldType.GEOMETRY: _dump_text
+}
+
+def _use_orjson():
+    if SERIALIZER_BACKEND == 'json':
+        return False
+    if orjson is None:
+        if SERIALIZER_BACKEND == 'orjson':
+            logger.warning("SERIALIZER_BACKEND=orjson pero orjson no está instalado; se usa json")
+        return False
+    # orjson.Fragment permite emitir los DECIMAL como números exactos
+    return hasattr(orjson, 'Fragment')
+
+def _orjson_decimal(value):
+    # orjson no admite Decimal: se inserta el número ya formateado
+    return orjson.Fragment(str(value).encode('ascii'))
+
+def parse_format(value):
+    """
+    Normaliza el parámetro format de las operaciones de consulta.
+
+    Args:
+        value: Formato solicitado (None para el formato por defecto)
+
+    Returns:
+        Uno de RESULT_FORMATS
+
+    Raises:
+        ValueError: Si el formato no es válido
+    """
+    if not value:
+        return 'objects'
+    value = value.strip().lower()
+    if value not in RESULT_FORMATS:
+        raise ValueError(f"Formato no válido: {value}. Use uno de: {', '.join(RESULT_FORMATS)}")
+    return value
+
+def documents_to_format(documents, result_format):
+    """
+    Reorganiza documentos de MongoDB en el formato solicitado.
+
+    Las columnas son la unión de las claves de primer nivel en orden de
+    aparición; los campos ausentes en un documento se devuelven como null.
+
+    Args:
+        documents: Lista de documentos
+        result_format: Uno de RESULT_FORMATS
+
+    Returns:
+        Tupla (columnas o None, datos)
+    """
+    if result_format == 'objects':
+        return None, documents
+
+    columns = {}
+    for document in documents:
+        for key in document:
+            columns.setdefault(key, None)
+    columns = list(columns)
+
+    if result_format == 'rows':
+        return columns, [[document.get(key) for key in columns] for document in documents]
+    return columns, {key: [document.get(key) for document in documents] for key in columns}
+
+class RowSerializer:
+    """
+    Serializa filas (tuplas) de un cursor MySQL a JSON.
+
+    Las columnas duplicadas (habituales en un SELECT * con JOIN) se resuelven
+    como lo haría un cursor de diccionario: conserva la posición de la primera
+    aparición y el valor de la última.
+    """
+
+    def __init__(self, description, use_orjson=None):
+        """
+        Args:
+            description: cursor.description tras ejecutar la consulta
+            use_orjson: Fuerza (o desactiva) el backend orjson
+        """
+        positions = {}
+        for index, column in enumerate(description):
+            positions[column[0]] = index
+
+        self.columns = list(positions)
+        self.indexes = [positions[name] for name in self.columns]
+        self.converters = [_CONVERTERS.get(description[i][1], _dump_generic) for i in self.indexes]
+        self.identity = self.indexes == list(range(len(description)))
+        self.use_orjson = _use_orjson() if use_orjson is None else use_orjson
+
+        # Plantilla de fila con las claves ya codificadas: {"a": %s, "b": %s}
+        self._template = "{" + ", ".join(
+            encode_basestring_ascii(name).replace('%', '%%') + ": %s" for name in self.columns
+        ) + "}"
+        self._pairs = list(zip(self.indexes, self.converters))
+
+    def _values(self, row):
+        return tuple([
+            'null' if row[index] is None else convert(row[index])
+            for index, convert in self._pairs
+        ])
+
+    def dumps_row(self, row):
+        """Serializa una fila como objeto JSON."""
+        return self._template % self._values(row)
+
+    def dumps_values(self, row):
+        """Serializa una fila como array JSON de valores (sin nombres de columna)."""
+        return "[" + ", ".join(self._values(row)) + "]"
+
+    def write_rows(self, rows, buffer):
+        """
+        Escribe las filas como objetos JSON separados por comas en buffer.
+
+        Args:
+            rows: Iterable de tuplas
+            buffer: Objeto con método append (p. ej. una lista de fragmentos)
+
+        Returns:
+            Número de filas escritas
+        """
+        template = self._template
+        pairs = self._pairs
+        count = 0
+        for row in rows:
+            if count:
+                buffer.append(", ")
+            buffer.append(template % tuple([
+                'null' if row[index] is None else convert(row[index])
+                for index, convert in pairs
+            ]))
+            count += 1
+        return count
+
+    def _orjson_values(self, rows):
+        """Prepara los valores de cada fila para orjson (DECIMAL como fragmento)."""
+        decimals = [i for i, convert in self._pairs if convert is _dump_decimal]
+        if self.identity and not decimals:
+            return rows
+
+        prepared = []
+        for row in rows:
+            values = list(row)
+            for i in decimals:
+                if values[i] is not None:
+                    values[i] = _orjson_decimal(values[i])
+            prepared.append(values if self.identity else [values[i] for i in self.indexes])
+        return prepared
+
+    def dumps_rows(self, rows, result_format='objects'):
+        """
+        Serializa una lista de filas en el formato indicado.
+
+        Args:
+            rows: Lista de tuplas
+            result_format: Uno de RESULT_FORMATS
+
+        Returns:
+            Tupla (texto JSON, número de filas)
+        """
+        if self.use_orjson:
+            values = self._orjson_values(rows)
+            columns = self.columns
+            if result_format == 'objects':
+                data = [dict(zip(columns, row)) for row in values]
+            elif result_format == 'rows':
+                data = [list(row) for row in values]
+            else:
+                data = {name: list(column_values) for name, column_values in zip(columns, zip(*values))} \
+                    if values else {name: [] for name in columns}
+            return orjson.dumps(data, default=json_default).decode('utf-8'), len(rows)
+
+        if result_format == 'objects':
+            buffer = ["["]
+            count = self.write_rows(rows, buffer)
+            buffer.append("]")
+            return "".join(buffer), count
+
+        if result_format == 'rows':
+            return "[" + ", ".join([self.dumps_values(row) for row in rows]) + "]", len(rows)
+
+        # Formato columnar: un array JSON por columna
+        parts = []
+        for name, (index, convert) in zip(self.columns, self._pairs):
+            values = ", ".join([
+                'null' if row[index] is None else convert(row[index])
+                for row in rows
+            ])
+            parts.append(encode_basestring_ascii(name) + ": [" + values + "]")
+        return "{" + ", ".join(parts) + "}", len(rows)
+
+def json_with_rows(header, key, rows_json):
+    """
+    Añade a un objeto JSON un campo cuyo valor ya está serializado.
+
+    Evita volver a decodificar y codificar los resultados con json.dumps.
+
+    Args:
+        header: Diccionario con el resto de campos de la respuesta
+        key: Nombre del campo que contendrá rows_json
+        rows_json: Texto JSON ya serializado
+
+    Returns:
+        Texto JSON con header y el campo añadido al final
+    """
+    prefix = json.dumps(header)[:-1]
+    separator = ", " if header else ""
+    return prefix + separator + encode_basestring_ascii(key) + ": " + rows_json + "}"
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Agrupación de lecturas idénticas en curso (single-flight)
+Las peticiones concurrentes con la misma clave esperan a la primera ejecución
+y comparten su respuesta serializada. Funciona entre hilos de un worker y,
+opcionalmente, entre workers de la misma máquina mediante ficheros con flock.
+"""
+
+import os
+import json
+import time
+import struct
+import hashlib
+import logging
+import threading
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SINGLEFLIGHT_ENABLED = os.getenv('SINGLEFLIGHT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Directorio compartido por los workers; vacío para agrupar solo dentro del proceso
+SINGLEFLIGHT_IPC_DIR = os.getenv('SINGLEFLIGHT_IPC_DIR', '')
+SINGLEFLIGHT_IPC_MAX_BYTES = int(os.getenv('SINGLEFLIGHT_IPC_MAX_BYTES', str(32 * 1024 * 1024)))
+SINGLEFLIGHT_WAIT_TIMEOUT = int(os.getenv('SINGLEFLIGHT_WAIT_TIMEOUT', '300'))
+
+# Marca de tiempo de escritura al inicio de cada fichero de resultado
+_RESULT_HEADER = struct.Struct('!d')
+# Antigüedad a partir de la cual se eliminan los ficheros de resultados y bloqueos
+_FILE_MAX_AGE = 600
+
+logger = logging.getLogger(__name__)
+
+def make_key(service, operation, parameters, role, token_parameter='session_token'):
+    """
+    Clave de agrupación: operación, parámetros normalizados sin token y rol.
+
+    Args:
+        service: Servicio
+        operation: Operación
+        parameters: Parámetros de la operación
+        role: Rol de la sesión que realiza la petición
+
+    Returns:
+        Clave hexadecimal
+    """
+    normalized = {}
+    for name, value in parameters.items():
+        if name == token_parameter:
+            continue
+        if isinstance(value, str) and value.strip()[:1] in ('{', '['):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        elif isinstance(value, bytes):
+            value = hashlib.sha256(value).hexdigest()
+        normalized[name] = value
+    material = json.dumps([service, operation, normalized, role], sort_keys=True, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class FileFlight:
+    """
+    Agrupación entre procesos: un fichero de bloqueo por clave y un fichero
+    con el último resultado y su marca de tiempo.
+    """
+
+    def __init__(self, directory, max_bytes=SINGLEFLIGHT_IPC_MAX_BYTES, wait_timeout=SINGLEFLIGHT_WAIT_TIMEOUT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.wait_timeout = wait_timeout
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _acquire(self, lock_file):
+        """Espera el bloqueo exclusivo como máximo wait_timeout segundos."""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.01)
+
+    def _read_result(self, path, since):
+        """Resultado escrito por otro worker después de que empezara la espera."""
+        try:
+            with open(path, 'rb') as result_file:
+                header = result_file.read(_RESULT_HEADER.size)
+                if len(header) < _RESULT_HEADER.size or _RESULT_HEADER.unpack(header)[0] < since:
+                    return None
+                return result_file.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_result(self, path, value):
+        if len(value) > self.max_bytes:
+            return
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as result_file:
+            result_file.write(_RESULT_HEADER.pack(time.time()))
+            result_file.write(value)
+        os.replace(temporary, path)
+
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._sweep()
+
+    def _sweep(self):
+        """Elimina ficheros antiguos de claves que ya no se consultan."""
+        limit = time.time() - _FILE_MAX_AGE
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.stat().st_mtime < limit:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+        except OSError as e:
+            logger.warning(f"Error al limpiar {self.directory}: {e}")
+
+    def do(self, key, fn):
+        """
+        Ejecuta fn() salvo que otro worker haya terminado la misma lectura mientras se esperaba.
+
+        Returns:
+            Tupla (valor en bytes, True si se reutilizó el resultado de otro worker)
+        """
+        path = os.path.join(self.directory, key)
+        since = time.time()
+        with open(f"{path}.lock", 'a+b') as lock_file:
+            if not self._acquire(lock_file):
+                return fn(), False
+            try:
+                shared = self._read_result(f"{path}.result", since)
+                if shared is not None:
+                    return shared, True
+                value = fn()
+                self._write_result(f"{path}.result", value)
+                return value, False
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class SingleFlight:
+    """
+    Agrupa ejecuciones concurrentes con la misma clave.
+
+    Attributes:
+        executions: Ejecuciones reales realizadas
+        shared: Peticiones atendidas con el resultado de otra ejecución
+    """
+
+    def __init__(self, ipc_dir=SINGLEFLIGHT_IPC_DIR, wait_timeout=SINGLEFLIGHT_WAIT_TIMEOUT):
+        self.wait_timeout = wait_timeout
+        self.file_flight = None
+        if ipc_dir:
+            if fcntl is None:
+                logger.warning("fcntl no disponible: single-flight limitado al proceso actual")
+            else:
+                self.file_flight = FileFlight(ipc_dir, wait_timeout=wait_timeout)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Ejecuta fn() una sola vez para todas las llamadas concurrentes con la misma clave.
+
+        Args:
+            key: Clave de agrupación (ver make_key)
+            fn: Función sin argumentos que devuelve la respuesta serializada (bytes)
+
+        Returns:
+            Tupla (valor, True si el valor se compartió con otra ejecución)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if not leader:
+            if flight.event.wait(self.wait_timeout) and flight.error is None:
+                with self._lock:
+                    self.shared += 1
+                return flight.value, True
+            # El líder falló o tardó demasiado: ejecutar por cuenta propia
+            return self._execute(key, fn)
+
+        try:
+            flight.value, shared = self._execute(key, fn)
+            return flight.value, shared
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def _execute(self, key, fn):
+        if self.file_flight is not None:
+            value, shared = self.file_flight.do(key, fn)
+        else:
+            value, shared = fn(), False
+        with self._lock:
+            if shared:
+                self.shared += 1
+            else:
+                self.executions += 1
+        return value, shared
+
+    def stats(self):
+        """Estadísticas de agrupación."""
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "executions": self.executions,
+                "shared": self.shared,
+                "ipc": self.file_flight is not None
+            }
+
+# Instancia global del proceso
+single_flight = SingleFlight()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Registro de operaciones lentas
+Cada petición SOAP mide sus fases (lectura del cuerpo, validación de la
+sesión, ejecución, serialización y compresión), los tamaños de la petición y
+de la respuesta y el número de filas o documentos devueltos. Las que superan
+SLOW_LOG_THRESHOLD_MS se escriben como una línea JSON en el logger
+soadb.slow_operations a través de una cola: el hilo de la petición solo
+encola el registro y un hilo aparte lo escribe. SLOW_LOG_SAMPLE_RATE y
+SLOW_LOG_FAST_SAMPLE_RATE permiten muestrear las operaciones lentas y las
+rápidas.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import queue
+import random
+import logging
+import datetime
+import threading
+import logging.handlers
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from .log_setup import DroppingQueueHandler
+from .tracing import tracer
+
+# Cargar variables de entorno
+load_dotenv()
+
+SLOW_LOG_ENABLED = os.getenv('SLOW_LOG_ENABLED', 'true').lower() == 'true'
+SLOW_LOG_THRESHOLD_MS = float(os.getenv('SLOW_LOG_THRESHOLD_MS', '500'))
+# Fracción de las operaciones lentas que se registran
+SLOW_LOG_SAMPLE_RATE = float(os.getenv('SLOW_LOG_SAMPLE_RATE', '1'))
+# Fracción de las operaciones rápidas que se registran (para comparar)
+SLOW_LOG_FAST_SAMPLE_RATE = float(os.getenv('SLOW_LOG_FAST_SAMPLE_RATE', '0'))
+# Registros en espera de escribirse; si la cola está llena se descartan
+SLOW_LOG_QUEUE_SIZE = int(os.getenv('SLOW_LOG_QUEUE_SIZE', '10000'))
+# Fichero de destino (por defecto la salida de errores)
+SLOW_LOG_FILE = os.getenv('SLOW_LOG_FILE', '')
+
+# Parámetros que identifican el destino de la operación
+TARGET_PARAMETERS = ('table_name', 'collection_name')
+
+# "count": N en la cabecera o al final del resultado JSON
+_COUNT = re.compile(r'"(?:count|inserted|inserted_count|affected_rows)": (\d+)')
+
+logger = logging.getLogger(__name__)
+
+# Operación en curso en el hilo actual
+_local = threading.local()
+
+class JsonLineFormatter(logging.Formatter):
+    """Escribe el diccionario del registro como una línea JSON."""
+
+    def format(self, record):
+        return json.dumps(record.msg, default=str, ensure_ascii=False)
+
+class OperationRecord:
+    """Medidas de una operación en curso."""
+
+    def __init__(self, service, operation, parameters, request_bytes=None):
+        self.started = time.perf_counter()
+        self.service = service
+        self.operation = operation
+        self.database = parameters.get('database_name')
+        self.target = next((parameters[key] for key in TARGET_PARAMETERS if parameters.get(key)), None)
+        self.request_bytes = request_bytes
+        self.response_bytes = None
+        self.rows = None
+        self.phases = {}
+        self.notes = {}
+
+    def add_phase(self, name, elapsed_ms):
+        self.phases[name] = round(self.phases.get(name, 0) + elapsed_ms, 3)
+
+    @contextmanager
+    def phase(self, name):
+        """Acumula el tiempo del bloque en la fase indicada (y lo traza como un span)."""
+        started = time.perf_counter()
+        try:
+            with tracer.span(name):
+                yield self
+        finally:
+            self.add_phase(name, (time.perf_counter() - started) * 1000)
+
+    def set_result(self, result):
+        """Filas devueltas según el resultado JSON (sin decodificarlo)."""
+        if not result:
+            return
+        match = _COUNT.search(result, 0, 2048) or _COUNT.search(result, max(0, len(result) - 512))
+        if match:
+            self.rows = int(match.group(1))
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+class SlowOperationLog:
+    """Registro muestreado de las operaciones lentas."""
+
+    def __init__(self, threshold_ms=SLOW_LOG_THRESHOLD_MS, sample_rate=SLOW_LOG_SAMPLE_RATE,
+                 fast_sample_rate=SLOW_LOG_FAST_SAMPLE_RATE, enabled=SLOW_LOG_ENABLED, output=None):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.fast_sample_rate = fast_sample_rate
+        self.enabled = enabled
+        self.logged = 0
+        self.slow = 0
+
+        self.logger = logging.getLogger('soadb.slow_operations')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.queue = queue.Queue(SLOW_LOG_QUEUE_SIZE)
+        self.handler = DroppingQueueHandler(self.queue)
+        # Un único registro activo por proceso: sustituye al anterior
+        for handler in list(self.logger.handlers):
+            if isinstance(handler, DroppingQueueHandler):
+                self.logger.removeHandler(handler)
+        self.logger.addHandler(self.handler)
+
+        if output is None:
+            output = logging.FileHandler(SLOW_LOG_FILE) if SLOW_LOG_FILE else logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonLineFormatter())
+        self.listener = logging.handlers.QueueListener(self.queue, output)
+        self.listener.start()
+
+    def start(self, service, operation, parameters, request_bytes=None):
+        """
+        Empieza a medir una operación en el hilo actual.
+
+        Returns:
+            OperationRecord
+        """
+        record = OperationRecord(service, operation, parameters, request_bytes)
+        _local.record = record
+        return record
+
+    def finish(self, status=200):
+        """
+        Termina la operación del hilo actual y la registra si corresponde.
+
+        Args:
+            status: Código HTTP de la respuesta
+        """
+        record = getattr(_local, 'record', None)
+        _local.record = None
+        if record is None or not self.enabled:
+            return
+
+        elapsed_ms = record.elapsed_ms()
+        slow = elapsed_ms >= self.threshold_ms
+        if slow:
+            self.slow += 1
+        rate = self.sample_rate if slow else self.fast_sample_rate
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return
+
+        self.logged += 1
+        self.logger.info({
+            "time": datetime.datetime.now().isoformat(),
+            "slow": slow,
+            "service": record.service,
+            "operation": record.operation,
+            "database": record.database,
+            "target": record.target,
+            "status": status,
+            "duration_ms": round(elapsed_ms, 3),
+            "phases_ms": record.phases,
+            "rows": record.rows,
+            "request_bytes": record.request_bytes,
+            "response_bytes": record.response_bytes,
+            **record.notes
+        })
+
+    def stats(self):
+        """Contadores para el health check."""
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "slow_operations": self.slow,
+            "logged": self.logged,
+            "dropped": self.handler.dropped
+        }
+
+    def close(self):
+        """Escribe los registros pendientes y detiene el hilo de escritura."""
+        self.listener.stop()
+
+def current_record():
+    """Operación que se está midiendo en el hilo actual (o None)."""
+    return getattr(_local, 'record', None)
+
+@contextmanager
+def phase(name):
+    """Mide una fase de la operación en curso (no hace nada fuera de una petición)."""
+    record = getattr(_local, 'record', None)
+    if record is None:
+        yield None
+        return
+    with record.phase(name):
+        yield record
+
+# Registro global del proceso
+slow_operation_log = SlowOperationLog()
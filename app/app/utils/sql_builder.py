@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Generación de consultas SQL de agregación
+Permite calcular varias agregaciones, agrupar por varias columnas y aplicar
+HAVING, ORDER BY y LIMIT en una única sentencia.
+"""
+
+import json
+from .where_compiler import WhereError, where_compiler, quote_identifier
+
+# Funciones de agregación admitidas y su plantilla SQL
+AGGREGATE_FUNCTIONS = {
+    'COUNT': "COUNT({field})",
+    'COUNT_DISTINCT': "COUNT(DISTINCT {field})",
+    'SUM': "SUM({field})",
+    'AVG': "AVG({field})",
+    'MIN': "MIN({field})",
+    'MAX': "MAX({field})"
+}
+
+def _parse_list(value):
+    """Acepta una lista JSON o una cadena separada por comas."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    value = value.strip()
+    if value.startswith('['):
+        return json.loads(value)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def parse_aggregates(aggregates_json=None, operation=None, field=None):
+    """
+    Normaliza la lista de agregaciones solicitadas.
+
+    Args:
+        aggregates_json: Lista JSON de {"function", "field", "alias"}
+        operation: Función única (formato anterior de la operación aggregate)
+        field: Campo de la función única
+
+    Returns:
+        Lista de diccionarios {"function", "field", "alias"}
+    """
+    if aggregates_json:
+        aggregates = json.loads(aggregates_json) if isinstance(aggregates_json, str) else aggregates_json
+        if not isinstance(aggregates, list) or not aggregates:
+            raise WhereError("aggregates_json debe ser una lista no vacía")
+    elif operation:
+        # Compatibilidad: una sola función cuyo resultado se llama 'result'
+        aggregates = [{"function": operation, "field": field, "alias": "result"}]
+    else:
+        raise WhereError("Se requiere aggregates_json o los parámetros operation y field")
+
+    normalized = []
+    for index, aggregate in enumerate(aggregates):
+        function = str(aggregate.get('function', '')).upper()
+        if function not in AGGREGATE_FUNCTIONS:
+            raise WhereError(f"Función de agregación no soportada: {aggregate.get('function')}")
+
+        agg_field = aggregate.get('field') or '*'
+        if agg_field == '*' and function != 'COUNT':
+            raise WhereError(f"{function} requiere un campo")
+
+        alias = aggregate.get('alias') or f"{function.lower()}_{agg_field if agg_field != '*' else 'all'}"
+        normalized.append({"function": function, "field": agg_field, "alias": alias})
+
+    aliases = [a['alias'] for a in normalized]
+    if len(set(aliases)) != len(aliases):
+        raise WhereError("Los alias de las agregaciones deben ser únicos")
+
+    return normalized
+
+def build_aggregate_query(table_name, aggregates, group_by=None, where_clause="", where_values=None,
+                          having=None, order_by=None, limit=None, columns=None):
+    """
+    Construye una sentencia SELECT de agregación.
+
+    Args:
+        table_name: Tabla
+        aggregates: Agregaciones normalizadas con parse_aggregates
+        group_by: Columnas de agrupación (lista o cadena separada por comas)
+        where_clause: Cláusula " WHERE ..." ya compilada
+        where_values: Parámetros de where_clause
+        having: Condición HAVING (sintaxis de where_json sobre alias y columnas agrupadas)
+        order_by: Lista o cadena "campo [ASC|DESC], ..."
+        limit: Número máximo de filas
+        columns: Columnas válidas de la tabla para validar campos
+
+    Returns:
+        Tupla (sql, parámetros)
+
+    Raises:
+        WhereError: Si algún campo, alias u opción no es válido
+    """
+    group_columns = _parse_list(group_by)
+    known = set(columns) if columns is not None else None
+
+    for column in group_columns + [a['field'] for a in aggregates if a['field'] != '*']:
+        if known is not None and column not in known:
+            raise WhereError(f"Columna desconocida: {column}")
+
+    select_parts = [quote_identifier(column) for column in group_columns]
+    for aggregate in aggregates:
+        field_sql = '*' if aggregate['field'] == '*' else quote_identifier(aggregate['field'])
+        expression = AGGREGATE_FUNCTIONS[aggregate['function']].format(field=field_sql)
+        select_parts.append(f"{expression} AS {quote_identifier(aggregate['alias'])}")
+
+    sql = f"SELECT {', '.join(select_parts)} FROM {quote_identifier(table_name)}{where_clause}"
+    params = list(where_values or [])
+
+    if group_columns:
+        sql += " GROUP BY " + ", ".join(quote_identifier(column) for column in group_columns)
+
+    # HAVING y ORDER BY solo pueden referirse a resultados de la consulta
+    result_columns = set(group_columns) | {a['alias'] for a in aggregates}
+
+    if having:
+        having_sql, having_values = where_compiler.compile(having, result_columns)
+        sql += f" HAVING {having_sql}"
+        params.extend(having_values)
+
+    order_parts = []
+    for item in _parse_list(order_by):
+        if isinstance(item, dict):
+            column, direction = item.get('field'), str(item.get('direction', 'ASC'))
+        else:
+            tokens = item.split()
+            column, direction = tokens[0], tokens[1] if len(tokens) > 1 else 'ASC'
+        direction = direction.upper()
+        if direction not in ('ASC', 'DESC'):
+            raise WhereError(f"Dirección de ordenación no válida: {direction}")
+        if column not in result_columns:
+            raise WhereError(f"Solo se puede ordenar por columnas agrupadas o alias: {column}")
+        order_parts.append(f"{quote_identifier(column)} {direction}")
+
+    if order_parts:
+        sql += " ORDER BY " + ", ".join(order_parts)
+
+    if limit not in (None, ''):
+        limit = int(limit)
+        if limit < 0:
+            raise WhereError("limit no puede ser negativo")
+        sql += f" LIMIT {limit}"
+
+    return sql, params
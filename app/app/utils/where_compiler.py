@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compilador de condiciones where_json a predicados SQL parametrizados
+
+Sintaxis admitida (inspirada en los filtros de MongoDB):
+
+    {"edad": 20}                              -> `edad` = %s
+    {"email": null}                           -> `email` IS NULL
+    {"edad": {"$gte": 18, "$lt": 30}}         -> `edad` >= %s AND `edad` < %s
+    {"edad": {"$between": [18, 30]}}          -> `edad` BETWEEN %s AND %s
+    {"carrera": {"$in": ["Derecho", "Medicina"]}}
+    {"nombre": {"$prefix": "Ju"}}             -> `nombre` LIKE 'Ju%' (usa índices)
+    {"$or": [{"edad": 20}, {"activo": true}]}
+
+Los operadores disponibles son $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin,
+$between, $null, $like y $prefix. Los valores siempre viajan como parámetros.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+WHERE_CACHE_SIZE = int(os.getenv('WHERE_CACHE_SIZE', '256'))
+CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', '60'))
+
+logger = logging.getLogger(__name__)
+
+# Operadores de comparación simples
+COMPARISON_OPERATORS = {
+    '$eq': '=',
+    '$ne': '<>',
+    '$gt': '>',
+    '$gte': '>=',
+    '$lt': '<',
+    '$lte': '<='
+}
+
+class WhereError(ValueError):
+    """Condición where_json no válida."""
+
+def quote_identifier(name):
+    """Escapa un identificador MySQL entre comillas invertidas."""
+    return "`" + str(name).replace("`", "``") + "`"
+
+def escape_like(value):
+    """Escapa los comodines de LIKE para buscar el texto literal."""
+    return str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _walk_column(column, condition, params):
+    """Devuelve la forma de las condiciones sobre una columna y acumula sus parámetros."""
+    # Valor escalar o nulo: igualdad
+    if condition is None:
+        return (('null', column, True),)
+    if isinstance(condition, list):
+        condition = {'$in': condition}
+    if not isinstance(condition, dict):
+        params.append(condition)
+        return (('cmp', column, '='),)
+
+    if not condition:
+        raise WhereError(f"Condición vacía para la columna '{column}'")
+
+    shapes = []
+    for op, value in condition.items():
+        if op in COMPARISON_OPERATORS:
+            if value is None and op in ('$eq', '$ne'):
+                shapes.append(('null', column, op == '$eq'))
+            else:
+                params.append(value)
+                shapes.append(('cmp', column, COMPARISON_OPERATORS[op]))
+        elif op in ('$in', '$nin'):
+            if not isinstance(value, list):
+                raise WhereError(f"{op} requiere una lista en la columna '{column}'")
+            if not value:
+                # IN () no es SQL válido: una lista vacía nunca (o siempre) coincide
+                shapes.append(('const', op == '$nin'))
+                continue
+            params.extend(value)
+            shapes.append(('in', column, len(value), op == '$nin'))
+        elif op == '$between':
+            if not isinstance(value, list) or len(value) != 2:
+                raise WhereError(f"$between requiere una lista [min, max] en la columna '{column}'")
+            params.extend(value)
+            shapes.append(('between', column))
+        elif op == '$null':
+            shapes.append(('null', column, bool(value)))
+        elif op == '$like':
+            params.append(value)
+            shapes.append(('like', column))
+        elif op == '$prefix':
+            params.append(escape_like(value) + '%')
+            shapes.append(('like', column))
+        else:
+            raise WhereError(f"Operador no soportado: {op}")
+
+    return tuple(shapes)
+
+def _walk(node, params):
+    """Recorre una condición y devuelve su forma (sin valores) como tupla anidada."""
+    if not isinstance(node, dict):
+        raise WhereError("where_json debe ser un objeto JSON")
+
+    shapes = []
+    for key, value in node.items():
+        if key in ('$or', '$and'):
+            if not isinstance(value, list) or not value:
+                raise WhereError(f"{key} requiere una lista no vacía de condiciones")
+            shapes.append((key[1:], tuple(_walk(item, params) for item in value)))
+        elif key.startswith('$'):
+            raise WhereError(f"Operador no soportado: {key}")
+        else:
+            shapes.extend(_walk_column(key, value, params))
+
+    return ('and', tuple(shapes))
+
+def _render(shape):
+    """Genera el fragmento SQL correspondiente a una forma."""
+    kind = shape[0]
+
+    if kind in ('and', 'or'):
+        parts = [_render(item) for item in shape[1]]
+        if not parts:
+            return "1 = 1"
+        if len(parts) == 1:
+            return parts[0]
+        joiner = " AND " if kind == 'and' else " OR "
+        return "(" + joiner.join(parts) + ")"
+    if kind == 'cmp':
+        return f"{quote_identifier(shape[1])} {shape[2]} %s"
+    if kind == 'in':
+        placeholders = ", ".join(["%s"] * shape[2])
+        negation = "NOT " if shape[3] else ""
+        return f"{quote_identifier(shape[1])} {negation}IN ({placeholders})"
+    if kind == 'between':
+        return f"{quote_identifier(shape[1])} BETWEEN %s AND %s"
+    if kind == 'null':
+        return f"{quote_identifier(shape[1])} IS {'' if shape[2] else 'NOT '}NULL"
+    if kind == 'like':
+        return f"{quote_identifier(shape[1])} LIKE %s"
+    if kind == 'const':
+        return "1 = 1" if shape[1] else "1 = 0"
+
+    raise WhereError(f"Forma de condición desconocida: {kind}")
+
+def _columns(shape, found):
+    """Acumula las columnas referenciadas por una forma."""
+    if shape[0] in ('and', 'or'):
+        for item in shape[1]:
+            _columns(item, found)
+    elif shape[0] != 'const':
+        found.add(shape[1])
+    return found
+
+class WhereCompiler:
+    """
+    Compila condiciones where_json a SQL parametrizado.
+
+    El SQL generado solo depende de la forma de la condición (columnas,
+    operadores y tamaño de las listas), no de sus valores, por lo que se
+    guarda en una caché LRU indexada por esa forma.
+    """
+
+    def __init__(self, cache_size=WHERE_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, where, columns=None):
+        """
+        Compila una condición.
+
+        Args:
+            where: Condición ya decodificada (dict) o None
+            columns: Columnas válidas de la tabla; si se indica, se rechazan
+                las condiciones sobre columnas desconocidas
+
+        Returns:
+            Tupla (fragmento SQL sin la palabra WHERE, lista de parámetros).
+            El fragmento es una cadena vacía si no hay condiciones.
+
+        Raises:
+            WhereError: Si la condición no es válida
+        """
+        if not where:
+            return "", []
+
+        params = []
+        shape = _walk(where, params)
+
+        with self._lock:
+            entry = self._cache.get(shape)
+            if entry is not None:
+                self._cache.move_to_end(shape)
+                self.hits += 1
+
+        if entry is None:
+            entry = (_render(shape), frozenset(_columns(shape, set())))
+            with self._lock:
+                self.misses += 1
+                self._cache[shape] = entry
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        sql, used_columns = entry
+        if columns is not None:
+            unknown = used_columns.difference(columns)
+            if unknown:
+                raise WhereError(f"Columnas desconocidas en where_json: {', '.join(sorted(unknown))}")
+
+        return sql, params
+
+class TableCatalog:
+    """Caché con expiración de las columnas de cada tabla."""
+
+    def __init__(self, ttl=CATALOG_CACHE_TTL):
+        self.ttl = ttl
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    def get_columns(self, conn, database_name, table_name):
+        """
+        Obtiene las columnas de una tabla, consultando MySQL solo si la
+        entrada de la caché no existe o expiró.
+
+        Args:
+            conn: Conexión MySQL abierta sobre database_name
+            database_name: Base de datos
+            table_name: Tabla
+
+        Returns:
+            frozenset con los nombres de las columnas
+        """
+        key = (database_name, table_name)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._columns.get(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            return entry[1]
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SHOW COLUMNS FROM {quote_identifier(table_name)}")
+            columns = frozenset(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.close()
+
+        with self._lock:
+            self._columns[key] = (now, columns)
+        return columns
+
+    def invalidate(self, database_name, table_name=None):
+        """Descarta las columnas en caché de una tabla o de toda una base de datos."""
+        with self._lock:
+            for key in list(self._columns):
+                if key[0] == database_name and (table_name is None or key[1] == table_name):
+                    del self._columns[key]
+
+# Instancias compartidas por el proceso
+where_compiler = WhereCompiler()
+table_catalog = TableCatalog()
@@ -26,6 +26,39 @@ CREATE TABLE IF NOT EXISTS users (
     INDEX (provider, provider_id)
 );
 
+-- Crear tabla de ubicación de las bases de datos de usuario en los servidores MySQL
+CREATE TABLE IF NOT EXISTS database_placement (
+    database_name VARCHAR(64) PRIMARY KEY,
+    cluster VARCHAR(64) NOT NULL,
+    state ENUM('active', 'migrating') DEFAULT 'active',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX (cluster)
+);
+
+-- Crear tabla de trabajos asíncronos (submitJob)
+CREATE TABLE IF NOT EXISTS jobs (
+    id VARCHAR(36) PRIMARY KEY,
+    owner VARCHAR(64) NOT NULL,
+    service VARCHAR(20) NOT NULL,
+    operation VARCHAR(50) NOT NULL,
+    database_name VARCHAR(64),
+    state ENUM('queued', 'running', 'succeeded', 'failed', 'cancelled') DEFAULT 'queued',
+    worker VARCHAR(128),
+    heartbeat_at TIMESTAMP NULL,
+    progress DECIMAL(5,4) DEFAULT 0,
+    message TEXT,
+    result_path VARCHAR(255),
+    result_size BIGINT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    expires_at TIMESTAMP NULL,
+    INDEX (owner),
+    INDEX (state),
+    INDEX (expires_at)
+);
+
 -- Tabla de ejemplo: estudiantes
 CREATE TABLE IF NOT EXISTS estudiantes (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -10,6 +10,7 @@ import os
 import logging
 from dotenv import load_dotenv
 from simple_proxy import app
+from utils.log_setup import configure_logging
 
 # Cargar variables de entorno
 load_dotenv()
@@ -18,11 +19,8 @@ load_dotenv()
 PROXY_HOST = os.getenv('PROXY_HOST', '0.0.0.0')
 PROXY_PORT = int(os.getenv('PROXY_PORT', '8000'))
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configurar logging (cola con escritura en otro hilo, ver utils/log_setup.py)
+configure_logging('proxy')
 logger = logging.getLogger(__name__)
 
 # Función principal para iniciar el servidor
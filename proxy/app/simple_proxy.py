@@ -14,8 +14,11 @@ import requests
 import json
 import time
 import threading
-from flask import Flask, request, Response, jsonify
+from flask import Flask, request, Response, jsonify, g
 from dotenv import load_dotenv
+from utils.response_cache import PROXY_CACHE_ENABLED, CachedResponse, parse_request, response_cache
+from utils.log_setup import configure_logging
+from utils.tracing import TRACEPARENT_HEADER, tracer, inject, current_span
 
 # Cargar variables de entorno
 load_dotenv()
@@ -25,11 +28,18 @@ APP_HOST = os.getenv('APP_HOST', 'app')
 APP_PORT = os.getenv('APP_PORT', '8080')
 ALLOWED_IPS = os.getenv('ALLOWED_IPS', '127.0.0.1')
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Plazo máximo de una petición SOAP y margen para recibir la respuesta de la aplicación
+PROXY_REQUEST_TIMEOUT = float(os.getenv('PROXY_REQUEST_TIMEOUT', '120'))
+PROXY_TIMEOUT_GRACE = float(os.getenv('PROXY_TIMEOUT_GRACE', '2'))
+# Espera máxima de la respuesta de una importación (la aplicación responde al terminar)
+PROXY_IMPORT_TIMEOUT = float(os.getenv('PROXY_IMPORT_TIMEOUT', '3600'))
+# Tamaño de los fragmentos reenviados de las respuestas en streaming (exportaciones)
+PROXY_STREAM_CHUNK = int(os.getenv('PROXY_STREAM_CHUNK', str(64 * 1024)))
+# Cabecera con el tiempo disponible en milisegundos (del cliente al proxy y del proxy a la aplicación)
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+
+# Configurar logging (cola con escritura en otro hilo, ver utils/log_setup.py)
+configure_logging('proxy')
 logger = logging.getLogger(__name__)
 
 # Crear aplicación Flask
@@ -107,6 +117,7 @@ def before_request():
     global metrics
     if not connection_semaphore.acquire(blocking=False):
         return jsonify({"error": "Demasiadas solicitudes. Intente de nuevo más tarde."}), 429
+    g.connection_slot = True
     
     metrics["active_connections"] = max_connections - connection_semaphore._value
     metrics["requests_total"] += 1
@@ -118,57 +129,227 @@ def before_request():
 @app.after_request
 def after_request(response):
     """Ejecutar después de cada solicitud."""
-    # Liberar el semáforo
-    connection_semaphore.release()
+    # Liberar el semáforo al cerrar la respuesta: las exportaciones en streaming
+    # ocupan su plaza hasta enviar el último fragmento
+    if g.pop("connection_slot", False):
+        response.call_on_close(release_connection)
     
     # Registrar status code
     status = str(response.status_code)
     metrics["requests_by_status"][status] = metrics["requests_by_status"].get(status, 0) + 1
     
+    # Cerrar la traza de la petición SOAP (en streaming, hasta el envío de las cabeceras)
+    tracer.end_trace(response.status_code)
+    
     return response
 
+def release_connection():
+    """Devuelve la plaza de concurrencia de una petición."""
+    connection_semaphore.release()
+    metrics["active_connections"] = max_connections - connection_semaphore._value
+
+def read_upstream(response, default_content_type="text/xml"):
+    """
+    Lee la respuesta de la aplicación sin descomprimir el cuerpo.
+
+    Los cuerpos comprimidos (gzip, deflate, zstd) se conservan tal cual junto
+    con sus cabeceras Content-Encoding y Vary. Las respuestas marcadas con
+    X-SOADB-Stream (exportaciones) se reenvían por fragmentos sin reunirlas.
+
+    Returns:
+        CachedResponse con el estado, las cabeceras relevantes y el cuerpo
+    """
+    if response.headers.get("X-SOADB-Stream") == "1":
+        content = stream_upstream(response)
+    else:
+        try:
+            content = response.raw.read(decode_content=False)
+        finally:
+            response.close()
+
+    headers = {"Content-Type": response.headers.get("Content-Type", default_content_type)}
+    for header in response.headers:
+        if header.lower() in ("content-encoding", "vary", "retry-after", "content-disposition", "x-export-columns") \
+                or header.lower().startswith("x-soadb-"):
+            headers[header] = response.headers[header]
+
+    return CachedResponse(response.status_code, headers, content)
+
+def stream_upstream(response):
+    """Reenvía el cuerpo de la aplicación por fragmentos y cierra la conexión al terminar."""
+    try:
+        yield from response.raw.stream(PROXY_STREAM_CHUNK, decode_content=False)
+    finally:
+        response.close()
+
+def client_response(upstream):
+    """Respuesta para el cliente sin las cabeceras internas de la caché."""
+    headers = {k: v for k, v in upstream.headers.items() if not k.lower().startswith("x-soadb-")}
+    return Response(
+        upstream.content,
+        status=upstream.status,
+        headers=headers
+    )
+
+def passthrough_response(response, default_content_type="text/xml"):
+    """Construye la respuesta al cliente con el cuerpo tal como lo envió la aplicación."""
+    return client_response(read_upstream(response, default_content_type))
+
+def upstream_headers(*names):
+    """Cabeceras de la petición del cliente que se reenvían a la aplicación."""
+    # Sin Accept-Encoding explícito, requests pediría gzip en nombre del cliente
+    headers = {"Accept-Encoding": request.headers.get("Accept-Encoding", "identity")}
+    for name in names:
+        if name in request.headers:
+            headers[name] = request.headers[name]
+    return headers
+
+def request_budget():
+    """
+    Segundos disponibles para la petición: el plazo indicado por el cliente en
+    X-Request-Timeout-Ms sin superar PROXY_REQUEST_TIMEOUT.
+    """
+    try:
+        requested = float(request.headers.get(DEADLINE_HEADER, "")) / 1000
+    except ValueError:
+        return PROXY_REQUEST_TIMEOUT
+    return max(0.0, min(requested, PROXY_REQUEST_TIMEOUT))
+
+def forward_soap(body, content_type):
+    """
+    Reenvía una petición SOAP a la aplicación y devuelve su respuesta sin decodificar.
+    
+    El tiempo que queda hasta el plazo de la petición viaja en X-Request-Timeout-Ms
+    para que la aplicación acote sus consultas.
+    """
+    remaining = g.deadline - time.monotonic()
+    if remaining <= 0:
+        raise requests.Timeout("El plazo de la petición venció antes de reenviarla")
+    
+    target_url = f"http://{APP_HOST}:{APP_PORT}/soap"
+    headers = upstream_headers("Content-Encoding")
+    headers[DEADLINE_HEADER] = str(int(remaining * 1000))
+    headers.update({
+        "Content-Type": content_type,
+        "SOAPAction": request.headers.get("SOAPAction", ""),
+        "Accept": request.headers.get("Accept", "*/*"),
+    })
+    if PROXY_CACHE_ENABLED:
+        headers["X-SOADB-Cache"] = "1"
+    
+    with tracer.span("proxy.forward", "client", **{"http.url": target_url, "request_bytes": len(body)}) as span:
+        # La aplicación continúa la traza como hija de este span
+        inject(headers)
+        response = requests.post(
+            target_url,
+            data=body,
+            headers=headers,
+            timeout=remaining + PROXY_TIMEOUT_GRACE,
+            stream=True,
+        )
+        if span is not None:
+            span.set_attribute("http.status_code", response.status_code)
+        return read_upstream(response)
+
+def cached_soap_call(signature, body, content_type):
+    """
+    Atiende una petición SOAP a través de la caché de respuestas.
+    
+    Las operaciones de solo lectura de un rol conocido se sirven desde la caché
+    y las peticiones idénticas concurrentes comparten una única llamada a la
+    aplicación, salvo las pedidas en streaming. El resto se reenvía y su respuesta alimenta la caché (rol del
+    token, operaciones cacheables e invalidaciones).
+    """
+    variants = (request.headers.get("Accept", "*/*"), request.headers.get("Accept-Encoding", "identity"))
+    
+    def load():
+        upstream = forward_soap(body, content_type)
+        ttl = int(upstream.headers.get("X-SOADB-Cache-TTL", "0") or 0)
+        role = upstream.headers.get("X-SOADB-Role")
+        if upstream.status == 200 and ttl and role:
+            response_cache.learn_read_only(signature.service, signature.operation)
+            expires_in = upstream.headers.get("X-SOADB-Session-Expires")
+            response_cache.remember_role(signature.token, role, int(expires_in) if expires_in else None)
+            upstream.database = signature.database if signature.service != "admin" else "admin:*"
+            response_cache.put(response_cache.make_key(signature, role, *variants), upstream, ttl)
+        if "X-SOADB-Invalidate" in upstream.headers:
+            response_cache.invalidate(upstream.headers["X-SOADB-Invalidate"])
+        if signature.operation == "logout":
+            response_cache.forget_role(signature.token)
+        return upstream
+    
+    role = response_cache.role_for(signature.token) if signature.token else None
+    # Un cuerpo en streaming solo puede leerlo una petición: ni caché ni agrupación
+    if role is None or signature.streaming or not response_cache.is_read_only(signature.service, signature.operation):
+        return load()
+    
+    key = response_cache.make_key(signature, role, *variants)
+    cached = response_cache.get(key)
+    if cached is not None:
+        span = current_span()
+        if span is not None:
+            span.set_attribute("cache.hit", True)
+        return cached
+    return response_cache.fetch(key, load)
+
 @app.route('/soap', methods=['POST'])
 def soap_proxy():
     """
     Endpoint principal para proxying de peticiones SOAP.
     Recibe solicitudes SOAP, las valida y las reenvía al servicio apropiado.
     """
-    # Obtener el body de la petición
-    body = request.data
+    # Obtener el body de la petición (sin descomprimir si llega con Content-Encoding)
+    body = request.get_data()
     content_type = request.headers.get("Content-Type", "")
     
-    # Validar que es una petición SOAP
-    if "text/xml" not in content_type and "application/soap+xml" not in content_type:
+    # Validar que es una petición SOAP (los mensajes MTOM/XOP llegan como multipart/related)
+    if ("text/xml" not in content_type and "application/soap+xml" not in content_type
+            and not content_type.lower().startswith("multipart/related")):
         return Response(
-            "Content-Type no válido. Debe ser text/xml o application/soap+xml",
+            "Content-Type no válido. Debe ser text/xml, application/soap+xml o multipart/related",
             status=415
         )
     
-    # Construir la URL de destino en la aplicación
-    target_url = f"http://{APP_HOST}:{APP_PORT}/soap"
+    # Plazo de la petición completa (incluida la espera en la caché)
+    g.deadline = time.monotonic() + request_budget()
+    
+    # Traza de la petición (hija de la del cliente si envía traceparent)
+    span = tracer.start_trace("proxy /soap", request.headers.get(TRACEPARENT_HEADER))
+    
+    # Solo los sobres SOAP simples sin comprimir pasan por la caché
+    signature = None
+    if PROXY_CACHE_ENABLED and "Content-Encoding" not in request.headers \
+            and not content_type.lower().startswith("multipart/related"):
+        signature = parse_request(body)
+        if span is not None and signature is not None:
+            span.set_attribute("soap.service", signature.service)
+            span.set_attribute("soap.operation", signature.operation)
     
     try:
         # Reenviar la petición al servicio interno
         start_time = time.time()
-        response = requests.post(
-            target_url,
-            data=body,
-            headers={
-                "Content-Type": content_type,
-                "SOAPAction": request.headers.get("SOAPAction", ""),
-            },
-            timeout=300,
-        )
+        if signature is not None:
+            upstream = cached_soap_call(signature, body, content_type)
+        else:
+            upstream = forward_soap(body, content_type)
+            # Las escrituras que no pasan por la caché (MTOM) también la invalidan
+            if "X-SOADB-Invalidate" in upstream.headers:
+                response_cache.invalidate(upstream.headers["X-SOADB-Invalidate"])
+        
+        # Devolver la respuesta del servicio
+        proxied = client_response(upstream)
         
         # Registrar tiempo de respuesta
         elapsed_time = time.time() - start_time
-        logger.info(f"Petición procesada en {elapsed_time:.4f} segundos")
+        logger.info("Petición procesada en %.4f segundos", elapsed_time)
         
-        # Devolver la respuesta del servicio
+        return proxied
+    
+    except requests.Timeout as e:
+        logger.error(f"Plazo agotado esperando al servicio: {e}")
         return Response(
-            response.content,
-            status=response.status_code,
-            headers={"Content-Type": response.headers.get("Content-Type", "text/xml")}
+            f"El servicio no respondió dentro del plazo: {str(e)}",
+            status=504
         )
     
     except requests.RequestException as e:
@@ -198,15 +379,13 @@ def get_wsdl(service):
         # Reenviar la petición al servicio interno
         response = requests.get(
             target_url,
+            headers=upstream_headers(),
             timeout=10,
+            stream=True,
         )
         
         # Devolver la respuesta del servicio
-        return Response(
-            response.content,
-            status=response.status_code,
-            headers={"Content-Type": "text/xml"}
-        )
+        return passthrough_response(response)
     
     except requests.RequestException as e:
         logger.error(f"Error al obtener el WSDL del servicio {service}: {e}")
@@ -215,6 +394,83 @@ def get_wsdl(service):
             status=502
         )
 
+@app.route('/export/<service>/<database_name>/<name>', methods=['GET'])
+def export_proxy(service, database_name, name):
+    """
+    Endpoint para exportar una tabla o colección en streaming.
+    """
+    if service not in ["sql", "nosql"]:
+        return Response(
+            "Servicio no encontrado. Servicios disponibles: sql, nosql",
+            status=404
+        )
+    
+    target_url = f"http://{APP_HOST}:{APP_PORT}/export/{service}/{database_name}/{name}"
+    
+    try:
+        # El plazo solo acota la espera de cada fragmento, no la exportación completa
+        response = requests.get(
+            target_url,
+            params=request.args,
+            headers=upstream_headers("X-Session-Token"),
+            timeout=PROXY_REQUEST_TIMEOUT,
+            stream=True,
+        )
+        return passthrough_response(response, "application/json")
+    
+    except requests.RequestException as e:
+        logger.error(f"Error al exportar {service}/{database_name}/{name}: {e}")
+        return Response(
+            f"No se pudo contactar con el servicio: {str(e)}",
+            status=502
+        )
+
+@app.route('/import/<service>/<database_name>/<name>', methods=['POST'])
+def import_proxy(service, database_name, name):
+    """
+    Endpoint para importar CSV o NDJSON en una tabla o colección.
+    El cuerpo se reenvía por fragmentos (chunked) sin reunirlo en el proxy.
+    """
+    if service not in ["sql", "nosql"]:
+        return Response(
+            "Servicio no encontrado. Servicios disponibles: sql, nosql",
+            status=404
+        )
+    
+    target_url = f"http://{APP_HOST}:{APP_PORT}/import/{service}/{database_name}/{name}"
+    
+    def body():
+        while True:
+            chunk = request.stream.read(PROXY_STREAM_CHUNK)
+            if not chunk:
+                break
+            yield chunk
+    
+    try:
+        headers = upstream_headers("X-Session-Token", "Content-Type", "Content-Encoding", DEADLINE_HEADER)
+        if PROXY_CACHE_ENABLED:
+            headers["X-SOADB-Cache"] = "1"
+        response = requests.post(
+            target_url,
+            params=request.args,
+            data=body(),
+            headers=headers,
+            timeout=PROXY_IMPORT_TIMEOUT,
+            stream=True,
+        )
+        upstream = read_upstream(response, "application/json")
+        # Las filas importadas invalidan las lecturas en caché de la base de datos
+        if "X-SOADB-Invalidate" in upstream.headers:
+            response_cache.invalidate(upstream.headers["X-SOADB-Invalidate"])
+        return client_response(upstream)
+    
+    except requests.RequestException as e:
+        logger.error(f"Error al importar en {service}/{database_name}/{name}: {e}")
+        return Response(
+            f"No se pudo contactar con el servicio: {str(e)}",
+            status=502
+        )
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Endpoint para comprobar el estado del servicio."""
@@ -223,7 +479,15 @@ def health_check():
 @app.route('/metrics', methods=['GET'])
 def get_metrics():
     """Endpoint para obtener métricas de rendimiento."""
-    return jsonify(metrics)
+    return jsonify({**metrics, "cache": response_cache.stats(), "tracing": tracer.stats()})
+
+@app.route('/traces', methods=['GET'])
+def get_traces():
+    """Últimas trazas del proxy (solo con TRACE_EXPORTER=memory)."""
+    if not hasattr(tracer.exporter, "traces"):
+        return jsonify({"error": "Las trazas no se guardan en memoria (TRACE_EXPORTER)"}), 404
+    limit = request.args.get("limit", default=20, type=int)
+    return jsonify({"traces": tracer.exporter.traces(limit)})
 
 # Iniciar el servidor si este script se ejecuta directamente
 if __name__ == "__main__":
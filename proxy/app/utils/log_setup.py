@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Configuración del logging del proxy
+(copia de app/app/utils/log_setup.py: cada imagen contiene solo su directorio)
+Sustituye los manejadores de logging.basicConfig por un QueueHandler: el hilo
+que registra un mensaje solo aplica los filtros (límite por logger y muestreo
+de los mensajes informativos) y encola el registro sin formatearlo; un
+QueueListener lo formatea (texto o JSON, truncando los mensajes largos) y lo
+escribe en otro hilo. Los mensajes deben usar argumentos (logger.info("%s", x))
+en lugar de f-strings para que el formateo también quede fuera de la petición.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import random
+import logging
+import datetime
+import threading
+import logging.handlers
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# json o text
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+# Mensajes por segundo admitidos por logger (0 sin límite) y ráfaga máxima
+LOG_RATE_LIMIT = float(os.getenv('LOG_RATE_LIMIT', '50'))
+LOG_RATE_BURST = float(os.getenv('LOG_RATE_BURST', '200'))
+# Fracción de los mensajes DEBUG e INFO que se escriben (WARNING o superior siempre)
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv('LOG_SUCCESS_SAMPLE_RATE', '1'))
+# Longitud máxima del mensaje formateado
+LOG_MAX_MESSAGE_LENGTH = int(os.getenv('LOG_MAX_MESSAGE_LENGTH', '2000'))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Atributos estándar de LogRecord (el resto son campos extra del mensaje)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'suppressed'}
+
+_configured = None
+_configure_lock = threading.Lock()
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que no bloquea: descarta (y cuenta) los registros si la cola
+    está llena y no los formatea al encolarlos.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # La cola es del propio proceso: el registro se formatea en el hilo del listener
+        return record
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita los mensajes DEBUG e INFO por logger con un token bucket; los
+    avisos y errores pasan siempre.
+
+    El primer mensaje que pasa tras una supresión indica en suppressed
+    cuántos se descartaron.
+    """
+
+    def __init__(self, rate=LOG_RATE_LIMIT, burst=LOG_RATE_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, suppressed = self._buckets.get(record.name, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[record.name] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[record.name] = (tokens - 1, now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class SuccessSamplingFilter(logging.Filter):
+    """Deja pasar una fracción de los mensajes DEBUG e INFO; los avisos y errores siempre."""
+
+    def __init__(self, rate=LOG_SUCCESS_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return self.rate > 0 and random.random() < self.rate
+
+def truncate(text, limit=LOG_MAX_MESSAGE_LENGTH):
+    """Acorta un texto largo indicando cuántos caracteres se omitieron."""
+    if limit and len(text) > limit:
+        return f"{text[:limit]}... ({len(text) - limit} caracteres más)"
+    return text
+
+def _message(record, limit):
+    # Los argumentos enormes (data_json de varios MB) se acortan antes de formatear
+    if limit and record.args and isinstance(record.args, tuple):
+        args = tuple(truncate(arg, limit) if isinstance(arg, str) else arg for arg in record.args)
+        message = str(record.msg) % args if args else str(record.msg)
+    else:
+        message = record.getMessage()
+    message = truncate(message, limit)
+    if getattr(record, 'suppressed', None):
+        message += f" ({record.suppressed} mensajes suprimidos)"
+    return message
+
+class TextFormatter(logging.Formatter):
+    """Formato de texto de siempre con los mensajes truncados."""
+
+    def __init__(self, limit=LOG_MAX_MESSAGE_LENGTH):
+        super().__init__(TEXT_FORMAT)
+        self.limit = limit
+
+    def format(self, record):
+        record.message = _message(record, self.limit)
+        record.asctime = self.formatTime(record)
+        text = self.formatMessage(record)
+        if record.exc_info:
+            text += "\n" + truncate(self.formatException(record.exc_info), self.limit * 4)
+        return text
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por mensaje, con los campos extra del registro."""
+
+    def __init__(self, service=None, limit=LOG_MAX_MESSAGE_LENGTH):
+        super().__init__()
+        self.service = service
+        self.limit = limit
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": _message(record, self.limit),
+            "thread": record.threadName
+        }
+        if self.service:
+            entry["service"] = self.service
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = truncate(self.formatException(record.exc_info), self.limit * 4)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+def configure_logging(service=None, output=None, level=LOG_LEVEL, log_format=LOG_FORMAT):
+    """
+    Instala el QueueHandler en el logger raíz (una sola vez por proceso).
+
+    Los manejadores previos del logger raíz (logging.basicConfig de otros
+    módulos) se sustituyen; las llamadas posteriores a basicConfig no tienen
+    efecto porque el logger raíz ya tiene un manejador.
+
+    Args:
+        service: Nombre del servicio incluido en cada línea JSON
+        output: Manejador final (por defecto la salida de errores)
+        level: Nivel mínimo
+        log_format: json o text
+
+    Returns:
+        DroppingQueueHandler instalado
+    """
+    global _configured
+    with _configure_lock:
+        if _configured is not None:
+            return _configured
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.setLevel(level)
+
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        handler = DroppingQueueHandler(log_queue)
+        handler.addFilter(SuccessSamplingFilter())
+        handler.addFilter(RateLimitFilter())
+        root.addHandler(handler)
+
+        output = output or logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter(service) if log_format == 'json' else TextFormatter())
+        listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        listener.start()
+        handler.listener = listener
+
+        _configured = handler
+        return handler
+
+def logging_stats():
+    """Registros descartados por la cola llena (para el health check)."""
+    if _configured is None:
+        return {"configured": False}
+    return {"configured": True, "dropped": _configured.dropped, "queued": _configured.queue.qsize()}
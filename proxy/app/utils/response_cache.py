@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Caché de respuestas del proxy para operaciones SOAP de solo lectura
+La aplicación marca las respuestas cacheables (X-SOADB-Cache-TTL y X-SOADB-Role)
+y las escrituras que invalidan datos (X-SOADB-Invalidate). Las peticiones
+idénticas concurrentes se agrupan en una sola llamada a la aplicación.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Configuración de la caché (desactivada por defecto)
+PROXY_CACHE_ENABLED = os.getenv('PROXY_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROXY_CACHE_MAX_ENTRIES = int(os.getenv('PROXY_CACHE_MAX_ENTRIES', '1000'))
+PROXY_CACHE_MAX_BYTES = int(os.getenv('PROXY_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+PROXY_CACHE_MAX_TTL = int(os.getenv('PROXY_CACHE_MAX_TTL', '60'))
+# Tiempo durante el que se recuerda el rol asociado a un token de sesión. Durante
+# ese plazo sus lecturas en caché se sirven sin consultar la aplicación: nunca
+# pasa de la caducidad de la sesión (X-SOADB-Session-Expires), pero una sesión
+# revocada fuera de este proxy sigue leyendo de la caché hasta que vence
+PROXY_CACHE_ROLE_TTL = int(os.getenv('PROXY_CACHE_ROLE_TTL', '5'))
+# Tiempo máximo de espera de una petición agrupada con otra idéntica en curso
+PROXY_COALESCE_TIMEOUT = int(os.getenv('PROXY_COALESCE_TIMEOUT', '300'))
+
+SOAP_BODY_TAG = '{http://schemas.xmlsoap.org/soap/envelope/}Body'
+TOKEN_PARAMETER = 'session_token'
+
+logger = logging.getLogger(__name__)
+
+class CachedResponse:
+    """Respuesta de la aplicación almacenada en la caché."""
+
+    def __init__(self, status, headers, content, expires_at=0, database=None):
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.expires_at = expires_at
+        self.database = database
+
+class RequestSignature:
+    """Operación, parámetros normalizados y token de una petición SOAP."""
+
+    def __init__(self, service, operation, parameters, token):
+        self.service = service
+        self.operation = operation
+        self.parameters = parameters
+        self.token = token
+
+    @property
+    def database(self):
+        """Base de datos afectada con el prefijo del servicio (sql:db, nosql:db)."""
+        return f"{self.service}:{self.parameters.get('database_name') or '*'}"
+
+    @property
+    def streaming(self):
+        """Si se pidió la respuesta en streaming (un cuerpo de un solo uso que no se comparte)."""
+        return (self.parameters.get('streaming') or '').lower() in ('true', '1', 'yes')
+
+def _normalize_value(value):
+    """Normaliza parámetros JSON para que el orden de las claves no cambie la clave de caché."""
+    if value is None:
+        return None
+    value = value.strip()
+    if value[:1] in ('{', '['):
+        try:
+            return json.dumps(json.loads(value), sort_keys=True, separators=(',', ':'))
+        except ValueError:
+            pass
+    return value
+
+def parse_request(body):
+    """
+    Extrae la firma de una petición SOAP.
+
+    Args:
+        body: Sobre SOAP (bytes)
+
+    Returns:
+        RequestSignature o None si el cuerpo no es un sobre SOAP válido
+    """
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError:
+        return None
+
+    soap_body = root.find(f'.//{SOAP_BODY_TAG}')
+    if soap_body is None or len(soap_body) == 0:
+        return None
+
+    operation_element = soap_body[0]
+    if '}' not in operation_element.tag:
+        return None
+    namespace, operation = operation_element.tag[1:].split('}', 1)
+    service = namespace.rstrip('/').rsplit('/', 1)[-1]
+
+    parameters = {}
+    for param in operation_element:
+        name = param.tag.split('}', 1)[-1]
+        if len(param):
+            # Parámetros con elementos anidados (p. ej. xop:Include): no cacheable
+            return None
+        parameters[name] = _normalize_value(param.text)
+
+    token = parameters.pop(TOKEN_PARAMETER, None)
+    return RequestSignature(service, operation, parameters, token)
+
+class ResponseCache:
+    """
+    Caché LRU acotada por número de entradas y bytes, con agrupación de
+    peticiones idénticas concurrentes.
+    """
+
+    def __init__(self, max_entries=PROXY_CACHE_MAX_ENTRIES, max_bytes=PROXY_CACHE_MAX_BYTES,
+                 role_ttl=PROXY_CACHE_ROLE_TTL, max_ttl=PROXY_CACHE_MAX_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.role_ttl = role_ttl
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._roles = {}
+        self._read_only = set()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def role_for(self, token):
+        """Rol aprendido para un token de sesión, o None si no se conoce o caducó."""
+        with self._lock:
+            known = self._roles.get(token)
+            if known is None:
+                return None
+            role, expires_at = known
+            if expires_at < time.monotonic():
+                del self._roles[token]
+                return None
+            return role
+
+    def remember_role(self, token, role, expires_in=None):
+        """
+        Asocia un token con el rol que devolvió la aplicación.
+
+        Args:
+            token: Token de sesión
+            role: Rol de la sesión
+            expires_in: Segundos de vida que le quedan a la sesión (acota role_ttl)
+        """
+        if not token or not role:
+            return
+        ttl = self.role_ttl if expires_in is None else min(self.role_ttl, expires_in)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if len(self._roles) >= self.max_entries * 10:
+                self._roles.clear()
+            self._roles[token] = (role, time.monotonic() + ttl)
+
+    def forget_role(self, token):
+        """Olvida el rol de un token (p. ej. tras un logout)."""
+        with self._lock:
+            self._roles.pop(token, None)
+
+    def learn_read_only(self, service, operation):
+        """Registra una operación que la aplicación marcó como cacheable."""
+        with self._lock:
+            self._read_only.add((service, operation))
+
+    def is_read_only(self, service, operation):
+        """Indica si la operación es de solo lectura (solo estas se agrupan)."""
+        with self._lock:
+            return (service, operation) in self._read_only
+
+    def make_key(self, signature, role, *variants):
+        """
+        Clave de caché: operación, parámetros normalizados sin token, rol del
+        llamante y cabeceras que cambian la representación (Accept, Accept-Encoding).
+        """
+        material = json.dumps(
+            [signature.service, signature.operation, signature.parameters, role, variants],
+            sort_keys=True
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Devuelve una respuesta vigente de la caché o None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry, ttl):
+        """Almacena una respuesta durante ttl segundos (acotado por max_ttl)."""
+        size = len(entry.content)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        entry.expires_at = time.monotonic() + min(ttl, self.max_ttl)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.content)
+
+    def invalidate(self, database):
+        """
+        Elimina las entradas de una base de datos ('servicio:nombre').
+
+        Las entradas sin base de datos concreta ('servicio:*' o listados
+        globales) se eliminan ante cualquier escritura del mismo servicio o de admin.
+        """
+        service, _, name = database.partition(':')
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if self._affected(e.database, service, name)]:
+                self._remove(key)
+
+    @staticmethod
+    def _affected(entry_database, service, name):
+        entry_service, _, entry_name = (entry_database or '*:*').partition(':')
+        if entry_service == 'admin' or entry_service == '*':
+            return True
+        if entry_service != service:
+            return False
+        return name == '*' or entry_name in ('*', name)
+
+    def fetch(self, key, loader):
+        """
+        Obtiene una respuesta agrupando las llamadas concurrentes con la misma clave.
+
+        La primera petición (líder) ejecuta loader(); las demás esperan su
+        resultado en lugar de llamar de nuevo a la aplicación.
+
+        Args:
+            key: Clave de caché
+            loader: Función sin argumentos que devuelve un CachedResponse
+
+        Returns:
+            CachedResponse
+        """
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = {"event": threading.Event(), "response": None, "error": None}
+                self._inflight[key] = flight
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not flight["event"].wait(PROXY_COALESCE_TIMEOUT):
+                return loader()
+            if flight["error"] is not None:
+                raise flight["error"]
+            return flight["response"]
+
+        try:
+            flight["response"] = loader()
+            return flight["response"]
+        except Exception as e:
+            flight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight["event"].set()
+
+    def stats(self):
+        """Estadísticas de la caché para /metrics."""
+        with self._lock:
+            return {
+                "enabled": PROXY_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "known_tokens": len(self._roles)
+            }
+
+# Caché global del proxy
+response_cache = ResponseCache()
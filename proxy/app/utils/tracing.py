@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Trazas distribuidas del proxy
+(copia de app/app/utils/tracing.py sin la instrumentación de MySQL y MongoDB:
+cada imagen contiene solo su directorio)
+Cada petición SOAP es una traza: el proxy abre el span raíz (hijo del
+traceparent del cliente si lo envía), un span por el reenvío a la aplicación
+y le pasa la cabecera W3C traceparent. La decisión de muestreo se toma al
+inicio de la traza (TRACE_SAMPLE_RATE) y la respeta la aplicación a través
+del flag de traceparent; las peticiones no muestreadas solo generan los
+identificadores.
+
+Las trazas terminadas se entregan a un hilo que las pasa al exportador
+configurado en TRACE_EXPORTER: memory (últimos spans en memoria), file
+(líneas JSON con el formato OTLP/JSON, legibles sin conexión o por el
+receptor de ficheros de un OpenTelemetry Collector) o none.
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+# Fracción de las trazas iniciadas en este servicio que se registran
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.01'))
+# memory, file o none
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'memory').lower()
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+# Spans que conserva el exportador en memoria
+TRACE_MEMORY_CAPACITY = int(os.getenv('TRACE_MEMORY_CAPACITY', '2000'))
+# Trazas pendientes de exportar; si la cola está llena se descartan
+TRACE_QUEUE_SIZE = int(os.getenv('TRACE_QUEUE_SIZE', '1000'))
+# Longitud máxima de los mensajes de error guardados en los spans
+TRACE_STATEMENT_LENGTH = int(os.getenv('TRACE_STATEMENT_LENGTH', '500'))
+
+TRACEPARENT_HEADER = 'traceparent'
+
+# Códigos de estado de OTLP
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+logger = logging.getLogger(__name__)
+
+# Span en curso (se copia a los hilos de trabajo con contextvars.copy_context)
+_current_span = contextvars.ContextVar('soadb_current_span', default=None)
+# Span raíz de la petición en curso
+_root_span = contextvars.ContextVar('soadb_root_span', default=None)
+
+def parse_traceparent(value):
+    """
+    Interpreta una cabecera traceparent (versión 00).
+
+    Returns:
+        Tupla (trace_id, parent_id, sampled) o None si no es válida
+    """
+    if not value:
+        return None
+    parts = value.strip().lower().split('-')
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == 'ff':
+        return None
+    trace_id, parent_id, flags = parts[1], parts[2], parts[3]
+    try:
+        if len(trace_id) != 32 or len(parent_id) != 16 or len(flags) != 2 \
+                or int(trace_id, 16) == 0 or int(parent_id, 16) == 0:
+            return None
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    return trace_id, parent_id, sampled
+
+def format_traceparent(trace_id, span_id, sampled):
+    return f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}"
+
+def _new_id(bits):
+    return f"{random.getrandbits(bits) or 1:0{bits // 4}x}"
+
+class Span:
+    """Operación con tiempo de inicio y fin dentro de una traza."""
+
+    __slots__ = ('trace', 'name', 'kind', 'trace_id', 'span_id', 'parent_id', 'sampled',
+                 'start_ns', 'end_ns', 'attributes', 'status', 'status_message')
+
+    def __init__(self, trace, name, trace_id, parent_id, sampled, kind='internal', attributes=None, start_ns=None):
+        self.trace = trace
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.status = STATUS_UNSET
+        self.status_message = None
+
+    def set_attribute(self, key, value):
+        if self.sampled:
+            self.attributes[key] = value
+
+    def set_error(self, error):
+        self.status = STATUS_ERROR
+        self.status_message = str(error)[:TRACE_STATEMENT_LENGTH]
+
+    def traceparent(self):
+        return format_traceparent(self.trace_id, self.span_id, self.sampled)
+
+    def end(self, end_ns=None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = end_ns or time.time_ns()
+        if self.sampled:
+            self.trace.append(self)
+
+    def duration_ms(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms(), 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            "status_message": self.status_message
+        }
+
+class InMemoryExporter:
+    """Conserva los últimos spans exportados (consultables en /traces)."""
+
+    def __init__(self, capacity=TRACE_MEMORY_CAPACITY):
+        self._spans = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def export(self, service, spans):
+        with self._lock:
+            self._spans.extend(span.to_dict() for span in spans)
+
+    def spans(self, trace_id=None):
+        with self._lock:
+            spans = list(self._spans)
+        return [span for span in spans if trace_id is None or span["trace_id"] == trace_id]
+
+    def traces(self, limit=None):
+        """Spans agrupados por traza, de la más reciente a la más antigua."""
+        grouped = {}
+        for span in self.spans():
+            grouped.setdefault(span["trace_id"], []).append(span)
+        traces = [{"trace_id": trace_id, "spans": spans} for trace_id, spans in grouped.items()]
+        traces.reverse()
+        return traces[:limit] if limit else traces
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+_OTLP_KINDS = {'internal': 1, 'server': 2, 'client': 3}
+
+class FileExporter:
+    """
+    Añade una línea JSON por lote con el formato OTLP/JSON (ExportTraceServiceRequest).
+
+    No necesita red: el fichero puede enviarse más tarde a un collector.
+    """
+
+    def __init__(self, path=TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, service, spans):
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+            "scopeSpans": [{
+                "scope": {"name": "soadb"},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id or "",
+                    "name": span.name,
+                    "kind": _OTLP_KINDS.get(span.kind, 1),
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+                    "status": {"code": span.status, **({"message": span.status_message} if span.status_message else {})}
+                } for span in spans]
+            }]
+        }]}
+        line = json.dumps(request, default=str, ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as output:
+            output.write(line + "\n")
+
+def make_exporter(name=TRACE_EXPORTER):
+    """Exportador configurado en TRACE_EXPORTER (None para no exportar)."""
+    if name == 'memory':
+        return InMemoryExporter()
+    if name == 'file':
+        return FileExporter()
+    if name != 'none':
+        logger.warning("Exportador de trazas desconocido: %s", name)
+    return None
+
+class Tracer:
+    """Trazas de un servicio con muestreo en cabecera y exportación en segundo plano."""
+
+    def __init__(self, service, exporter=None, sample_rate=TRACE_SAMPLE_RATE, enabled=TRACING_ENABLED,
+                 queue_size=TRACE_QUEUE_SIZE):
+        self.service = service
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.enabled = enabled and exporter is not None
+        self.started = 0
+        self.sampled = 0
+        self.exported = 0
+        self.dropped = 0
+        self._queue = queue.Queue(queue_size)
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def should_sample(self):
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def start_trace(self, name, traceparent=None, attributes=None, start_ns=None):
+        """
+        Abre el span raíz de una petición y lo deja como span en curso.
+
+        Si llega un traceparent válido el span es hijo del remoto y hereda su
+        decisión de muestreo; si no, se decide aquí con sample_rate.
+
+        Returns:
+            Span (también los no muestreados, para propagar el traceparent) o None si está desactivado
+        """
+        if not self.enabled:
+            return None
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = _new_id(128), None, self.should_sample()
+        self.started += 1
+        if sampled:
+            self.sampled += 1
+        span = Span([], name, trace_id, parent_id, sampled, 'server', attributes if sampled else None, start_ns)
+        _root_span.set(span)
+        _current_span.set(span)
+        return span
+
+    def end_trace(self, status_code=None, error=None):
+        """Cierra el span raíz en curso y encola la traza para exportarla."""
+        span = _root_span.get()
+        if span is None:
+            return
+        _root_span.set(None)
+        _current_span.set(None)
+        if status_code is not None:
+            span.set_attribute('http.status_code', status_code)
+            if status_code >= 500 and span.status == STATUS_UNSET:
+                span.set_error(error or f"HTTP {status_code}")
+        elif error is not None:
+            span.set_error(error)
+        span.end()
+        if span.sampled:
+            # Copia: los spans que terminen después (respuestas en streaming) no se exportan
+            self._submit(list(span.trace))
+
+    def _submit(self, spans):
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._export_loop, name='trace-exporter', daemon=True)
+                    self._worker.start()
+
+    def _export_loop(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                self.exporter.export(self.service, spans)
+                self.exported += len(spans)
+            except Exception as e:
+                logger.warning("No se pudieron exportar %d spans: %s", len(spans), e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Espera a que se exporten las trazas encoladas."""
+        self._queue.join()
+
+    @contextmanager
+    def span(self, name, kind='internal', **attributes):
+        """
+        Mide un bloque como hijo del span en curso.
+
+        Fuera de una traza muestreada no hace nada (devuelve None).
+        """
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            yield None
+            return
+        span = self.start_span(name, kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def start_span(self, name, kind='internal', attributes=None):
+        """
+        Crea un span hijo del span en curso sin activarlo (para callbacks de inicio y fin).
+
+        Returns:
+            Span o None fuera de una traza muestreada
+        """
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            return None
+        return Span(parent.trace, name, parent.trace_id, parent.span_id, True, kind, attributes)
+
+    def stats(self):
+        """Contadores para el health check."""
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "exporter": type(self.exporter).__name__ if self.exporter else None,
+            "traces": self.started,
+            "sampled": self.sampled,
+            "exported_spans": self.exported,
+            "dropped_traces": self.dropped
+        }
+
+def current_span():
+    """Span en curso en el contexto actual (o None)."""
+    return _current_span.get()
+
+def inject(headers):
+    """Añade el traceparent del span en curso a las cabeceras de una petición saliente."""
+    span = _current_span.get()
+    if span is not None:
+        headers[TRACEPARENT_HEADER] = span.traceparent()
+    return headers
+
+# Trazas del proxy
+tracer = Tracer('soadb-proxy', make_exporter())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmarks de las funciones por las que pasa cada petición
+
+Mide extract_soap_body, create_soap_response y create_wsdl de soap_service,
+la serialización de filas de sql_select y sql_join (RowSerializer) con
+10.000 filas y la comprobación de IPs del proxy con una lista de 2.000 redes.
+Cada caso se calibra para que una ronda dure al menos --min-time segundos y
+se repite --rounds veces; se informa del mejor tiempo por llamada.
+
+Los casos del proxy se ejecutan en un subproceso porque el proxy y la
+aplicación tienen cada uno su propio paquete utils.
+
+--save-baseline guarda los resultados como línea base y --compare los
+compara con una línea base guardada: el programa termina con código 1 si
+algún caso pierde más de --threshold (por defecto 20 %) de rendimiento. Las
+líneas base dependen de la máquina; compárese siempre en la misma.
+
+Uso:
+    python test/bench_hotpaths.py [--filter serialize] [--rounds 5] [--min-time 0.2]
+    python test/bench_hotpaths.py --save-baseline
+    python test/bench_hotpaths.py --compare [--threshold 0.2]
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import datetime
+import statistics
+import subprocess
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(TEST_DIR, '..', 'app', 'app')
+PROXY_DIR = os.path.join(TEST_DIR, '..', 'proxy', 'app')
+DEFAULT_BASELINE = os.path.join(TEST_DIR, '.benchmarks', 'hotpaths.json')
+
+RESULT_ROWS = 10000
+WHITELIST_NETWORKS = 2000
+
+def soap_envelope(operation, parameters):
+    body = "".join(f"<{name}>{value}</{name}>" for name, value in parameters.items())
+    return (f'<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" '
+            f'xmlns:sql="http://services.soadb.example.com/sql"><soapenv:Header/><soapenv:Body>'
+            f'<sql:{operation}>{body}</sql:{operation}></soapenv:Body></soapenv:Envelope>').encode('utf-8')
+
+def join_description():
+    """Columnas de alumnos más las de cursos, como en un join."""
+    from bench_serializer import DESCRIPTION
+    from mysql.connector.constants import FieldType
+    return DESCRIPTION + [
+        ('curso_id', FieldType.LONG, None, None, None, None, 0, 0),
+        ('curso', FieldType.VAR_STRING, None, None, None, None, 0, 0),
+        ('creditos', FieldType.TINY, None, None, None, None, 1, 0)
+    ]
+
+def app_cases():
+    """Casos de la aplicación: nombre -> (función sin argumentos, elementos por llamada)."""
+    sys.path.append(APP_DIR)
+    sys.path.append(TEST_DIR)
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    from soap_service import extract_soap_body, create_soap_response, create_wsdl
+    from utils.serializer import RowSerializer
+    from bench_serializer import DESCRIPTION, make_rows
+
+    select_rows = make_rows(RESULT_ROWS)
+    join_rows = [row + (row[0] % 20, f"Curso {row[0] % 20}", 6) for row in select_rows]
+    join_columns = join_description()
+
+    small_envelope = soap_envelope('select', {
+        "session_token": "42d08295-1611-4d6f-9a6c-e6676e429599", "database_name": "escuela",
+        "table_name": "alumnos", "fields": "*", "where_json": '{"curso": 3}'
+    })
+    data_json = json.dumps([{"nombre": f"Estudiante {i}", "email": f"e{i}@example.com", "promedio": 8.5}
+                            for i in range(RESULT_ROWS)])
+    large_envelope = soap_envelope('insert', {
+        "session_token": "42d08295-1611-4d6f-9a6c-e6676e429599", "database_name": "escuela",
+        "table_name": "alumnos", "data_json": data_json.replace('&', '&amp;').replace('<', '&lt;')
+    })
+
+    small_result = json.dumps({"success": True, "message": "Se insertaron 1 registros en la tabla 'alumnos'"})
+    large_result, _ = RowSerializer(DESCRIPTION).dumps_rows(select_rows)
+
+    return {
+        "extract_soap_body_small": (lambda: extract_soap_body(small_envelope), 1),
+        "extract_soap_body_large": (lambda: extract_soap_body(large_envelope), 1),
+        "create_soap_response_small": (lambda: create_soap_response('sql', 'insert', small_result), 1),
+        "create_soap_response_large": (lambda: create_soap_response('sql', 'select', large_result), 1),
+        "create_wsdl_sql": (lambda: create_wsdl('sql'), 1),
+        "create_wsdl_nosql": (lambda: create_wsdl('nosql'), 1),
+        "serialize_select_objects": (lambda: RowSerializer(DESCRIPTION).dumps_rows(select_rows, 'objects'), RESULT_ROWS),
+        "serialize_select_rows": (lambda: RowSerializer(DESCRIPTION).dumps_rows(select_rows, 'rows'), RESULT_ROWS),
+        "serialize_join_objects": (lambda: RowSerializer(join_columns).dumps_rows(join_rows, 'objects'), RESULT_ROWS)
+    }
+
+def proxy_cases():
+    """Casos del proxy (en su propio proceso)."""
+    networks = [f"10.{i // 250}.{i % 250}.0/24" for i in range(WHITELIST_NETWORKS)]
+    os.environ['ALLOWED_IPS'] = ",".join(networks + ["127.0.0.1"])
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    sys.path.append(PROXY_DIR)
+    import ipaddress
+    import simple_proxy
+
+    def whitelist_match(ip):
+        # Comprobación de la lista blanca que is_ip_allowed tiene desactivada
+        client_ip = ipaddress.ip_address(ip)
+        return any(client_ip in network for network in simple_proxy.allowed_ip_networks)
+
+    return {
+        "is_ip_allowed": (lambda: simple_proxy.is_ip_allowed("192.168.1.20"), 1),
+        "ip_whitelist_hit_first": (lambda: whitelist_match("10.0.0.20"), 1),
+        "ip_whitelist_miss": (lambda: whitelist_match("192.168.1.20"), 1)
+    }
+
+SIDES = {'app': app_cases, 'proxy': proxy_cases}
+
+def measure(name, func, items, rounds, min_time):
+    """
+    Calibra el número de llamadas por ronda y mide varias rondas.
+
+    Returns:
+        Resultado con el mejor tiempo y la mediana por llamada
+    """
+    func()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 24:
+            break
+        number *= 2
+
+    timings = [elapsed / number]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    best = min(timings)
+    return {
+        "name": name,
+        "calls_per_round": number,
+        "rounds": rounds,
+        "best_us": round(best * 1e6, 3),
+        "median_us": round(statistics.median(timings) * 1e6, 3),
+        "ops_per_second": round(1 / best, 1),
+        "items_per_second": round(items / best, 1)
+    }
+
+def run_side(side, name_filter, rounds, min_time):
+    cases = SIDES[side]()
+    return [
+        dict(measure(name, func, items, rounds, min_time), side=side)
+        for name, (func, items) in cases.items()
+        if not name_filter or name_filter in name
+    ]
+
+def run_proxy_subprocess(name_filter, rounds, min_time):
+    command = [sys.executable, os.path.abspath(__file__), '--side', 'proxy', '--raw',
+               '--rounds', str(rounds), '--min-time', str(min_time)]
+    if name_filter:
+        command += ['--filter', name_filter]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+def compare(results, baseline, threshold):
+    """
+    Compara el rendimiento (llamadas por segundo) con la línea base.
+
+    Returns:
+        Tupla (comparaciones, nombres de los casos que empeoran más que threshold)
+    """
+    previous = baseline.get("results", {})
+    comparisons = []
+    regressions = []
+    for result in results:
+        base = previous.get(result["name"])
+        if base is None:
+            continue
+        change = result["ops_per_second"] / base["ops_per_second"] - 1
+        regressed = change < -threshold
+        comparisons.append({
+            "name": result["name"],
+            "baseline_ops_per_second": base["ops_per_second"],
+            "ops_per_second": result["ops_per_second"],
+            "change": round(change, 4),
+            "regressed": regressed
+        })
+        if regressed:
+            regressions.append(result["name"])
+    return comparisons, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', default='', help="Solo los casos cuyo nombre contiene este texto")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help="Duración mínima de cada ronda en segundos")
+    parser.add_argument('--side', choices=('all', 'app', 'proxy'), default='all')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, help="Guarda los resultados como línea base")
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, help="Compara con una línea base guardada")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Pérdida de rendimiento admitida (0.2 = 20 %%)")
+    parser.add_argument('--raw', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    results = []
+    if args.side in ('all', 'app'):
+        results += run_side('app', args.filter, args.rounds, args.min_time)
+    if args.side == 'proxy' and args.raw:
+        results += run_side('proxy', args.filter, args.rounds, args.min_time)
+    elif args.side in ('all', 'proxy'):
+        results += run_proxy_subprocess(args.filter, args.rounds, args.min_time)
+
+    if args.raw:
+        print(json.dumps(results))
+        return 0
+
+    report = {"machine": machine_info(), "results": results}
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as source:
+            baseline = json.load(source)
+        comparisons, regressions = compare(results, baseline, args.threshold)
+        report["comparison"] = {
+            "baseline": args.compare,
+            "baseline_created": baseline.get("created"),
+            "same_machine": baseline.get("machine") == report["machine"],
+            "threshold": args.threshold,
+            "cases": comparisons,
+            "regressions": regressions
+        }
+        status = 1 if regressions else 0
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w', encoding='utf-8') as target:
+            json.dump({
+                "created": datetime.datetime.now().isoformat(timespec='seconds'),
+                "machine": report["machine"],
+                "results": {result["name"]: result for result in results}
+            }, target, indent=2)
+
+    print(json.dumps(report, indent=2))
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
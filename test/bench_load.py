@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de carga de /soap a través del proxy y directamente contra la aplicación
+
+Cada trabajador envía peticiones de una mezcla de operaciones y espera la
+respuesta antes de la siguiente (concurrencia fija). El resultado es un JSON
+con las peticiones por segundo, las latencias p50/p95/p99 y la tasa de
+errores por destino (proxy, app) y por operación.
+
+Con --local la aplicación se arranca en este proceso con MySQL y MongoDB
+sustituidos por test/standins.py (SQLite y colecciones en memoria) y el proxy
+en un subproceso que le reenvía las peticiones. Sin --local se usan las URLs
+indicadas (por ejemplo la pila de docker-compose) con un token válido y una
+tabla y una colección existentes; --seed-data las llena antes de medir.
+
+Operaciones de la mezcla: select, insert, findDocument, insertDocument y
+listAll (sin base de datos).
+
+Uso:
+    python test/bench_load.py --local [--target both] [--concurrency 8] [--duration 10]
+        [--mix select=40,findDocument=40,insert=10,insertDocument=10] [--rows 1000] [--payload-rows 10]
+    python test/bench_load.py --proxy-url http://localhost:8000/soap --app-url http://localhost:8080/soap
+        --token TOKEN --database bench --table alumnos --collection notas --seed-data [--output carga.json]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import argparse
+import threading
+import subprocess
+from xml.sax.saxutils import escape
+import requests
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(TEST_DIR, '..', 'app', 'app')
+PROXY_DIR = os.path.join(TEST_DIR, '..', 'proxy', 'app')
+
+NAMESPACES = {
+    'sql': 'http://services.soadb.example.com/sql',
+    'nosql': 'http://services.soadb.example.com/nosql',
+    'admin': 'http://services.soadb.example.com/admin'
+}
+
+DEFAULT_MIX = 'select=40,findDocument=40,insert=10,insertDocument=10'
+LOCAL_TOKEN = 'bench-token'
+
+def envelope(service, operation, parameters):
+    """Sobre SOAP con los parámetros sin calificar, como los de test1.py."""
+    body = "".join(f"<{name}>{escape(str(value))}</{name}>" for name, value in parameters.items())
+    return (f'<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" '
+            f'xmlns:op="{NAMESPACES[service]}"><soapenv:Body><op:{operation}>{body}</op:{operation}>'
+            f'</soapenv:Body></soapenv:Envelope>').encode('utf-8')
+
+def make_rows(count, rng):
+    return [{
+        "nombre": f"Estudiante {rng.randrange(1000000)}",
+        "email": f"estudiante{rng.randrange(1000000)}@example.com",
+        "curso": rng.randrange(1, 11),
+        "promedio": round(rng.uniform(5, 10), 2)
+    } for _ in range(count)]
+
+# Operación -> función (args, rng) que devuelve (servicio, operación, parámetros)
+OPERATIONS = {
+    'select': lambda args, rng: ('sql', 'select', {
+        "session_token": args.token, "database_name": args.database, "table_name": args.table
+    }),
+    'insert': lambda args, rng: ('sql', 'insert', {
+        "session_token": args.token, "database_name": args.database, "table_name": args.table,
+        "data_json": json.dumps(make_rows(args.payload_rows, rng))
+    }),
+    'findDocument': lambda args, rng: ('nosql', 'findDocument', {
+        "session_token": args.token, "database_name": args.database, "collection_name": args.collection,
+        "filter_json": json.dumps({"curso": rng.randrange(1, 11)}), "limit": args.page_size
+    }),
+    'insertDocument': lambda args, rng: ('nosql', 'insertDocument', {
+        "session_token": args.token, "database_name": args.database, "collection_name": args.collection,
+        "documents_json": json.dumps(make_rows(args.payload_rows, rng))
+    }),
+    'listAll': lambda args, rng: ('admin', 'listAll', {})
+}
+
+def parse_mix(text):
+    """Convierte "select=40,insert=10" en [(operación, peso)]."""
+    mix = []
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Operación desconocida en --mix: {name} (disponibles: {', '.join(OPERATIONS)})")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+def is_error(status, body):
+    # El resultado JSON de la operación va como texto del elemento de respuesta
+    return status != 200 or b'{"error"' in body[:4096] or b'{&quot;error&quot;' in body[:4096]
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano de una lista ordenada."""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+def summarize(samples, elapsed):
+    """
+    Resume las muestras (operación, latencia en segundos, error) de un destino.
+    """
+    latencies = sorted(latency * 1000 for _, latency, _ in samples)
+    errors = sum(1 for _, _, failed in samples if failed)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0,
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) or 0, 3),
+            "p95": round(percentile(latencies, 0.95) or 0, 3),
+            "p99": round(percentile(latencies, 0.99) or 0, 3),
+            "max": round(latencies[-1], 3) if latencies else 0,
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0
+        }
+    }
+
+def run_load(url, args, mix):
+    """
+    Ejecuta la carga contra una URL de /soap.
+
+    Returns:
+        Resumen global y por operación
+    """
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    samples = []
+    samples_lock = threading.Lock()
+    start_barrier = threading.Barrier(args.concurrency + 1)
+    state = {}
+
+    def worker(number):
+        rng = random.Random(args.seed * 1000 + number)
+        session = requests.Session()
+        headers = {"Content-Type": "text/xml; charset=utf-8", "Accept-Encoding": "identity"}
+        local = []
+        start_barrier.wait()
+        while True:
+            now = time.perf_counter()
+            if now >= state['end'] or (args.requests and state['sent'] >= args.requests):
+                break
+            state['sent'] += 1
+            name = rng.choices(names, weights)[0]
+            service, operation, parameters = OPERATIONS[name](args, rng)
+            body = envelope(service, operation, parameters)
+            started = time.perf_counter()
+            try:
+                response = session.post(url, data=body, headers=dict(headers, SOAPAction=operation), timeout=args.timeout)
+                failed = is_error(response.status_code, response.content)
+            except requests.RequestException:
+                failed = True
+            finished = time.perf_counter()
+            if started >= state['measure_from']:
+                local.append((name, finished - started, failed))
+        session.close()
+        with samples_lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(number,), daemon=True) for number in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    state['sent'] = 0
+    state['measure_from'] = time.perf_counter() + args.warmup
+    state['end'] = state['measure_from'] + args.duration
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - state['measure_from']
+
+    result = summarize(samples, elapsed)
+    result["operations"] = {
+        name: summarize([sample for sample in samples if sample[0] == name], elapsed)
+        for name in names
+    }
+    return result
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+def start_local_app(args):
+    """
+    Arranca la aplicación en un hilo de este proceso con los sustitutos de las bases de datos.
+
+    Returns:
+        URL de /soap y servidor (para detenerlo)
+    """
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    sys.path.append(APP_DIR)
+    sys.path.append(TEST_DIR)
+    import logging
+    import standins
+    import soap_service
+    from werkzeug.serving import make_server
+
+    # Sin una línea de log por petición del servidor de desarrollo
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    standins.install(soap_service)
+    standins.create_sessions(soap_service.MYSQL_DATABASE, {args.token: 'admin'})
+    standins.execute(args.database, f"CREATE TABLE IF NOT EXISTS `{args.table}` (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                                     "nombre TEXT, email TEXT, curso INTEGER, promedio REAL)")
+    rng = random.Random(args.seed)
+    for row in make_rows(args.rows, rng):
+        standins.execute(args.database, f"INSERT INTO `{args.table}` (nombre, email, curso, promedio) VALUES (%s, %s, %s, %s)",
+                         (row["nombre"], row["email"], row["curso"], row["promedio"]))
+    standins.MongoClient()[args.database][args.collection].insert_many(make_rows(args.rows, rng))
+
+    server = make_server('127.0.0.1', free_port(), soap_service.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-app', daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/soap", server
+
+def start_local_proxy(app_url):
+    """
+    Arranca el proxy en un subproceso que reenvía a la aplicación local.
+
+    Returns:
+        URL de /soap del proxy y el proceso
+    """
+    app_port = app_url.split(':')[2].split('/')[0]
+    port = free_port()
+    env = dict(os.environ, APP_HOST='127.0.0.1', APP_PORT=app_port, PROXY_HOST='127.0.0.1', PROXY_PORT=str(port),
+               ALLOWED_IPS='127.0.0.1', LOG_LEVEL='WARNING')
+    process = subprocess.Popen([sys.executable, 'new_main.py'], cwd=PROXY_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return f"http://127.0.0.1:{port}/soap", process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("El proxy local no arrancó")
+
+def seed_remote(url, args):
+    """Llena la tabla y la colección de una pila real a través de insert e insertDocument."""
+    rng = random.Random(args.seed)
+    for start in range(0, args.rows, 500):
+        count = min(500, args.rows - start)
+        for service, operation, field, target in (('sql', 'insert', 'data_json', ('table_name', args.table)),
+                                                  ('nosql', 'insertDocument', 'documents_json', ('collection_name', args.collection))):
+            body = envelope(service, operation, {
+                "session_token": args.token, "database_name": args.database, target[0]: target[1],
+                field: json.dumps(make_rows(count, rng))
+            })
+            response = requests.post(url, data=body, headers={"Content-Type": "text/xml; charset=utf-8"}, timeout=args.timeout)
+            if is_error(response.status_code, response.content):
+                raise RuntimeError(f"No se pudo preparar {operation}: {response.content[:500]!r}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--local', action='store_true', help="Aplicación y proxy locales con bases de datos sustituidas")
+    parser.add_argument('--target', choices=('proxy', 'app', 'both'), default='both')
+    parser.add_argument('--proxy-url', default='http://localhost:8000/soap')
+    parser.add_argument('--app-url', default='http://localhost:8080/soap')
+    parser.add_argument('--token', default=LOCAL_TOKEN)
+    parser.add_argument('--database', default='bench')
+    parser.add_argument('--table', default='alumnos')
+    parser.add_argument('--collection', default='notas')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help="Segundos medidos por destino")
+    parser.add_argument('--warmup', type=float, default=1, help="Segundos iniciales sin medir")
+    parser.add_argument('--requests', type=int, default=0, help="Máximo de peticiones por destino, incluidas las de calentamiento (0 sin límite)")
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--rows', type=int, default=1000, help="Filas y documentos iniciales")
+    parser.add_argument('--payload-rows', type=int, default=10, help="Filas o documentos por inserción")
+    parser.add_argument('--page-size', type=int, default=100, help="limit de findDocument")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--seed-data', action='store_true', help="Sin --local: llena la tabla y la colección")
+    parser.add_argument('--output', help="Fichero donde guardar el JSON")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    server = proxy_process = None
+    try:
+        if args.local:
+            args.app_url, server = start_local_app(args)
+            if args.target != 'app':
+                args.proxy_url, proxy_process = start_local_proxy(args.app_url)
+        elif args.seed_data:
+            seed_remote(args.app_url if args.target == 'app' else args.proxy_url, args)
+
+        targets = {}
+        for target in (('app', 'proxy') if args.target == 'both' else (args.target,)):
+            targets[target] = run_load(args.app_url if target == 'app' else args.proxy_url, args, mix)
+    finally:
+        if proxy_process is not None:
+            proxy_process.terminate()
+            proxy_process.wait(10)
+        if server is not None:
+            server.shutdown()
+
+    report = {
+        "config": {
+            "local": args.local,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "mix": dict(mix),
+            "rows": args.rows,
+            "payload_rows": args.payload_rows,
+            "page_size": args.page_size
+        },
+        "targets": targets
+    }
+    if 'app' in targets and 'proxy' in targets:
+        report["proxy_overhead_ms"] = {
+            key: round(targets['proxy']["latency_ms"][key] - targets['app']["latency_ms"][key], 3)
+            for key in ('p50', 'p95', 'p99')
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as target_file:
+            target_file.write(output + "\n")
+    print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark del coste del logging por petición
+
+Compara, en el hilo que atiende la petición, el logging anterior
+(logging.basicConfig con un StreamHandler síncrono y un f-string con todos
+los parámetros, incluido un data_json de varios MB) con el de
+utils/log_setup.py (QueueHandler, argumentos sin formatear, truncado y
+límite por logger en el hilo del listener) y con el mensaje actual de
+handle_soap (nivel DEBUG, sin parámetros).
+
+Uso:
+    python test/bench_logging.py [--requests 200] [--payload-mb 2] [--repeat 3]
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import logging
+import logging.handlers
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.log_setup import (TEXT_FORMAT, DroppingQueueHandler, RateLimitFilter, SuccessSamplingFilter,
+                             JsonFormatter)
+
+def make_parameters(payload_mb):
+    """Parámetros de una inserción masiva con un data_json del tamaño indicado."""
+    row = {"nombre": "Estudiante", "email": "estudiante@example.com", "promedio": 8.5}
+    count = int(payload_mb * 1024 * 1024 / len(json.dumps(row)))
+    return {
+        "session_token": "0" * 64,
+        "database_name": "escuela",
+        "table_name": "alumnos",
+        "data_json": json.dumps([row] * count)
+    }
+
+def legacy_logger():
+    """Logger con el StreamHandler síncrono de logging.basicConfig."""
+    logger = logging.getLogger('bench.legacy')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    output = logging.StreamHandler(open(os.devnull, 'w'))
+    output.setFormatter(logging.Formatter(TEXT_FORMAT))
+    logger.addHandler(output)
+    return logger, None
+
+def queue_logger(name, rate_limit):
+    """Logger con la cola y el listener de configure_logging."""
+    logger = logging.getLogger(f'bench.{name}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    log_queue = queue.Queue(100000)
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(SuccessSamplingFilter(rate=1))
+    handler.addFilter(RateLimitFilter(rate=rate_limit))
+    logger.addHandler(handler)
+    output = logging.StreamHandler(open(os.devnull, 'w'))
+    output.setFormatter(JsonFormatter('app'))
+    listener = logging.handlers.QueueListener(log_queue, output)
+    listener.start()
+    return logger, listener
+
+def legacy_call(logger, parameters):
+    logger.info(f"Solicitud SOAP - Servicio: sql, Operación: insert, Parámetros: {parameters}")
+
+def lazy_call(logger, parameters):
+    logger.info("Solicitud SOAP - Servicio: %s, Operación: %s, Datos: %s", 'sql', 'insert', parameters['data_json'])
+
+def current_call(logger, parameters):
+    logger.debug("Solicitud SOAP - Servicio: %s, Operación: %s", 'sql', 'insert')
+
+def measure(label, factory, call, parameters, requests, repeat):
+    timings = []
+    drain = 0
+    for _ in range(repeat):
+        logger, listener = factory()
+        start = time.perf_counter()
+        for _ in range(requests):
+            call(logger, parameters)
+        timings.append(time.perf_counter() - start)
+        if listener is not None:
+            # Tiempo que tarda el hilo del listener en escribir lo pendiente
+            start = time.perf_counter()
+            listener.stop()
+            drain = time.perf_counter() - start
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+    best = min(timings)
+    return {
+        "name": label,
+        "best_seconds": round(best, 4),
+        "us_per_request": round(best / requests * 1e6, 2),
+        "listener_drain_seconds": round(drain, 4)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--payload-mb', type=float, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    parameters = make_parameters(args.payload_mb)
+    results = [
+        measure("legacy_basicconfig_fstring", legacy_logger, legacy_call, parameters, args.requests, args.repeat),
+        measure("queue_lazy_truncated", lambda: queue_logger('lazy', 0), lazy_call, parameters,
+                args.requests, args.repeat),
+        measure("queue_lazy_rate_limited", lambda: queue_logger('limited', 50), lazy_call, parameters,
+                args.requests, args.repeat),
+        measure("current_handle_soap", lambda: queue_logger('current', 50), current_call, parameters,
+                args.requests, args.repeat)
+    ]
+
+    baseline = results[0]["us_per_request"]
+    for result in results:
+        result["speedup"] = round(baseline / max(result["us_per_request"], 0.01), 1)
+
+    print(json.dumps({"requests": args.requests, "payload_bytes": len(parameters["data_json"]),
+                      "results": results}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la serialización de resultados de select/join/aggregate
+
+Compara el bucle anterior (cursor de diccionario + isinstance por valor +
+json.dumps) con RowSerializer sobre filas con columnas INT, VARCHAR, DATE,
+DATETIME y DECIMAL.
+
+Uso:
+    python test/bench_serializer.py [--rows 1000000] [--repeat 3]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import decimal
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from mysql.connector.constants import FieldType
+from utils.serializer import RowSerializer, orjson
+
+DESCRIPTION = [
+    ('id', FieldType.LONG, None, None, None, None, 0, 0),
+    ('nombre', FieldType.VAR_STRING, None, None, None, None, 0, 0),
+    ('email', FieldType.VAR_STRING, None, None, None, None, 1, 0),
+    ('fecha_ingreso', FieldType.DATE, None, None, None, None, 1, 0),
+    ('actualizado', FieldType.DATETIME, None, None, None, None, 1, 0),
+    ('promedio', FieldType.NEWDECIMAL, None, None, None, None, 1, 0),
+    ('saldo', FieldType.NEWDECIMAL, None, None, None, None, 1, 0),
+    ('activo', FieldType.TINY, None, None, None, None, 1, 0)
+]
+
+def make_rows(count):
+    """Genera filas con la forma que devuelve mysql.connector."""
+    base_date = datetime.date(2020, 1, 1)
+    base_datetime = datetime.datetime(2024, 5, 17, 10, 30, 0)
+    rows = []
+    for i in range(count):
+        rows.append((
+            i,
+            f"Estudiante {i}",
+            f"estudiante{i}@example.com" if i % 10 else None,
+            base_date + datetime.timedelta(days=i % 1000),
+            base_datetime + datetime.timedelta(seconds=i),
+            decimal.Decimal(f"{i % 10}.{i % 100:02d}"),
+            decimal.Decimal(f"{i}.1234"),
+            i % 2
+        ))
+    return rows
+
+def legacy_serialize(rows):
+    """Bucle anterior de sql_select (con default=str para admitir DECIMAL)."""
+    columns = [c[0] for c in DESCRIPTION]
+    serializable_results = []
+    for raw in rows:
+        row = dict(zip(columns, raw))
+        serializable_row = {}
+        for key, value in row.items():
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                serializable_row[key] = value.isoformat()
+            elif isinstance(value, (bytes, bytearray)):
+                serializable_row[key] = value.hex()
+            else:
+                serializable_row[key] = value
+        serializable_results.append(serializable_row)
+    return json.dumps({"data": serializable_results}, default=str)
+
+def measure(label, func, rows, repeat):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func(rows)
+        timings.append(time.perf_counter() - start)
+        size = len(output)
+    best = min(timings)
+    return {
+        "name": label,
+        "best_seconds": round(best, 4),
+        "rows_per_second": int(len(rows) / best),
+        "output_bytes": size
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    results = [
+        measure("legacy_loop", legacy_serialize, rows, args.repeat),
+        measure("row_serializer", lambda r: RowSerializer(DESCRIPTION, use_orjson=False).dumps_rows(r)[0],
+                rows, args.repeat)
+    ]
+    if orjson is not None and hasattr(orjson, 'Fragment'):
+        results.append(measure("row_serializer_orjson",
+                               lambda r: RowSerializer(DESCRIPTION, use_orjson=True).dumps_rows(r)[0],
+                               rows, args.repeat))
+
+    baseline = results[0]["best_seconds"]
+    for result in results:
+        result["speedup"] = round(baseline / result["best_seconds"], 2)
+
+    print(json.dumps({"rows": args.rows, "results": results}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sustitutos locales de MySQL y MongoDB para las pruebas de carga
+
+Permiten ejecutar la aplicación sin las bases de datos reales:
+
+- connect() imita mysql.connector.connect sobre SQLite en memoria (una base
+  de datos SQLite por base de datos MySQL). Traduce los marcadores %s, NOW()
+  y las sentencias SET de sesión; cursor.description incluye tipos de
+  mysql.connector para que RowSerializer elija sus conversores.
+- MongoClient imita el subconjunto de pymongo que usan insertDocument y
+  findDocument (insert_many, find con sort, skip, limit, hint y max_time_ms
+  y los operadores de comparación habituales).
+
+Los datos se comparten entre todas las conexiones del proceso. Cada base de
+datos SQLite serializa sus sentencias, así que las cifras obtenidas miden
+sobre todo el coste de la aplicación, no el de una base de datos real.
+"""
+
+import re
+import sqlite3
+import datetime
+import itertools
+import threading
+from types import SimpleNamespace
+from bson import ObjectId
+from mysql.connector.constants import FieldType
+
+# Conexiones SQLite por base de datos (None = servidor)
+_databases = {}
+_databases_lock = threading.Lock()
+_connection_ids = itertools.count(1)
+
+_SET_STATEMENT = re.compile(r'^\s*SET\s', re.IGNORECASE)
+
+def _sqlite_database(name):
+    with _databases_lock:
+        database = _databases.get(name)
+        if database is None:
+            connection = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+            database = _databases[name] = (connection, threading.Lock())
+        return database
+
+def _type_code(value):
+    if isinstance(value, bool) or isinstance(value, int):
+        return FieldType.LONGLONG
+    if isinstance(value, float):
+        return FieldType.DOUBLE
+    if isinstance(value, (bytes, bytearray)):
+        return FieldType.BLOB
+    return FieldType.VAR_STRING
+
+def _translate(statement):
+    return statement.replace('%s', '?').replace('NOW()', "datetime('now')")
+
+class StandInCursor:
+    """Cursor con resultados en memoria (equivalente a buffered=True)."""
+
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self.dictionary = dictionary
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, operation, params=()):
+        names, rows, self.rowcount, self.lastrowid = self.connection.cmd_query(operation, params)
+        self._rows = rows
+        self.description = None
+        if names:
+            first = rows[0] if rows else ()
+            self.description = [
+                (name, _type_code(first[i]) if first else FieldType.VAR_STRING, None, None, None, None, 1, 0)
+                for i, name in enumerate(names)
+            ]
+        if self.dictionary and names:
+            self._rows = [dict(zip(names, row)) for row in rows]
+
+    def executemany(self, operation, seq_params):
+        total = 0
+        for params in seq_params:
+            self.execute(operation, params)
+            total += max(self.rowcount, 0)
+        self.rowcount = total
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._rows = []
+
+class StandInConnection:
+    """Conexión con la interfaz de mysql.connector usada por la aplicación."""
+
+    def __init__(self, database=None, **config):
+        self.database = database
+        self.connection_id = next(_connection_ids)
+        self._sqlite, self._lock = _sqlite_database(database)
+
+    def cmd_query(self, statement, params=()):
+        """Ejecuta una sentencia y devuelve (columnas, filas, filas afectadas, último id)."""
+        if isinstance(statement, (bytes, bytearray)):
+            statement = statement.decode('utf-8')
+        if _SET_STATEMENT.match(statement):
+            return None, [], 0, None
+        with self._lock:
+            cursor = self._sqlite.execute(_translate(statement), tuple(params or ()))
+            names = [column[0] for column in cursor.description] if cursor.description else None
+            rows = cursor.fetchall() if names else []
+            return names, rows, cursor.rowcount, cursor.lastrowid
+
+    def cursor(self, dictionary=False, **options):
+        return StandInCursor(self, dictionary)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+def connect(database=None, **config):
+    """Sustituto de mysql.connector.connect."""
+    return StandInConnection(database, **config)
+
+def create_sessions(database, tokens):
+    """
+    Crea la tabla sessions con los tokens indicados.
+
+    Args:
+        database: Base de datos de las sesiones (MYSQL_DATABASE de la aplicación)
+        tokens: Diccionario token -> rol
+    """
+    conn = StandInConnection(database)
+    conn.cmd_query("CREATE TABLE IF NOT EXISTS sessions (token TEXT PRIMARY KEY, user_id INTEGER, role TEXT, expires_at TEXT)")
+    expires_at = (datetime.datetime.utcnow() + datetime.timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
+    for user_id, (token, role) in enumerate(tokens.items(), 1):
+        conn.cmd_query("INSERT OR REPLACE INTO sessions VALUES (%s, %s, %s, %s)", (token, user_id, role, expires_at))
+
+def execute(database, statement, params=()):
+    """Ejecuta una sentencia directamente en una base de datos sustituta."""
+    return StandInConnection(database).cmd_query(statement, params)
+
+def reset():
+    """Elimina todos los datos de MySQL y MongoDB sustitutos."""
+    with _databases_lock:
+        _databases.clear()
+    MongoClient.store.clear()
+
+# MongoDB
+
+def _compare(value, operator, operand):
+    try:
+        if operator == '$eq':
+            return value == operand
+        if operator == '$ne':
+            return value != operand
+        if operator == '$gt':
+            return value is not None and value > operand
+        if operator == '$gte':
+            return value is not None and value >= operand
+        if operator == '$lt':
+            return value is not None and value < operand
+        if operator == '$lte':
+            return value is not None and value <= operand
+        if operator == '$in':
+            return value in operand
+        if operator == '$nin':
+            return value not in operand
+        if operator == '$exists':
+            return (value is not None) == bool(operand)
+    except TypeError:
+        return False
+    raise ValueError(f"Operador no soportado por el sustituto de MongoDB: {operator}")
+
+def _get(document, path):
+    value = document
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def matches(document, query):
+    """Comprueba si un documento cumple un filtro de MongoDB (subconjunto)."""
+    for key, condition in (query or {}).items():
+        if key == '$and':
+            if not all(matches(document, part) for part in condition):
+                return False
+        elif key == '$or':
+            if not any(matches(document, part) for part in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(op.startswith('$') for op in condition):
+            value = _get(document, key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif _get(document, key) != condition:
+            return False
+    return True
+
+def _project(document, projection):
+    if not projection:
+        return dict(document)
+    include = {key for key, value in projection.items() if value and key != '_id'}
+    if include:
+        result = {key: document[key] for key in include if key in document}
+        if projection.get('_id', 1) and '_id' in document:
+            result['_id'] = document['_id']
+        return result
+    return {key: value for key, value in document.items() if key not in projection}
+
+class MongoCursor:
+    """Cursor con la interfaz encadenable de pymongo."""
+
+    def __init__(self, documents, projection):
+        self._documents = documents
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=1):
+        self._sort = key_or_list if isinstance(key_or_list, list) else [(key_or_list, direction)]
+        return self
+
+    def skip(self, skip):
+        self._skip = skip
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def hint(self, index):
+        return self
+
+    def max_time_ms(self, max_time_ms):
+        return self
+
+    def batch_size(self, batch_size):
+        return self
+
+    def __iter__(self):
+        documents = self._documents
+        for key, direction in reversed(self._sort or []):
+            documents = sorted(documents, key=lambda document: (_get(document, key) is None, _get(document, key)),
+                               reverse=direction in (-1, '-1', 'desc', 'descending'))
+        documents = documents[self._skip:]
+        if self._limit:
+            documents = documents[:self._limit]
+        return (_project(document, self._projection) for document in documents)
+
+    def close(self):
+        pass
+
+class MongoCollection:
+    def __init__(self, name):
+        self.name = name
+        self._documents = []
+        self._lock = threading.Lock()
+
+    def insert_many(self, documents, ordered=True):
+        inserted = []
+        with self._lock:
+            for document in documents:
+                document = dict(document)
+                document.setdefault('_id', ObjectId())
+                self._documents.append(document)
+                inserted.append(document['_id'])
+        return SimpleNamespace(inserted_ids=inserted, acknowledged=True)
+
+    def insert_one(self, document):
+        return SimpleNamespace(inserted_id=self.insert_many([document]).inserted_ids[0], acknowledged=True)
+
+    def find(self, filter=None, projection=None, **options):
+        with self._lock:
+            documents = [document for document in self._documents if matches(document, filter)]
+        return MongoCursor(documents, projection)
+
+    def count_documents(self, filter=None):
+        with self._lock:
+            return sum(1 for document in self._documents if matches(document, filter))
+
+class MongoDatabase:
+    def __init__(self, name):
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MongoCollection(name)
+            return self._collections[name]
+
+    def list_collection_names(self):
+        return list(self._collections)
+
+class MongoClient:
+    """Sustituto de pymongo.MongoClient con los datos compartidos por todo el proceso."""
+
+    store = {}
+    _lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getitem__(self, name):
+        with MongoClient._lock:
+            if name not in MongoClient.store:
+                MongoClient.store[name] = MongoDatabase(name)
+            return MongoClient.store[name]
+
+    def list_database_names(self):
+        return list(MongoClient.store)
+
+    def close(self):
+        pass
+
+def install(soap_service):
+    """
+    Sustituye MySQL y MongoDB por los sustitutos en el módulo soap_service cargado.
+
+    Solo afecta a este proceso (mysql.connector.connect y el cliente de MongoDB
+    compartido de soap_service).
+    """
+    soap_service.mysql.connector.connect = connect
+    client = MongoClient()
+    soap_service.get_mongo_client = lambda: client
@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+# Agregar el directorio de las pruebas al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import bench_hotpaths
+
+class TestHotpathBenchmarks(unittest.TestCase):
+    """Pruebas de la medición y de la comparación con la línea base"""
+
+    def test_measure_calibrates_rounds(self):
+        """Cada ronda dura al menos min_time y se informa del mejor tiempo por llamada"""
+        calls = []
+        result = bench_hotpaths.measure('append', lambda: calls.append(1), 10, rounds=3, min_time=0.01)
+        self.assertEqual(result["rounds"], 3)
+        self.assertGreater(result["calls_per_round"], 1)
+        # Calentamiento + calibración (1, 2, 4... llamadas) + las rondas restantes
+        self.assertEqual(len(calls), 4 * result["calls_per_round"])
+        self.assertAlmostEqual(result["items_per_second"], result["ops_per_second"] * 10, delta=result["ops_per_second"])
+        self.assertLessEqual(result["best_us"], result["median_us"])
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        """Solo los casos que pierden más del umbral cuentan como regresión"""
+        baseline = {"results": {
+            "create_wsdl_sql": {"ops_per_second": 1000},
+            "extract_soap_body_small": {"ops_per_second": 1000},
+            "serialize_select_rows": {"ops_per_second": 10}
+        }}
+        results = [
+            {"name": "create_wsdl_sql", "ops_per_second": 850},
+            {"name": "extract_soap_body_small", "ops_per_second": 700},
+            {"name": "serialize_select_rows", "ops_per_second": 12},
+            {"name": "is_ip_allowed", "ops_per_second": 5}
+        ]
+        comparisons, regressions = bench_hotpaths.compare(results, baseline, 0.2)
+        self.assertEqual(regressions, ["extract_soap_body_small"])
+        self.assertEqual([item["name"] for item in comparisons], ["create_wsdl_sql", "extract_soap_body_small", "serialize_select_rows"])
+        self.assertEqual(comparisons[2]["change"], 0.2)
+
+if __name__ == '__main__':
+    unittest.main()
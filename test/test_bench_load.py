@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mysql.connector.constants import FieldType
+from utils.find import open_find, parse_find_options
+from utils.serializer import RowSerializer
+import standins
+import bench_load
+
+class TestLoadHarness(unittest.TestCase):
+    """Pruebas de los sustitutos de las bases de datos y del resumen de la carga"""
+
+    def setUp(self):
+        standins.reset()
+
+    def test_mysql_stand_in(self):
+        """El sustituto de MySQL valida sesiones con NOW() y devuelve tipos para RowSerializer"""
+        standins.create_sessions('dbservice', {"token": "editor"})
+        conn = standins.connect(database='dbservice', host='mysql')
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SET SESSION max_execution_time = %s", (1000,))
+        cursor.execute("SELECT user_id, role FROM sessions WHERE token = %s AND expires_at > NOW()", ("token",))
+        self.assertEqual(cursor.fetchone(), {"user_id": 1, "role": "editor"})
+
+        standins.execute('escuela', "CREATE TABLE alumnos (id INTEGER PRIMARY KEY, nombre TEXT, promedio REAL)")
+        cursor = standins.connect(database='escuela').cursor()
+        cursor.executemany("INSERT INTO `alumnos` (`nombre`, `promedio`) VALUES (%s, %s)", [("Ana", 9.5), ("Luis", 7.0)])
+        self.assertEqual(cursor.rowcount, 2)
+        cursor.execute("SELECT * FROM `alumnos`")
+        self.assertEqual([column[1] for column in cursor.description], [FieldType.LONGLONG, FieldType.VAR_STRING, FieldType.DOUBLE])
+        data_json, count = RowSerializer(cursor.description, use_orjson=False).dumps_rows(cursor.fetchall(), 'objects')
+        self.assertEqual(count, 2)
+        self.assertIn('"nombre": "Ana"', data_json)
+
+    def test_mongo_stand_in_with_find_pages(self):
+        """El sustituto de MongoDB admite los cursores paginados de findDocument"""
+        collection = standins.MongoClient()['escuela']['notas']
+        collection.insert_many([{"curso": i % 3, "nota": i} for i in range(10)])
+
+        options = parse_find_options({"limit": "2"})
+        page = open_find(collection, {"curso": 1}, {"nota": 1, "_id": 0}, None, options)
+        self.assertEqual(list(page.documents()), [{"nota": 1}, {"nota": 4}])
+        self.assertIsNotNone(page.continuation)
+
+        options = parse_find_options({"limit": "2", "continuation": page.continuation})
+        next_page = open_find(collection, {"curso": 1}, {"nota": 1, "_id": 0}, None, options)
+        self.assertEqual(list(next_page.documents()), [{"nota": 7}])
+        self.assertEqual(collection.count_documents({"$or": [{"nota": {"$gte": 8}}, {"curso": 0}]}), 5)
+
+    def test_summary_and_mix(self):
+        """El resumen calcula percentiles, tasa de errores y peticiones por segundo"""
+        samples = [('select', ms / 1000, ms == 100) for ms in range(1, 101)]
+        summary = bench_load.summarize(samples, 2)
+        self.assertEqual(summary["requests"], 100)
+        self.assertEqual((summary["errors"], summary["error_rate"], summary["rps"]), (1, 0.01, 50))
+        self.assertEqual((summary["latency_ms"]["p50"], summary["latency_ms"]["p95"], summary["latency_ms"]["p99"]), (50, 95, 99))
+
+        self.assertEqual(bench_load.parse_mix("select=3,listAll"), [('select', 3.0), ('listAll', 1.0)])
+        with self.assertRaises(ValueError):
+            bench_load.parse_mix("drop=1")
+        self.assertTrue(bench_load.is_error(200, b'<r>{"error": "Sesi\\u00f3n no v\\u00e1lida"}</r>'))
+        self.assertFalse(bench_load.is_error(200, b'<r>{"success": true}</r>'))
+
+if __name__ == '__main__':
+    unittest.main()
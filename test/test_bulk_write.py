@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from utils.bulk_write import parse_operations, run_bulk_write
+
+class FakeResult:
+    def __init__(self, details):
+        self.bulk_api_result = details
+
+class FakeCollection:
+    """Colección que aplica los lotes y rechaza las inserciones con _id duplicado."""
+
+    def __init__(self, write_concern_error=None):
+        self.ids = set()
+        self.write_concern_error = write_concern_error
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def bulk_write(self, batch, ordered=True):
+        with self.lock:
+            self.calls.append((len(batch), ordered))
+        details = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "nUpserted": 0,
+                   "upserted": [], "writeErrors": []}
+        for index, request in enumerate(batch):
+            if isinstance(request, InsertOne):
+                document_id = request._doc.get('_id')
+                with self.lock:
+                    duplicate = document_id in self.ids
+                    self.ids.add(document_id)
+                if duplicate:
+                    details["writeErrors"].append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key"})
+                    if ordered:
+                        break
+                    continue
+                details["nInserted"] += 1
+            elif isinstance(request, UpdateOne):
+                details["nMatched"] += 1
+                details["nModified"] += 1
+            else:
+                details["nRemoved"] += 1
+        if self.write_concern_error:
+            details["writeConcernErrors"] = [dict(self.write_concern_error)]
+        if details["writeErrors"] or self.write_concern_error:
+            raise BulkWriteError(details)
+        return FakeResult(details)
+
+def make_operations():
+    return [
+        {"insertOne": {"document": {"_id": 1}}},
+        {"insertOne": {"document": {"_id": 2}}},
+        {"updateOne": {"filter": {"_id": 1}, "update": {"nombre": "Ana"}}},
+        {"insertOne": {"document": {"_id": 1}}},
+        {"deleteOne": {"filter": {"_id": 2}}},
+        {"insertOne": {"document": {"_id": 3}}}
+    ]
+
+class TestBulkWrite(unittest.TestCase):
+    """Pruebas de bulkWrite"""
+
+    def test_operations_are_validated_before_sending(self):
+        """Las operaciones se convierten a pymongo y los errores indican su índice"""
+        kinds, requests = parse_operations(make_operations())
+        self.assertEqual(kinds[2], 'updateOne')
+        self.assertEqual(requests[2]._doc, {'$set': {'nombre': 'Ana'}})
+
+        with self.assertRaisesRegex(ValueError, "Operación 1"):
+            parse_operations([{"insertOne": {"document": {}}}, {"upsertOne": {}}])
+        with self.assertRaisesRegex(ValueError, "falta el campo 'filter'"):
+            parse_operations([{"deleteOne": {}}])
+
+    def test_ordered_mode_stops_at_first_error(self):
+        """En modo ordenado se detiene en el primer error e informa de lo no ejecutado"""
+        collection = FakeCollection()
+        kinds, requests = parse_operations(make_operations())
+        result = run_bulk_write(collection, kinds, requests, ordered=True, batch_size=2)
+
+        self.assertEqual(result["batches"], 2)
+        self.assertEqual(result["inserted_count"], 2)
+        self.assertEqual(result["modified_count"], 1)
+        self.assertEqual(result["errors"][0]["index"], 3)
+        self.assertEqual(result["not_executed"], 2)
+        self.assertEqual(result["counts"]["insertOne"], {"requested": 4, "failed": 1})
+        self.assertFalse(result["success"])
+
+    def test_unordered_mode_runs_all_batches(self):
+        """En modo no ordenado se ejecutan todos los lotes y cada error conserva su índice"""
+        collection = FakeCollection()
+        collection.ids.add(1)
+        kinds, requests = parse_operations(make_operations())
+        result = run_bulk_write(collection, kinds, requests, ordered=False, batch_size=2, parallelism=3)
+
+        self.assertEqual(len(collection.calls), 3)
+        self.assertTrue(all(ordered is False for _, ordered in collection.calls))
+        self.assertEqual(result["inserted_count"], 2)
+        self.assertEqual(result["deleted_count"], 1)
+        self.assertEqual([error["index"] for error in result["errors"]], [0, 3])
+        self.assertEqual(result["not_executed"], 0)
+
+    def test_write_concern_errors_are_reported(self):
+        """Los errores de write concern aparecen en errors y la operación no tiene éxito"""
+        collection = FakeCollection({"code": 64, "errmsg": "waiting for replication timed out"})
+        kinds, requests = parse_operations(make_operations()[:3])
+        result = run_bulk_write(collection, kinds, requests, ordered=True, batch_size=2)
+
+        self.assertEqual(result["inserted_count"], 2)
+        self.assertEqual([error["batch"] for error in result["errors"]], [0, 2])
+        self.assertEqual(result["errors"][0]["operation"], "writeConcern")
+        self.assertIsNone(result["errors"][0]["index"])
+        self.assertEqual(result["not_executed"], 0)
+        self.assertFalse(result["success"])
+
+if __name__ == '__main__':
+    unittest.main()
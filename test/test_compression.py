@@ -0,0 +1,61 @@
+import os
+import sys
+import gzip
+import zlib
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from flask import Response
+from utils.compression import CompressionError, negotiate, decompress, compress_response, zstandard
+
+class TestCompression(unittest.TestCase):
+    """Pruebas de la negociación y compresión HTTP"""
+
+    def test_negotiate_respects_quality_values(self):
+        """Se elige el algoritmo aceptado con mayor calidad e identity si no hay ninguno"""
+        self.assertEqual(negotiate('deflate;q=0.5, gzip'), 'gzip')
+        self.assertEqual(negotiate('gzip;q=0, deflate'), 'deflate')
+        self.assertIsNone(negotiate('identity'))
+        self.assertIsNone(negotiate(''))
+
+    def test_response_is_compressed_above_threshold(self):
+        """Solo se comprimen las respuestas que superan el tamaño mínimo"""
+        body = b'<soap:Envelope>' + b'{"id": 1},' * 500 + b'</soap:Envelope>'
+        response = compress_response(Response(body, content_type='text/xml'), 'gzip', min_size=1024)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.get_data()), body)
+
+        small = compress_response(Response(b'<ok/>', content_type='text/xml'), 'gzip', min_size=1024)
+        self.assertNotIn('Content-Encoding', small.headers)
+
+    def test_request_bodies_are_decompressed_with_limit(self):
+        """Los cuerpos gzip/deflate se descomprimen y se rechazan los que superan el límite"""
+        data = b'x' * 10000
+        self.assertEqual(decompress(gzip.compress(data), 'gzip'), data)
+        self.assertEqual(decompress(zlib.compress(data), 'deflate'), data)
+        self.assertEqual(decompress(data, None), data)
+        with self.assertRaises(CompressionError):
+            decompress(gzip.compress(data), 'gzip', max_size=1000)
+        with self.assertRaises(CompressionError):
+            decompress(b'no comprimido', 'gzip')
+        with self.assertRaises(CompressionError):
+            decompress(gzip.compress(data)[:-20], 'gzip')
+        with self.assertRaises(CompressionError):
+            decompress(zlib.compress(data)[:-4], 'deflate')
+        with self.assertRaises(CompressionError):
+            decompress(data, 'br')
+
+    @unittest.skipIf(zstandard is None, "zstandard no está instalado")
+    def test_zstd_bodies_are_bounded(self):
+        """Los cuerpos zstd se descomprimen por bloques y se cortan al superar el límite"""
+        data = b'x' * 200000
+        compressed = zstandard.ZstdCompressor().compress(data)
+        self.assertEqual(decompress(compressed, 'zstd'), data)
+        with self.assertRaises(CompressionError):
+            decompress(compressed, 'zstd', max_size=1000)
+
+if __name__ == '__main__':
+    unittest.main()
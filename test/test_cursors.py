@@ -0,0 +1,120 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from mysql.connector.constants import FieldType
+from utils import db_pool
+from utils.cursors import ServerCursor, CursorRegistry, CursorError
+from utils.serializer import RowSerializer
+
+DESCRIPTION = [
+    ('id', FieldType.LONG, None, None, None, None, 0, 0),
+    ('nombre', FieldType.VAR_STRING, None, None, None, None, 1, 0)
+]
+
+class FakeCursor:
+    """Cursor MySQL no bufferizado sobre una lista de filas."""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.closed = False
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+class FakeConnection:
+    def __init__(self):
+        self.disconnected = False
+        self.closed = False
+
+    def disconnect(self):
+        self.disconnected = True
+
+    def close(self):
+        self.closed = True
+
+def sql_cursor(owner, rows=(), pool_key=('mysql', 3306, 'escuela')):
+    return ServerCursor(owner, 'sql', FakeCursor(rows), FakeConnection(),
+                        serializer=RowSerializer(DESCRIPTION, use_orjson=False), pool_key=pool_key)
+
+class TestCursors(unittest.TestCase):
+    """Pruebas de los cursores de servidor y de los pools de conexiones"""
+
+    def test_fetch_pages_and_release(self):
+        """Las páginas se cortan por registros o por bytes y la conexión vuelve al pool"""
+        server_cursor = sql_cursor('sesion', [(i, f"Alumno {i}") for i in range(5)])
+        chunks, _ = server_cursor.fetch(2)
+        self.assertEqual(chunks, ['{"id": 0, "nombre": "Alumno 0"}', '{"id": 1, "nombre": "Alumno 1"}'])
+
+        chunks, _ = server_cursor.fetch(10, max_bytes=10)
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(server_cursor.rows_fetched, 3)
+
+        # Un cursor sin agotar se desconecta en lugar de drenar las filas pendientes
+        server_cursor.release()
+        self.assertTrue(server_cursor.connection.disconnected)
+        self.assertTrue(server_cursor.connection.closed)
+
+        exhausted = sql_cursor('sesion', [(1, "Ana")])
+        self.assertEqual(len(exhausted.fetch(10)[0]), 1)
+        self.assertTrue(exhausted.exhausted)
+        exhausted.release()
+        self.assertTrue(exhausted.cursor.closed)
+        self.assertFalse(exhausted.connection.disconnected)
+
+    def test_registry_limits_and_expiry(self):
+        """Los límites por sesión, por pool y globales se respetan y los cursores inactivos expiran"""
+        registry = CursorRegistry(idle_timeout=60, max_per_session=2, max_total=10, max_per_pool=3)
+        first = registry.register(sql_cursor('a'))
+        registry.register(sql_cursor('a'))
+        with self.assertRaises(CursorError):
+            registry.register(sql_cursor('a'))
+
+        # Las conexiones ancladas de un mismo pool no pueden agotarlo
+        registry.register(sql_cursor('b'))
+        rejected = sql_cursor('c')
+        with self.assertRaises(CursorError):
+            registry.register(rejected)
+        self.assertTrue(rejected.connection.closed)
+        registry.register(sql_cursor('c', pool_key=('mysql', 3306, 'otra')))
+        registry.check_capacity('d')
+
+        with self.assertRaises(CursorError):
+            registry.get(first.cursor_id, 'b')
+        self.assertIs(registry.get(first.cursor_id, 'a'), first)
+
+        first.last_used -= 120
+        self.assertEqual(registry.expire_idle(), 1)
+        self.assertTrue(first.connection.closed)
+        self.assertEqual(registry.stats()["open_cursors"], 3)
+        registry.check_capacity('c', ('mysql', 3306, 'escuela'))
+
+    def test_pools_are_shared_per_server_and_database(self):
+        """Se crea un pool por servidor y base de datos y se reutiliza"""
+        with mock.patch.object(db_pool.pooling, 'MySQLConnectionPool') as pool_class, \
+                mock.patch.dict(db_pool._mysql_pools, clear=True):
+            pool_class.side_effect = lambda **config: mock.Mock(config=config)
+            pool = db_pool.get_mysql_pool('escuela')
+            self.assertIs(db_pool.get_mysql_pool('escuela'), pool)
+            self.assertEqual(pool.config["pool_name"], 'soadb_escuela')
+            self.assertEqual(pool.config["pool_size"], db_pool.MYSQL_POOL_SIZE)
+
+            other = db_pool.get_mysql_pool('escuela', 'mysql-2', 3307)
+            self.assertIsNot(other, pool)
+            self.assertEqual(other.config["pool_name"], 'soadb_mysql_2_3307_escuela')
+            self.assertNotIn('database', db_pool.get_mysql_pool().config)
+
+            db_pool.get_mysql_connection('escuela')
+            pool.get_connection.assert_called_once_with()
+            self.assertEqual(pool_class.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import threading
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils import deadline
+from utils.deadline import DeadlineExceeded, operation_timeout, request_deadline, apply_mysql_deadline
+
+class RecordingConnection:
+    """Conexión mínima que registra las sentencias ejecutadas."""
+
+    connection_id = 42
+
+    def __init__(self):
+        self.statements = []
+
+    def cmd_query(self, query, *args, **kwargs):
+        self.statements.append(query)
+
+class TestDeadline(unittest.TestCase):
+    """Pruebas de los plazos de ejecución"""
+
+    def test_operation_timeout_uses_default_and_cap(self):
+        """Sin cabecera se usa el tiempo por defecto y nunca se supera el máximo"""
+        self.assertEqual(operation_timeout('join'), 30)
+        self.assertEqual(operation_timeout('join', '5000'), 5)
+        self.assertEqual(operation_timeout('join', '3600000'), 120)
+        self.assertEqual(operation_timeout('join', 'no-numérico'), 30)
+
+    def test_expired_deadline_is_rejected(self):
+        """Una petición sin tiempo restante no llega a ejecutarse"""
+        with self.assertRaises(DeadlineExceeded):
+            with request_deadline(0):
+                pass
+
+    def test_mysql_deadline_bounds_selects_and_kills_late_queries(self):
+        """Cada SELECT lleva MAX_EXECUTION_TIME y el vigilante cancela la consulta al vencer el plazo"""
+        killed = []
+        original_grace = deadline.KILL_QUERY_GRACE
+        deadline.KILL_QUERY_GRACE = 0
+        try:
+            conn = RecordingConnection()
+            with request_deadline(0.1):
+                apply_mysql_deadline(conn, killed.append)
+                conn.cmd_query("  select * FROM alumnos")
+                conn.cmd_query(b"SELECT 1")
+                conn.cmd_query("INSERT INTO alumnos SELECT * FROM otros")
+                time.sleep(0.3)
+            self.assertRegex(conn.statements[0], r"^  select /\*\+ MAX_EXECUTION_TIME\((\d{1,2}|100)\) \*/ \* FROM alumnos$")
+            self.assertRegex(conn.statements[1], rb"^SELECT /\*\+ MAX_EXECUTION_TIME\(\d+\) \*/ 1$")
+            self.assertEqual(conn.statements[2], "INSERT INTO alumnos SELECT * FROM otros")
+            self.assertEqual(killed, [42])
+
+            # Si la operación termina antes, el vigilante se cancela
+            with request_deadline(0.2):
+                apply_mysql_deadline(RecordingConnection(), killed.append)
+            time.sleep(0.3)
+            self.assertEqual(killed, [42])
+        finally:
+            deadline.KILL_QUERY_GRACE = original_grace
+
+    def test_watchdog_runs_actions_in_order_on_one_thread(self):
+        """Un único hilo ejecuta las acciones programadas por orden y omite las canceladas"""
+        watchdog = deadline.DeadlineWatchdog()
+        ran = []
+        threads = threading.active_count()
+        for delay in (0.15, 0.05, 0.1):
+            watchdog.schedule(delay, ran.append, delay)
+        watchdog.schedule(0.07, ran.append, 'cancelada').cancel()
+        self.assertEqual(threading.active_count(), threads + 1)
+        self.assertEqual(watchdog.pending(), 3)
+        time.sleep(0.3)
+        self.assertEqual(ran, [0.05, 0.1, 0.15])
+        self.assertEqual(watchdog.pending(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.explain import parse_mysql_plan, parse_mongo_plan, parse_explain_mode, filter_fields, pipeline_fields
+from utils.advisor import QueryAdvisor
+
+MYSQL_PLAN = """-> Nested loop inner join  (cost=1.60 rows=3) (actual time=0.050..0.090 rows=2 loops=1)
+    -> Filter: (a.curso = 3)  (cost=0.55 rows=1) (actual time=0.031..0.035 rows=2 loops=1)
+        -> Table scan on a  (cost=0.55 rows=3) (actual time=0.028..0.032 rows=3 loops=1)
+    -> Single-row index lookup on c using PRIMARY (id=a.curso_id)  (cost=0.35 rows=1) (never executed)"""
+
+def mongo_explain(stage):
+    return {"queryPlanner": {"winningPlan": {}}, "executionStats": {
+        "nReturned": 2, "executionTimeMillis": 15, "totalKeysExamined": 0, "totalDocsExamined": 1000,
+        "executionStages": {"stage": "FETCH", "nReturned": 2, "inputStage": stage}
+    }}
+
+class TestExplain(unittest.TestCase):
+    """Pruebas del modo explain y del asesor de consultas lentas"""
+
+    def test_mysql_plan_is_normalised(self):
+        """El árbol de EXPLAIN ANALYZE se convierte en etapas con tiempos y recorridos completos"""
+        plan = parse_mysql_plan(MYSQL_PLAN)
+        self.assertEqual([stage["depth"] for stage in plan["stages"]], [0, 1, 2, 1])
+        self.assertEqual(plan["stages"][2]["table"], 'a')
+        self.assertTrue(plan["stages"][2]["full_scan"])
+        self.assertEqual(plan["stages"][3]["index"], 'PRIMARY')
+        self.assertIsNone(plan["stages"][3]["actual_rows"])
+        self.assertEqual(plan["full_scans"], [{"target": "a", "fields": ["curso"]}])
+        self.assertEqual((plan["rows"], plan["time_ms"]), (2.0, 0.09))
+
+        self.assertEqual(parse_explain_mode('true'), 'analyze')
+        self.assertEqual(parse_explain_mode('plan'), 'plan')
+        self.assertIsNone(parse_explain_mode(''))
+
+    def test_mongo_plan_is_normalised(self):
+        """executionStats de find y de aggregate ($cursor) se convierten en etapas"""
+        fields = filter_fields({"curso": 3, "$or": [{"activo": True}, {"nota": {"$gt": 5}}]})
+        self.assertEqual(fields, ["curso", "activo", "nota"])
+        self.assertEqual(pipeline_fields([{"$match": {"curso": 3}}, {"$sort": {"nota": -1}}, {"$group": {}}]), ["curso", "nota"])
+
+        plan = parse_mongo_plan(mongo_explain({"stage": "COLLSCAN", "docsExamined": 1000}), 'alumnos', fields)
+        self.assertEqual([stage["operation"] for stage in plan["stages"]], ["FETCH", "COLLSCAN"])
+        self.assertEqual(plan["full_scans"], [{"target": "alumnos", "fields": fields}])
+        self.assertEqual(plan["docs_examined"], 1000)
+
+        wrapped = {"stages": [{"$cursor": mongo_explain({"stage": "IXSCAN", "indexName": "curso_1"})}]}
+        plan = parse_mongo_plan(wrapped, 'alumnos', ["curso"])
+        self.assertEqual(plan["stages"][1]["index"], "curso_1")
+        self.assertEqual(plan["full_scans"], [])
+
+    def test_advisor_suggests_indexes_for_repeated_scans(self):
+        """Las consultas lentas se guardan con su plan y los recorridos repetidos generan sugerencias"""
+        plans = []
+
+        def explainer(service, operation, parameters):
+            plans.append(operation)
+            return parse_mysql_plan(MYSQL_PLAN)
+
+        advisor = QueryAdvisor(threshold_ms=100, capacity=2, min_occurrences=3)
+        advisor.configure(explainer)
+        parameters = {"session_token": "secreto", "database_name": "escuela", "join_query": "SELECT ..."}
+        advisor.observe('sql', 'join', parameters, 50)
+        for _ in range(3):
+            advisor.observe('sql', 'join', parameters, 250)
+        advisor._executor.shutdown(wait=True)
+
+        self.assertEqual(len(plans), 3)
+        entries = advisor.slow_operations()
+        self.assertEqual(len(entries), 2)
+        self.assertNotIn("session_token", str(entries))
+        self.assertNotIn("raw", entries[0]["plan"])
+
+        suggestions = advisor.suggestions()
+        self.assertEqual(len(suggestions), 1)
+        self.assertEqual(suggestions[0]["index_json"], {"keys": ["curso"]})
+        self.assertEqual(suggestions[0]["occurrences"], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import csv
+import json
+import zlib
+import datetime
+import decimal
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from mysql.connector.constants import FieldType
+from utils.export import export_rows, export_documents, closing_stream, parse_export_format
+from utils.compression import compress_stream
+
+class FakeCursor:
+    """Cursor MySQL mínimo que entrega las filas por lotes."""
+
+    description = [
+        ('id', FieldType.LONG), ('nombre', FieldType.VAR_STRING),
+        ('promedio', FieldType.NEWDECIMAL), ('fecha', FieldType.DATE)
+    ]
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.fetches = 0
+        self.closed = False
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+def make_rows(count):
+    return [(i, f"Estudiante, \"{i}\"", decimal.Decimal('8.50'), datetime.date(2024, 1, 1)) for i in range(count)]
+
+class TestExport(unittest.TestCase):
+    """Pruebas de la exportación en streaming"""
+
+    def test_rows_are_streamed_in_batches(self):
+        """Las filas se leen y emiten por lotes en CSV, NDJSON y columnar"""
+        cursor = FakeCursor(make_rows(25))
+        chunks = list(export_rows(cursor, 'csv', batch_size=10))
+        self.assertEqual(cursor.fetches, 4)
+        self.assertEqual(len(chunks), 4)  # cabecera + 3 lotes
+        rows = list(csv.reader(''.join(chunks).splitlines()))
+        self.assertEqual(rows[0], ['id', 'nombre', 'promedio', 'fecha'])
+        self.assertEqual(rows[1], ['0', 'Estudiante, "0"', '8.50', '2024-01-01'])
+
+        lines = ''.join(export_rows(FakeCursor(make_rows(3)), 'ndjson')).splitlines()
+        self.assertEqual(json.loads(lines[2])['id'], 2)
+
+        blocks = [json.loads(line) for line in ''.join(export_rows(FakeCursor(make_rows(5)), 'columnar', 2)).splitlines()]
+        self.assertEqual([block['id'] for block in blocks], [[0, 1], [2, 3], [4]])
+
+    def test_documents_csv_uses_first_batch_columns(self):
+        """El CSV de documentos usa las columnas del primer lote y codifica los anidados"""
+        documents = [{"a": 1, "b": {"x": 1}}, {"a": 2, "c": 3}, {"a": 3, "d": 4}]
+        with self.assertLogs('utils.export', 'WARNING') as logs:
+            rows = list(csv.reader(''.join(export_documents(iter(documents), 'csv', 2)).splitlines()))
+        self.assertIn('omitidas: d', logs.output[0])
+        self.assertEqual(rows[0], ['a', 'b', 'c'])
+        self.assertEqual(rows[1], ['1', '{"x": 1}', ''])
+        self.assertEqual(rows[3], ['3', '', ''])
+        self.assertEqual(''.join(export_documents(iter(()), 'csv')), '\n')
+        with self.assertRaises(ValueError):
+            parse_export_format('parquet')
+
+    def test_stream_is_compressed_and_resources_closed(self):
+        """El flujo se comprime por fragmentos y el cursor se cierra aunque se abandone"""
+        cursor = FakeCursor(make_rows(1000))
+        stream = closing_stream(export_rows(cursor, 'ndjson', 100), cursor)
+        body = b''.join(compress_stream((chunk.encode('utf-8') for chunk in stream), 'gzip'))
+        text = zlib.decompress(body, 16 + zlib.MAX_WBITS).decode('utf-8')
+        self.assertEqual(len(text.splitlines()), 1000)
+        self.assertTrue(cursor.closed)
+
+        cursor = FakeCursor(make_rows(1000))
+        stream = closing_stream(export_rows(cursor, 'ndjson', 100), cursor)
+        next(stream)
+        stream.close()
+        self.assertTrue(cursor.closed)
+        self.assertEqual(cursor.fetches, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.find import parse_find_options, parse_sort, open_find, plan_find, find_response_chunks
+
+class FakeCursor:
+    """Cursor mínimo que aplica sort, skip y limit sobre una lista."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.options = {}
+
+    def sort(self, sort):
+        for field, direction in reversed(sort):
+            self.documents = sorted(self.documents, key=lambda d: d[field], reverse=direction == -1)
+        return self
+
+    def skip(self, count):
+        self.options['skip'] = count
+        return self
+
+    def limit(self, count):
+        self.options['limit'] = count
+        return self
+
+    def hint(self, hint):
+        self.options['hint'] = hint
+        return self
+
+    def max_time_ms(self, ms):
+        self.options['max_time_ms'] = ms
+        return self
+
+    def __iter__(self):
+        start = self.options.get('skip', 0)
+        end = start + self.options['limit'] if 'limit' in self.options else None
+        return iter(self.documents[start:end])
+
+class FakeCollection:
+    """Colección que entiende el filtro de continuación {"$and": [..., {"_id": {"$gt": n}}]}."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    def find(self, query, projection=None, batch_size=None):
+        self.queries.append((query, batch_size))
+        documents = self.documents
+        if '$and' in query:
+            condition = query['$and'][1]['_id']
+            if '$gt' in condition:
+                documents = [d for d in documents if d['_id'] > condition['$gt']]
+            else:
+                documents = [d for d in documents if d['_id'] < condition['$lt']]
+        return FakeCursor(documents)
+
+def make_collection(count):
+    return FakeCollection([{"_id": i, "n": count - i} for i in range(count)])
+
+def read_page(collection, parameters, sort=None):
+    page = open_find(collection, {}, None, parse_sort(sort), parse_find_options(parameters))
+    return json.loads("".join(find_response_chunks(page, {"success": True})))
+
+class TestFind(unittest.TestCase):
+    """Pruebas de la paginación de findDocument"""
+
+    def test_options_are_validated(self):
+        """Las opciones se convierten y validan y el orden se normaliza"""
+        options = parse_find_options({"limit": "10", "batch_size": "999999", "hint": '{"n": 1}'})
+        self.assertEqual(options["limit"], 10)
+        self.assertEqual(options["skip"], 0)
+        self.assertEqual(options["batch_size"], 10000)
+        self.assertEqual(options["hint"], [("n", 1)])
+        self.assertEqual(parse_sort({"a": 1, "b": -1}), [("a", 1), ("b", -1)])
+        self.assertEqual(parse_sort([["a", -1]]), [("a", -1)])
+
+        for parameters in ({"limit": "0"}, {"skip": "-1"}, {"max_time_ms": "x"}):
+            with self.assertRaises(ValueError):
+                parse_find_options(parameters)
+
+    def test_pages_continue_after_last_id(self):
+        """Sin orden explícito las páginas siguientes filtran por el último _id"""
+        collection = make_collection(7)
+        first = read_page(collection, {"limit": "3", "skip": "1", "batch_size": "2"})
+        self.assertEqual([d["_id"] for d in first["documents"]], [1, 2, 3])
+        self.assertEqual(first["count"], 3)
+        self.assertEqual(collection.queries[0], ({}, 2))
+
+        second = read_page(collection, {"continuation": first["continuation"]})
+        self.assertEqual([d["_id"] for d in second["documents"]], [4, 5, 6])
+        self.assertEqual(collection.queries[1][0]["$and"][1], {"_id": {"$gt": 3}})
+        self.assertIsNone(second["continuation"])
+
+        # El token no sirve para otra búsqueda
+        with self.assertRaisesRegex(ValueError, "no corresponde"):
+            read_page(collection, {"continuation": first["continuation"]}, sort={"n": 1})
+
+    def test_custom_sort_continues_with_skip(self):
+        """Con otro orden la continuación salta los documentos ya devueltos"""
+        collection = make_collection(5)
+        first = read_page(collection, {"limit": "2"}, sort={"n": 1})
+        self.assertEqual([d["n"] for d in first["documents"]], [1, 2])
+
+        second = read_page(collection, {"continuation": first["continuation"]}, sort={"n": 1})
+        self.assertEqual([d["n"] for d in second["documents"]], [3, 4])
+        third = read_page(collection, {"continuation": second["continuation"]}, sort={"n": 1})
+        self.assertEqual([d["n"] for d in third["documents"]], [5])
+        self.assertIsNone(third["continuation"])
+
+    def test_projection_decides_keyset_continuation(self):
+        """Una proyección en forma de lista admite la continuación por _id; excluir _id no"""
+        options = parse_find_options({"limit": "2"})
+        self.assertTrue(plan_find({}, ["nombre"], None, options)[4]["keyset"])
+        self.assertTrue(plan_find({}, {"nombre": 1}, None, options)[4]["keyset"])
+        self.assertFalse(plan_find({}, {"nombre": 1, "_id": 0}, None, options)[4]["keyset"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import io
+import os
+import sys
+import gzip
+import json
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.importer import iter_records, run_import, text_stream, RecordError
+from utils.compression import decompressing_reader
+
+class RecordingWriter:
+    """Escritor de lotes que registra los lotes y falla en los indicados."""
+
+    def __init__(self, failing=()):
+        self.batches = []
+        self.failing = set(failing)
+
+    def __call__(self, batch):
+        index = len(self.batches)
+        self.batches.append(batch)
+        if index in self.failing:
+            raise ValueError("Clave duplicada")
+        return len(batch), 0, None
+
+class TestImporter(unittest.TestCase):
+    """Pruebas de la importación en streaming"""
+
+    def test_records_are_parsed_incrementally(self):
+        """CSV y NDJSON se leen registro a registro y los mal formados se informan"""
+        records = list(iter_records(text_stream("id,nombre\n1,Ana\n2,\n3\n"), 'csv'))
+        self.assertEqual(records[0], {"id": "1", "nombre": "Ana"})
+        self.assertEqual(records[1], {"id": "2", "nombre": None})
+        self.assertIsInstance(records[2], RecordError)
+
+        ndjson = io.BytesIO(b'{"a": 1}\n\n{"a": \n[1]\n{"a": 2}\n')
+        records = list(iter_records(text_stream(ndjson), 'ndjson'))
+        self.assertEqual([r if isinstance(r, dict) else None for r in records], [{"a": 1}, None, None, {"a": 2}])
+
+        # Adjunto NDJSON convertido en array JSON por MTOM
+        self.assertEqual(len(list(iter_records(text_stream('[{"a": 1}, {"a": 2}]'), 'ndjson', allow_array=True))), 2)
+        # En streaming el array se rechaza sin leer el resto del cuerpo
+        stream = text_stream('[{"a": 1},\n{"a": 2}]')
+        records = list(iter_records(stream, 'ndjson'))
+        self.assertEqual(len(records), 1)
+        self.assertIsInstance(records[0], RecordError)
+        self.assertEqual(stream.readline(), '{"a": 2}]')
+
+    def test_batches_report_errors_and_resume_offset(self):
+        """Cada lote se escribe por separado y sus errores no detienen la importación"""
+        lines = "\n".join(json.dumps({"n": i}) for i in range(25))
+        writer = RecordingWriter(failing={1})
+        report = run_import(iter_records(text_stream(lines), 'ndjson'), writer, batch_size=10).as_dict()
+
+        self.assertEqual([len(batch) for batch in writer.batches], [10, 10, 5])
+        self.assertTrue(report["complete"])
+        self.assertEqual(report["inserted"], 15)
+        self.assertEqual(report["errors"], [{"offset": 10, "count": 10, "error": "Clave duplicada"}])
+        self.assertEqual(report["next_offset"], 25)
+
+        # Reanudar desde un offset omite los registros ya importados
+        writer = RecordingWriter()
+        report = run_import(iter_records(text_stream(lines), 'ndjson'), writer, offset=20, batch_size=10).as_dict()
+        self.assertEqual(writer.batches, [[{"n": i} for i in range(20, 25)]])
+        self.assertEqual(report["next_offset"], 25)
+
+    def test_truncated_stream_reports_committed_offset(self):
+        """Si el cuerpo se corta se devuelve la posición desde la que reanudar"""
+        data = gzip.compress(("\n".join(json.dumps({"n": i}) for i in range(30)) + "\n").encode('utf-8'))
+        stream = decompressing_reader(io.BytesIO(data[:len(data) // 2]), 'gzip')
+        writer = RecordingWriter()
+        report = run_import(iter_records(text_stream(stream), 'ndjson'), writer, batch_size=5).as_dict()
+
+        self.assertFalse(report["complete"])
+        self.assertEqual(report["next_offset"], sum(len(batch) for batch in writer.batches))
+
+        full = decompressing_reader(io.BytesIO(data), 'gzip')
+        self.assertEqual(len(list(iter_records(text_stream(full), 'ndjson'))), 30)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import datetime
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.indexes import (parse_index_spec, mysql_create_index_sql, mysql_drop_index_sql, group_mysql_indexes,
+                           mongo_index_keys, mongo_index_options, merge_mongo_indexes)
+
+class TestIndexes(unittest.TestCase):
+    """Pruebas de la gestión de índices"""
+
+    def test_mysql_index_statements(self):
+        """Índices compuestos, únicos, de prefijo y construcción en línea"""
+        spec = parse_index_spec({"keys": ["curso", {"column": "nombre", "length": 10, "order": "desc"}], "unique": True})
+        name, sql = mysql_create_index_sql('alumnos', spec)
+        self.assertEqual(name, 'uq_alumnos_curso_nombre')
+        self.assertEqual(sql, "CREATE UNIQUE INDEX `uq_alumnos_curso_nombre` ON `alumnos` "
+                              "(`curso`, `nombre`(10) DESC) ALGORITHM=INPLACE LOCK=NONE")
+
+        _, sql = mysql_create_index_sql('alumnos', parse_index_spec({"keys": "curso", "name": "i", "online": False}))
+        self.assertEqual(sql, "CREATE INDEX `i` ON `alumnos` (`curso`)")
+        self.assertEqual(mysql_drop_index_sql('alumnos', 'i', False), "DROP INDEX `i` ON `alumnos`")
+
+        for spec in ({"keys": []}, {"keys": [{"column": "a", "length": 0}]}, {"keys": [{"column": "a", "order": "up"}]}):
+            with self.assertRaises(ValueError):
+                mysql_create_index_sql('alumnos', parse_index_spec(spec))
+        with self.assertRaises(ValueError):
+            mysql_drop_index_sql('alumnos', 'PRIMARY')
+
+    def test_mysql_indexes_are_grouped_with_usage(self):
+        """Las columnas se agrupan por índice y se añade su uso si se conoce"""
+        rows = [
+            ('PRIMARY', 0, 1, 'id', None, 'A', 'BTREE', 100),
+            ('idx_curso', 1, 1, 'curso', None, 'A', 'BTREE', 5),
+            ('idx_curso', 1, 2, 'nombre', 10, 'D', 'BTREE', 90)
+        ]
+        indexes = group_mysql_indexes(rows, [('idx_curso', 7, 3, 7, 1, 1, 1)])
+        self.assertEqual([index["name"] for index in indexes], ['PRIMARY', 'idx_curso'])
+        self.assertTrue(indexes[0]["unique"] and indexes[0]["primary"])
+        self.assertEqual(indexes[1]["keys"][1], {"column": "nombre", "length": 10, "order": "desc"})
+        self.assertEqual(indexes[1]["cardinality"], 90)
+        self.assertEqual(indexes[1]["usage"]["reads"], 7)
+        self.assertIsNone(indexes[0]["usage"])
+        self.assertIsNone(group_mysql_indexes(rows)[1]["usage"])
+
+    def test_mongo_index_options(self):
+        """Claves compuestas, índices parciales y TTL de MongoDB"""
+        keys = mongo_index_keys([{"curso": 1}, {"field": "nota", "order": "desc"}, {"texto": "text"}])
+        self.assertEqual(keys, [("curso", 1), ("nota", -1), ("texto", "text")])
+
+        options = mongo_index_options({"unique": True, "partial_filter": {"activo": True}}, keys)
+        self.assertEqual(options, {"unique": True, "partialFilterExpression": {"activo": True}})
+        self.assertEqual(mongo_index_options({"expire_after_seconds": 3600}, [("creado", 1)]), {"expireAfterSeconds": 3600})
+        with self.assertRaisesRegex(ValueError, "TTL"):
+            mongo_index_options({"expire_after_seconds": 60}, keys)
+
+        since = datetime.datetime(2024, 1, 1)
+        indexes = merge_mongo_indexes(
+            [{"v": 2, "key": {"_id": 1}, "name": "_id_"},
+             {"v": 2, "key": {"creado": 1}, "name": "creado_1", "expireAfterSeconds": 3600}],
+            [{"name": "creado_1", "accesses": {"ops": 12, "since": since}}]
+        )
+        self.assertTrue(indexes[0]["primary"] and indexes[0]["unique"])
+        self.assertEqual(indexes[1]["options"], {"expireAfterSeconds": 3600})
+        self.assertEqual(indexes[1]["usage"], {"ops": 12, "since": since})
+
+if __name__ == '__main__':
+    unittest.main()
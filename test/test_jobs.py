@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.jobs import JobManager, JobError, report_progress
+
+class MemoryJobStore:
+    """Persistencia en memoria con la misma interfaz que JobStore."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def create(self, job):
+        self.rows[job.job_id] = {"id": job.job_id, "owner": job.owner, "state": job.state,
+                                 "worker": job.worker, "heartbeat_at": time.monotonic()}
+
+    def update(self, job):
+        self.rows[job.job_id].update(
+            state=job.state, progress=job.progress, result_path=job.result_path, expires_at=job.expires_at,
+            heartbeat_at=time.monotonic()
+        )
+
+    def heartbeat(self, worker):
+        for row in self.rows.values():
+            if row['worker'] == worker and row['state'] in ('queued', 'running'):
+                row['heartbeat_at'] = time.monotonic()
+
+    def get(self, job_id):
+        return self.rows.get(job_id)
+
+    def expired(self, now):
+        return [dict(row) for row in self.rows.values() if row.get('expires_at') and row['expires_at'] < now]
+
+    def delete(self, job_id):
+        del self.rows[job_id]
+
+    def mark_abandoned(self, lease_timeout):
+        for row in self.rows.values():
+            if row['state'] in ('queued', 'running') and row['heartbeat_at'] < time.monotonic() - lease_timeout:
+                row['state'] = 'failed'
+
+class TestJobs(unittest.TestCase):
+    """Pruebas de los trabajos asíncronos"""
+
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.store = MemoryJobStore()
+
+    def tearDown(self):
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def make_manager(self, runner, **kwargs):
+        return JobManager(runner, self.store, spool_dir=self.spool_dir, cleanup_interval=3600, **kwargs)
+
+    def wait(self, manager, job_id):
+        for _ in range(200):
+            _, status = manager.get(job_id)
+            if status['state'] not in ('queued', 'running'):
+                return status
+            time.sleep(0.01)
+        self.fail("El trabajo no terminó")
+
+    def test_result_is_spooled_and_read_in_chunks(self):
+        """El resultado se vuelca a disco y se puede leer por fragmentos"""
+        def runner(job):
+            report_progress(1, 2)
+            return json.dumps({"success": True, "data": ["ñandú"] * 100})
+
+        manager = self.make_manager(runner)
+        job = manager.submit('propietario', 'sql', 'select', {})
+        status = self.wait(manager, job.job_id)
+
+        self.assertEqual(status['state'], 'succeeded')
+        self.assertEqual(status['progress'], 1.0)
+        self.assertTrue(os.path.exists(self.store.rows[job.job_id]['result_path']))
+
+        chunks, offset, complete = [], 0, False
+        while not complete:
+            text, offset, complete = manager.read_result(job.job_id, offset, 64)
+            chunks.append(text)
+        self.assertEqual(json.loads(''.join(chunks))['data'][0], "ñandú")
+
+    def test_queue_is_bounded_and_queued_jobs_can_be_cancelled(self):
+        """El pool está acotado y un trabajo encolado cancelado no se ejecuta"""
+        release = threading.Event()
+        executed = []
+
+        def runner(job):
+            executed.append(job.job_id)
+            release.wait(5)
+            return json.dumps({"success": True})
+
+        manager = self.make_manager(runner, max_workers=1, max_queued=1)
+        first = manager.submit('a', 'sql', 'join', {})
+        second = manager.submit('a', 'sql', 'join', {})
+        with self.assertRaises(JobError):
+            manager.submit('b', 'sql', 'join', {})
+
+        self.assertEqual(manager.cancel(second.job_id)['state'], 'cancelled')
+        release.set()
+        self.assertEqual(self.wait(manager, first.job_id)['state'], 'succeeded')
+        self.assertEqual(executed, [first.job_id])
+
+    def test_failed_jobs_report_error_and_expire(self):
+        """Los errores de la operación quedan en el estado y los trabajos caducan"""
+        manager = self.make_manager(lambda job: json.dumps({"error": "Tabla inexistente"}), result_ttl=0)
+        job = manager.submit('propietario', 'nosql', 'findDocument', {})
+        status = self.wait(manager, job.job_id)
+
+        self.assertEqual(status['state'], 'failed')
+        self.assertEqual(status['message'], "Tabla inexistente")
+        with self.assertRaises(JobError):
+            manager.read_result(job.job_id)
+
+        time.sleep(0.01)
+        manager.cleanup()
+        self.assertNotIn(job.job_id, self.store.rows)
+        with self.assertRaises(JobError):
+            manager.get(job.job_id)
+
+    def test_only_jobs_with_expired_leases_are_marked_interrupted(self):
+        """Un proceso nuevo no da por fallidos los trabajos que otro proceso vivo sigue ejecutando"""
+        release = threading.Event()
+
+        def runner(job):
+            release.wait(5)
+            return json.dumps({"success": True})
+
+        first = self.make_manager(runner, lease_timeout=0.2)
+        running = first.submit('a', 'sql', 'importTable', {"database_name": "ventas"})
+        self.assertEqual(running.as_dict()['database'], "ventas")
+        # Trabajo de un proceso que cayó sin terminarlo
+        self.store.rows['huerfano'] = {"id": 'huerfano', "owner": 'b', "state": 'running',
+                                       "worker": 'otro:1:caido', "heartbeat_at": time.monotonic() - 10}
+
+        second = self.make_manager(runner, lease_timeout=0.2)
+        self.assertNotEqual(second.worker_id, first.worker_id)
+        time.sleep(0.3)
+        first.heartbeat()
+        second.recover()
+        self.assertEqual(self.store.rows['huerfano']['state'], 'failed')
+        self.assertEqual(self.store.rows[running.job_id]['state'], 'running')
+
+        release.set()
+        self.assertEqual(self.wait(first, running.job_id)['state'], 'succeeded')
+
+if __name__ == '__main__':
+    unittest.main()
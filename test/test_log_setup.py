@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import queue
+import logging
+import unittest
+import logging.handlers
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.log_setup import (DroppingQueueHandler, RateLimitFilter, SuccessSamplingFilter, JsonFormatter,
+                             TextFormatter)
+
+def make_record(name='soap_service', level=logging.INFO, msg='mensaje', args=()):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+class ListHandler(logging.Handler):
+    """Guarda las líneas formateadas por el listener."""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+class TestLogSetup(unittest.TestCase):
+    """Pruebas del logging con cola, límites y formato JSON"""
+
+    def test_rate_limit_per_logger(self):
+        """Cada logger tiene su propio límite y se informa de los mensajes suprimidos"""
+        limit = RateLimitFilter(rate=0.001, burst=2)
+        passed = [limit.filter(make_record()) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(limit.filter(make_record(name='otro')))
+        # Los avisos y errores no se limitan ni consumen tokens
+        self.assertTrue(limit.filter(make_record(level=logging.WARNING)))
+        self.assertTrue(limit.filter(make_record(level=logging.ERROR)))
+        self.assertEqual(limit._buckets['soap_service'][2], 3)
+
+        # Al recuperar un token el siguiente mensaje indica cuántos se descartaron
+        tokens, updated, suppressed = limit._buckets['soap_service']
+        limit._buckets['soap_service'] = (1, updated, suppressed)
+        record = make_record()
+        self.assertTrue(limit.filter(record))
+        self.assertEqual(record.suppressed, 3)
+        self.assertIn("3 mensajes suprimidos", TextFormatter().format(record))
+
+    def test_success_sampling_keeps_warnings(self):
+        """Los mensajes informativos se muestrean; los avisos y errores siempre pasan"""
+        sampling = SuccessSamplingFilter(rate=0)
+        self.assertFalse(sampling.filter(make_record(level=logging.INFO)))
+        self.assertFalse(sampling.filter(make_record(level=logging.DEBUG)))
+        self.assertTrue(sampling.filter(make_record(level=logging.WARNING)))
+        self.assertTrue(sampling.filter(make_record(level=logging.ERROR)))
+        self.assertTrue(SuccessSamplingFilter(rate=1).filter(make_record()))
+
+    def test_queue_writes_truncated_json_lines(self):
+        """El listener escribe JSON con los campos extra y los argumentos grandes acortados"""
+        log_queue = queue.Queue()
+        handler = DroppingQueueHandler(log_queue)
+        output = ListHandler()
+        output.setFormatter(JsonFormatter('app', limit=100))
+        listener = logging.handlers.QueueListener(log_queue, output)
+
+        data_json = json.dumps([{"id": i, "nombre": "x" * 50} for i in range(10000)])
+        record = make_record(msg='Insertando %s en %s', args=(data_json, 'alumnos'))
+        record.operation = 'insert'
+        handler.handle(record)
+        # El registro se encola sin formatear
+        self.assertIsNone(getattr(log_queue.queue[0], 'message', None))
+
+        listener.start()
+        listener.stop()
+        entry = json.loads(output.lines[0])
+        self.assertEqual((entry["service"], entry["logger"], entry["operation"]), ('app', 'soap_service', 'insert'))
+        self.assertLess(len(entry["message"]), 300)
+        self.assertIn("caracteres más", entry["message"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import base64
+import unittest
+import xml.etree.ElementTree as ET
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.mtom import (Attachment, MtomError, XOP_NAMESPACE, parse_mtom, resolve_include, build_multipart,
+                        request_context, resolve_attachment_values)
+
+ENVELOPE = (b'<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+            b'<soapenv:Body><sql:insert xmlns:sql="http://services.soadb.example.com/sql">'
+            b'<data_json><xop:Include xmlns:xop="http://www.w3.org/2004/08/xop/include" href="cid:datos%40cliente"/>'
+            b'</data_json></sql:insert></soapenv:Body></soapenv:Envelope>')
+
+def multipart(parts, boundary="limite"):
+    chunks = []
+    for headers, data in parts:
+        chunks.append(f"--{boundary}\r\n".encode('ascii'))
+        chunks.extend(f"{name}: {value}\r\n".encode('ascii') for name, value in headers.items())
+        chunks.extend([b"\r\n", data, b"\r\n"])
+    chunks.append(f"--{boundary}--\r\n".encode('ascii'))
+    return b"".join(chunks)
+
+class TestMtom(unittest.TestCase):
+    """Pruebas de los mensajes MTOM/XOP"""
+
+    def test_parse_request_and_resolve_include(self):
+        """El sobre raíz se elige por start y los xop:Include se resuelven por cid"""
+        body = multipart([
+            ({"Content-Type": "application/x-ndjson", "Content-ID": "<datos@cliente>"}, b'{"nombre": "Ana"}\n\n{"nombre": "Luis"}\n'),
+            ({"Content-Type": 'application/xop+xml; type="text/xml"', "Content-ID": "<raiz@cliente>"}, ENVELOPE),
+            ({"Content-Type": "image/png", "Content-ID": "<foto@cliente>", "Content-Transfer-Encoding": "base64"},
+             base64.b64encode(b"\x89PNG\x00\xff"))
+        ])
+        envelope, attachments = parse_mtom(body, 'multipart/related; type="application/xop+xml"; boundary="limite"; start="<raiz@cliente>"')
+        self.assertEqual(envelope, ENVELOPE)
+        self.assertEqual(set(attachments), {"datos@cliente", "foto@cliente"})
+        self.assertEqual(attachments["foto@cliente"].as_parameter(), b"\x89PNG\x00\xff")
+
+        data_json = ET.fromstring(envelope).find('.//data_json')
+        self.assertEqual(resolve_include(data_json, attachments), '[{"nombre": "Ana"},{"nombre": "Luis"}]')
+        self.assertIsNone(resolve_include(ET.fromstring('<fields>*</fields>'), attachments))
+        with self.assertRaises(MtomError):
+            resolve_include(ET.fromstring(f'<a><Include xmlns="{XOP_NAMESPACE}" href="cid:otro"/></a>'), attachments)
+
+        with request_context(attachments):
+            self.assertEqual(resolve_attachment_values([{"foto": {"$attachment": "cid:foto@cliente"}, "n": 1}]),
+                             [{"foto": b"\x89PNG\x00\xff", "n": 1}])
+
+    def test_malformed_messages(self):
+        """Se rechazan los mensajes sin boundary, sin partes o truncados"""
+        with self.assertRaises(MtomError):
+            parse_mtom(b"", "multipart/related")
+        with self.assertRaises(MtomError):
+            parse_mtom(b"sin delimitadores", 'multipart/related; boundary="limite"')
+        truncated = multipart([({"Content-ID": "<raiz>"}, ENVELOPE)]).rsplit(b"--limite--", 1)[0]
+        with self.assertRaises(MtomError):
+            parse_mtom(truncated, 'multipart/related; boundary="limite"')
+        with self.assertRaises(MtomError):
+            parse_mtom(b"--limite\r\nsin cabeceras\r\n--limite--\r\n", 'multipart/related; boundary="limite"')
+
+    def test_build_multipart_round_trip(self):
+        """La respuesta multipart se puede volver a dividir en el sobre y sus partes"""
+        parts = [Attachment("part1@soadb", "application/json", b'{"success": true}'),
+                 Attachment("part2@soadb", "application/octet-stream", b"\r\n--binario\x00")]
+        body, content_type = build_multipart(b"<soapenv:Envelope/>", parts)
+        self.assertTrue(content_type.startswith('multipart/related; type="application/xop+xml"'))
+
+        envelope, attachments = parse_mtom(body, content_type)
+        self.assertEqual(envelope, b"<soapenv:Envelope/>")
+        self.assertEqual(attachments["part1@soadb"].as_parameter(), '{"success": true}')
+        self.assertEqual(attachments["part2@soadb"].data, b"\r\n--binario\x00")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+import os
+import sys
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.placement import (HashRing, PlacementDirectory, PlacementError, parse_clusters, migrate_database,
+                             STATE_ACTIVE, STATE_MIGRATING)
+
+class ControlConnection:
+    """Conexión mínima que responde a las consultas del directorio."""
+
+    def __init__(self, placements=None, counts=None):
+        self.placements = placements or {}
+        self.counts = counts or []
+        self.queries = 0
+        self._result = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.queries += 1
+        if sql.startswith("SELECT cluster, state"):
+            row = self.placements.get(params[0])
+            self._result = [row] if row else []
+        elif "INSERT INTO database_placement" in sql:
+            self.placements[params[0]] = (params[1], params[2])
+        else:
+            self._result = list(self.counts)
+
+    def commit(self):
+        pass
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+class MySQLServer:
+    """
+    Servidor MySQL simulado para las migraciones: tablas en memoria, bloqueo
+    de escritura y escritores que esperan a que se libere.
+    """
+
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+        self.locked = False
+        # Sesiones que esperan al bloqueo: id -> fila que insertarán al liberarse
+        self.blocked_writers = {}
+        self.killed = []
+        self.dropped = False
+
+    def connect(self):
+        return ServerConnection(self)
+
+    def release(self):
+        self.locked = False
+        for session_id, (table, row) in list(self.blocked_writers.items()):
+            self.tables[table].append(row)
+        self.blocked_writers.clear()
+
+class ServerConnection:
+    def __init__(self, server):
+        self.server = server
+        self.description = None
+        self._result = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        server = self.server
+        sql = " ".join(sql.split())
+        self._result = []
+        if sql.startswith("SHOW FULL TABLES"):
+            self._result = [(table, 'BASE TABLE') for table in server.tables]
+        elif sql.startswith("FLUSH TABLES"):
+            server.locked = True
+        elif sql.startswith("SHOW CREATE TABLE"):
+            table = sql.split('`')[3]
+            self._result = [(table, f"CREATE TABLE `{table}` (id INT)")]
+        elif sql.startswith("CREATE TABLE"):
+            server.tables[sql.split('`')[1]] = []
+        elif sql.startswith("SELECT * FROM"):
+            table = sql.split('`')[3]
+            self.description = [('id',)]
+            self._result = list(server.tables[table])
+        elif sql.startswith("SELECT COUNT(*)"):
+            self._result = [(len(server.tables[sql.split('`')[1]]),)]
+        elif sql.startswith("CHECKSUM TABLE"):
+            names = sql.split('`')
+            self._result = [(f"{names[1]}.{names[i]}", hash(tuple(server.tables[names[i]])))
+                            for i in range(3, len(names), 4)]
+        elif "information_schema.PROCESSLIST" in sql:
+            self._result = [(session_id,) for session_id in server.blocked_writers]
+        elif sql.startswith("KILL CONNECTION"):
+            session_id = int(sql.split()[-1])
+            server.blocked_writers.pop(session_id)
+            server.killed.append(session_id)
+        elif sql.startswith("UNLOCK TABLES"):
+            server.release()
+        elif sql.startswith("DROP DATABASE"):
+            server.dropped = True
+            server.tables.clear()
+
+    def executemany(self, sql, rows):
+        self.server.tables[sql.split('`')[1]].extend(rows)
+
+    def fetchmany(self, size):
+        batch, self._result = self._result[:size], self._result[size:]
+        return batch
+
+    def fetchall(self):
+        rows, self._result = self._result, []
+        return rows
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+class TestPlacement(unittest.TestCase):
+    """Pruebas del directorio de ubicación de bases de datos"""
+
+    def test_consistent_hash_moves_few_databases_when_adding_a_cluster(self):
+        """Al añadir un servidor solo cambia de ubicación una parte de las bases de datos"""
+        names = [f"tenant{i}" for i in range(500)]
+        before = HashRing(['default', 'shard1'])
+        after = HashRing(['default', 'shard1', 'shard2'])
+
+        moved = [name for name in names if before.get(name) != after.get(name)]
+        self.assertTrue(all(after.get(name) == 'shard2' for name in moved))
+        self.assertLess(len(moved), len(names) / 2)
+        self.assertEqual(len({before.get(name) for name in names}), 2)
+
+    def test_least_loaded_policy_picks_cluster_with_fewest_databases(self):
+        """La política least_loaded elige el servidor con menos bases de datos"""
+        clusters = parse_clusters('shard1=mysql2:3307,shard2=mysql3', 'mysql', 3306)
+        directory = PlacementDirectory(clusters, policy='least_loaded')
+        conn = ControlConnection(counts=[('default', 4), ('shard1', 1)])
+
+        self.assertEqual(directory.choose(conn, 'nueva').name, 'shard2')
+        self.assertEqual(clusters['shard1'].port, 3307)
+        self.assertEqual(clusters['shard2'].port, 3306)
+
+    def test_lookup_uses_cache_except_for_writes(self):
+        """Las lecturas usan la ubicación cacheada y las escrituras consultan el directorio"""
+        directory = PlacementDirectory(parse_clusters('shard1=mysql2'), cache_ttl=60)
+        conn = ControlConnection(placements={'ventas': ('shard1', 'active')})
+
+        self.assertEqual(directory.lookup(conn, 'ventas')[0].name, 'shard1')
+        self.assertEqual(directory.lookup(conn, 'otra')[0].name, 'default')
+        conn.placements['ventas'] = ('shard1', STATE_MIGRATING)
+        self.assertEqual(directory.lookup(conn, 'ventas')[1], 'active')
+        self.assertEqual(directory.lookup(conn, 'ventas', fresh=True)[1], STATE_MIGRATING)
+        self.assertEqual(conn.queries, 3)
+        # La caché se consulta sin conexión a la base de control
+        self.assertEqual(directory.cached('ventas')[1], STATE_MIGRATING)
+        self.assertIsNone(directory.cached('desconocida'))
+
+    def migrate(self, source, target, control):
+        clusters = parse_clusters('shard1=mysql2')
+        directory = PlacementDirectory(clusters, cache_ttl=60)
+        return migrate_database(directory, control, source.connect(), target.connect(), 'ventas',
+                                clusters['default'], clusters['shard1'], verify_delay=0)
+
+    def test_migration_fences_writers_waiting_for_the_lock(self):
+        """Un escritor que resolvió la ubicación antes de migrar no confirma en el origen tras la copia"""
+        source = MySQLServer({'pedidos': [(1,), (2,)], 'clientes': [(1,)]})
+        target = MySQLServer()
+        # El escritor vio la base de datos activa y espera al bloqueo de escritura
+        source.blocked_writers[7] = ('pedidos', (3,))
+        control = ControlConnection()
+
+        copied, checksums = self.migrate(source, target, control)
+        self.assertEqual(copied, {'pedidos': 2, 'clientes': 1})
+        self.assertEqual(source.killed, [7])
+        self.assertEqual(source.tables, target.tables)
+        self.assertFalse(source.locked)
+        self.assertEqual(control.placements['ventas'], ('shard1', STATE_ACTIVE))
+
+    def test_migration_is_undone_if_the_source_changes_after_the_copy(self):
+        """Si el origen cambia tras liberar el bloqueo la ubicación no se cambia y la copia se borra"""
+        source = MySQLServer({'pedidos': [(1,)]})
+        target = MySQLServer()
+        control = ControlConnection()
+        # Escritor que se conectó después del cierre de sesiones: escribe al liberar el bloqueo
+        release = source.release
+        source.release = lambda: (source.tables['pedidos'].append((2,)), release())
+
+        with self.assertRaises(PlacementError):
+            self.migrate(source, target, control)
+        self.assertTrue(target.dropped)
+        self.assertEqual(source.tables['pedidos'], [(1,), (2,)])
+        self.assertEqual(control.placements['ventas'], ('default', STATE_ACTIVE))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.replicas import ReplicaRouter, parse_replicas
+
+class TestReplicaRouter(unittest.TestCase):
+    """Pruebas del enrutamiento de lecturas a réplicas"""
+
+    def make_router(self, lags, ryw_window=0.2):
+        def probe(replica):
+            lag = lags[replica.host]
+            if isinstance(lag, Exception):
+                raise lag
+            return lag
+        replicas = parse_replicas(','.join(f"{host}:3306" for host in lags))
+        return ReplicaRouter(replicas, max_lag=5, check_interval=3600, ryw_window=ryw_window, lag_probe=probe)
+
+    def test_reads_are_spread_over_usable_replicas(self):
+        """Se descartan réplicas caídas, detenidas o con demasiado retraso y el resto se turnan"""
+        router = self.make_router({
+            'r1': 3.0, 'r2': 0.0, 'r3': None, 'r4': 60.0, 'r5': OSError("sin conexión"), 'r6': 0.0
+        })
+        chosen = [router.choose('sesion').host for _ in range(6)]
+        self.assertEqual(sorted(chosen), ['r1', 'r1', 'r2', 'r2', 'r6', 'r6'])
+        self.assertFalse(router.status()["replicas"]["r5:3306"]["healthy"])
+
+        router.mark_down(router.replicas[1], "error")
+        self.assertEqual({router.choose('sesion').host for _ in range(4)}, {'r1', 'r6'})
+
+    def test_session_reads_primary_after_writing(self):
+        """Tras escribir, la sesión lee del primario durante la ventana configurada"""
+        router = self.make_router({'r1': 0.0})
+        router.note_write('escritora')
+
+        self.assertIsNone(router.choose('escritora'))
+        self.assertEqual(router.choose('otra').host, 'r1')
+        time.sleep(0.25)
+        self.assertEqual(router.choose('escritora').host, 'r1')
+
+    def test_without_replicas_everything_goes_to_primary(self):
+        """Sin MYSQL_REPLICAS el comportamiento no cambia"""
+        router = ReplicaRouter([])
+        self.assertIsNone(router.choose('sesion'))
+        self.assertFalse(router.in_write_window('sesion'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.resilience import BackendUnavailable, CircuitBreaker, Bulkhead
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Pruebas del circuit breaker y el bulkhead"""
+
+    def test_opens_after_failures_and_recovers_with_one_trial(self):
+        """Tras el umbral de fallos rechaza llamadas y luego deja pasar una sola de prueba"""
+        breaker = CircuitBreaker('mysql', failure_threshold=2, reset_timeout=0.2, slow_call_seconds=10)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        with self.assertRaises(BackendUnavailable) as context:
+            breaker.before_call()
+        self.assertEqual(context.exception.retry_after, 1)
+        self.assertEqual(breaker.status()["state"], 'open')
+
+        time.sleep(0.25)
+        breaker.before_call()
+        with self.assertRaises(BackendUnavailable):
+            breaker.before_call()
+        breaker.record_success(0.01)
+        self.assertEqual(breaker.status()["state"], 'closed')
+
+    def test_slow_calls_count_as_failures(self):
+        """Las llamadas más lentas que el umbral abren el circuito"""
+        breaker = CircuitBreaker('mongodb', failure_threshold=1, reset_timeout=30, slow_call_seconds=0.5)
+        breaker.record_success(2.0)
+        self.assertEqual(breaker.status()["slow_calls"], 1)
+        with self.assertRaises(BackendUnavailable):
+            breaker.check()
+
+    def test_bulkhead_rejects_when_full(self):
+        """Un backend saturado rechaza rápido sin bloquear al resto"""
+        bulkhead = Bulkhead('mongodb', max_concurrent=1, max_wait=0.05)
+        bulkhead.acquire()
+        with self.assertRaises(BackendUnavailable):
+            bulkhead.acquire()
+
+        other = Bulkhead('mysql', max_concurrent=1, max_wait=0.05)
+        other.acquire()
+        other.release()
+        bulkhead.release()
+        self.assertEqual(bulkhead.status(), {"active": 0, "max_concurrent": 1, "rejected": 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import time
+import threading
+import unittest
+import importlib.util
+
+# El proxy tiene su propio paquete utils: cargar el módulo por ruta
+MODULE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'proxy', 'app', 'utils',
+                           'response_cache.py')
+spec = importlib.util.spec_from_file_location('proxy_response_cache', MODULE_PATH)
+response_cache = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(response_cache)
+
+def envelope(token, where_json):
+    return f"""<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+        <soap:Body><sql:select xmlns:sql="http://services.soadb.example.com/sql">
+            <sql:session_token>{token}</sql:session_token>
+            <sql:database_name>escuela</sql:database_name>
+            <sql:where_json>{where_json}</sql:where_json>
+        </sql:select></soap:Body></soap:Envelope>""".encode('utf-8')
+
+class TestResponseCache(unittest.TestCase):
+    """Pruebas de la caché de respuestas del proxy"""
+
+    def test_key_ignores_token_and_json_key_order(self):
+        """Dos sesiones del mismo rol con parámetros equivalentes comparten la entrada"""
+        cache = response_cache.ResponseCache()
+        first = response_cache.parse_request(envelope('t1', '{"a": 1, "b": 2}'))
+        second = response_cache.parse_request(envelope('t2', '{"b": 2, "a": 1}'))
+
+        self.assertEqual((first.service, first.operation, first.token), ('sql', 'select', 't1'))
+        self.assertEqual(cache.make_key(first, 'viewer'), cache.make_key(second, 'viewer'))
+        self.assertNotEqual(cache.make_key(first, 'viewer'), cache.make_key(first, 'admin'))
+        self.assertFalse(first.streaming)
+        streamed = response_cache.parse_request(envelope('t1', '{}').replace(
+            b'</sql:where_json>', b'</sql:where_json><sql:streaming>True</sql:streaming>'))
+        self.assertTrue(streamed.streaming)
+
+    def test_lru_bound_and_invalidation(self):
+        """Se expulsan las entradas menos usadas y las escrituras invalidan su base de datos"""
+        cache = response_cache.ResponseCache(max_entries=2)
+        for key, database in (('a', 'sql:escuela'), ('b', 'sql:otra')):
+            cache.put(key, response_cache.CachedResponse(200, {}, b'x', database=database), ttl=5)
+        cache.get('a')
+        cache.put('c', response_cache.CachedResponse(200, {}, b'x', database='admin:*'), ttl=5)
+
+        self.assertIsNone(cache.get('b'))
+        cache.invalidate('sql:escuela')
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('c'))
+
+    def test_role_is_not_remembered_past_session_expiry(self):
+        """El rol de un token se olvida al caducar la sesión aunque role_ttl sea mayor"""
+        cache = response_cache.ResponseCache(role_ttl=30)
+        cache.remember_role('t1', 'viewer', expires_in=0)
+        self.assertIsNone(cache.role_for('t1'))
+
+        cache.remember_role('t2', 'viewer', expires_in=1)
+        self.assertEqual(cache.role_for('t2'), 'viewer')
+        role, expires_at = cache._roles['t2']
+        self.assertLessEqual(expires_at - time.monotonic(), 1)
+
+    def test_concurrent_identical_requests_are_coalesced(self):
+        """50 peticiones idénticas concurrentes producen una sola llamada"""
+        cache = response_cache.ResponseCache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.3)
+            return response_cache.CachedResponse(200, {}, b'<ok/>')
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.fetch('k', loader))) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 50)
+        self.assertTrue(all(r.content == b'<ok/>' for r in results))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import decimal
+import datetime
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from mysql.connector.constants import FieldType
+from utils.serializer import RowSerializer, json_with_rows, documents_to_format
+
+def column(name, field_type):
+    return (name, field_type, None, None, None, None, 1, 0)
+
+class TestRowSerializer(unittest.TestCase):
+    """Pruebas del serializador de filas por tipo de columna"""
+
+    def test_types_match_previous_output_and_handle_decimal(self):
+        """Fechas, binarios y nulos se serializan como antes y DECIMAL como número exacto"""
+        description = [
+            column('id', FieldType.LONG),
+            column('nombre', FieldType.VAR_STRING),
+            column('foto', FieldType.BLOB),
+            column('fecha', FieldType.DATE),
+            column('hora', FieldType.TIME),
+            column('promedio', FieldType.NEWDECIMAL)
+        ]
+        row = (1, 'María', b'\x01\xff', datetime.date(2022, 9, 1),
+               datetime.timedelta(hours=8, minutes=30), decimal.Decimal('9.20'))
+        text, count = RowSerializer(description, use_orjson=False).dumps_rows([row, (2, None, None, None, None, None)])
+
+        self.assertEqual(count, 2)
+        data = json.loads(text, parse_float=decimal.Decimal)
+        self.assertEqual(data[0], {
+            "id": 1, "nombre": "María", "foto": "01ff", "fecha": "2022-09-01",
+            "hora": "8:30:00", "promedio": decimal.Decimal('9.20')
+        })
+        self.assertEqual(data[1]["nombre"], None)
+
+    def test_duplicate_columns_behave_like_dictionary_cursor(self):
+        """En un JOIN con columnas repetidas gana el último valor"""
+        description = [column('id', FieldType.LONG), column('nombre', FieldType.VAR_STRING),
+                       column('id', FieldType.LONG)]
+        serializer = RowSerializer(description, use_orjson=False)
+
+        self.assertEqual(serializer.columns, ['id', 'nombre'])
+        self.assertEqual(json.loads(serializer.dumps_row((1, 'a', 7))), {"id": 7, "nombre": "a"})
+
+    def test_rows_and_columnar_formats(self):
+        """Los formatos rows y columnar envían los nombres de columna una sola vez"""
+        description = [column('id', FieldType.LONG), column('promedio', FieldType.NEWDECIMAL)]
+        rows = [(1, decimal.Decimal('8.5')), (2, None)]
+        serializer = RowSerializer(description, use_orjson=False)
+
+        text, count = serializer.dumps_rows(rows, 'rows')
+        self.assertEqual((json.loads(text), count), ([[1, 8.5], [2, None]], 2))
+
+        text, count = serializer.dumps_rows(rows, 'columnar')
+        self.assertEqual(json.loads(text), {"id": [1, 2], "promedio": [8.5, None]})
+        self.assertEqual(json.loads(serializer.dumps_rows([], 'columnar')[0]), {"id": [], "promedio": []})
+
+        columns, data = documents_to_format([{"a": 1}, {"b": 2, "a": 3}], 'rows')
+        self.assertEqual((columns, data), (["a", "b"], [[1, None], [3, 2]]))
+
+    def test_json_with_rows(self):
+        """Los resultados ya serializados se insertan en la respuesta sin recodificarlos"""
+        text = json_with_rows({"success": True, "count": 1}, "data", '[{"id": 1}]')
+        self.assertEqual(json.loads(text), {"success": True, "count": 1, "data": [{"id": 1}]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.singleflight import SingleFlight, make_key, fcntl
+
+def run_concurrently(count, target):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+class TestSingleFlight(unittest.TestCase):
+    """Pruebas de la agrupación de lecturas idénticas"""
+
+    def test_key_ignores_token_and_json_key_order(self):
+        """La clave depende de la operación, los parámetros normalizados y el rol"""
+        first = make_key('sql', 'select', {'session_token': 'a', 'where_json': '{"x": 1, "y": 2}'}, 'viewer')
+        second = make_key('sql', 'select', {'session_token': 'b', 'where_json': '{"y": 2, "x": 1}'}, 'viewer')
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, make_key('sql', 'select', {'where_json': '{"x": 1, "y": 2}'}, 'admin'))
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Las llamadas concurrentes esperan a la primera y comparten sus bytes"""
+        flight = SingleFlight(ipc_dir='')
+        calls = []
+
+        def execute():
+            calls.append(1)
+            time.sleep(0.3)
+            return b'<respuesta/>'
+
+        results = run_concurrently(20, lambda: flight.do('clave', execute))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sum(1 for _, shared in results if shared), 19)
+        self.assertTrue(all(value == b'<respuesta/>' for value, _ in results))
+
+    @unittest.skipIf(fcntl is None, "fcntl no disponible")
+    def test_workers_share_results_through_files(self):
+        """Dos workers con el mismo directorio IPC ejecutan la lectura una sola vez"""
+        with tempfile.TemporaryDirectory() as directory:
+            workers = [SingleFlight(ipc_dir=directory), SingleFlight(ipc_dir=directory)]
+            calls = []
+
+            def execute():
+                calls.append(1)
+                time.sleep(0.3)
+                return b'<respuesta/>'
+
+            results = []
+            threads = [threading.Thread(target=lambda w=w: results.append(w.do('clave', execute)))
+                       for w in workers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(sorted(shared for _, shared in results), [False, True])
+
+            # Una lectura posterior no reutiliza el resultado anterior
+            self.assertEqual(workers[0].do('clave', execute), (b'<respuesta/>', False))
+
+if __name__ == '__main__':
+    unittest.main()
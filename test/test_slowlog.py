@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+import logging
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.slowlog import SlowOperationLog, DroppingQueueHandler, phase, current_record
+
+class ListHandler(logging.Handler):
+    """Guarda las líneas escritas por el listener."""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(json.loads(self.format(record)))
+
+def make_log(**options):
+    output = ListHandler()
+    log = SlowOperationLog(output=output, **options)
+    return log, output
+
+class TestSlowOperationLog(unittest.TestCase):
+    """Pruebas del registro de operaciones lentas"""
+
+    def test_slow_operation_is_logged_with_phases(self):
+        """Una operación lenta se registra con sus fases, tamaños y filas, sin el token"""
+        log, output = make_log(threshold_ms=5, sample_rate=1, fast_sample_rate=0)
+        record = log.start('sql', 'select', {"session_token": "secreto", "database_name": "escuela", "table_name": "alumnos"}, 120)
+        with phase('session'):
+            pass
+        with record.phase('execute'):
+            time.sleep(0.01)
+        record.set_result('{"success": true, "database": "escuela", "count": 42, "data": []}')
+        record.response_bytes = 900
+        log.finish(200)
+        log.close()
+
+        self.assertIsNone(current_record())
+        entry = output.lines[0]
+        self.assertTrue(entry["slow"])
+        self.assertEqual((entry["database"], entry["target"], entry["rows"]), ("escuela", "alumnos", 42))
+        self.assertEqual((entry["request_bytes"], entry["response_bytes"]), (120, 900))
+        self.assertEqual(set(entry["phases_ms"]), {"session", "execute"})
+        self.assertGreaterEqual(entry["phases_ms"]["execute"], 10)
+        self.assertNotIn("secreto", json.dumps(entry))
+
+    def test_sampling(self):
+        """Las operaciones rápidas solo se registran según su tasa de muestreo"""
+        log, output = make_log(threshold_ms=1000, sample_rate=1, fast_sample_rate=0)
+        for _ in range(20):
+            log.start('nosql', 'findDocument', {})
+            log.finish()
+        log.close()
+        self.assertEqual(output.lines, [])
+        self.assertEqual(log.stats()["slow_operations"], 0)
+
+        log, output = make_log(threshold_ms=1000, sample_rate=1, fast_sample_rate=1)
+        log.start('nosql', 'findDocument', {"collection_name": "notas"})
+        log.finish()
+        log.close()
+        self.assertEqual(output.lines[0]["target"], "notas")
+        self.assertFalse(output.lines[0]["slow"])
+
+        # Fuera de una petición las fases no hacen nada
+        with phase('session') as record:
+            self.assertIsNone(record)
+
+    def test_full_queue_drops_records(self):
+        """Si la cola está llena el registro se descarta sin bloquear"""
+        import queue
+        handler = DroppingQueueHandler(queue.Queue(1))
+        record = logging.LogRecord('x', logging.INFO, __file__, 1, {"a": 1}, None, None)
+        handler.handle(record)
+        handler.handle(record)
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(handler.queue.qsize(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.sql_builder import parse_aggregates, build_aggregate_query
+from utils.where_compiler import WhereError
+
+COLUMNS = {"id", "carrera", "activo", "edad", "promedio"}
+
+class TestAggregateBuilder(unittest.TestCase):
+    """Pruebas de la generación de consultas de agregación"""
+
+    def test_legacy_single_aggregate_puts_where_before_group_by(self):
+        """El formato anterior genera WHERE antes de GROUP BY"""
+        aggregates = parse_aggregates(operation="sum", field="edad")
+        sql, params = build_aggregate_query(
+            "estudiantes", aggregates, group_by="carrera",
+            where_clause=" WHERE `activo` = %s", where_values=[True], columns=COLUMNS
+        )
+        self.assertEqual(
+            sql,
+            "SELECT `carrera`, SUM(`edad`) AS `result` FROM `estudiantes` "
+            "WHERE `activo` = %s GROUP BY `carrera`"
+        )
+        self.assertEqual(params, [True])
+
+    def test_multiple_aggregates_with_having_order_and_limit(self):
+        """Varias agregaciones, HAVING, ORDER BY y LIMIT en una sola sentencia"""
+        aggregates = parse_aggregates(aggregates_json="""[
+            {"function": "COUNT", "field": "*", "alias": "total"},
+            {"function": "AVG", "field": "promedio", "alias": "media"},
+            {"function": "MAX", "field": "edad"}
+        ]""")
+        sql, params = build_aggregate_query(
+            "estudiantes", aggregates, group_by='["carrera", "activo"]',
+            having={"total": {"$gt": 1}}, order_by="media DESC, carrera", limit="10",
+            columns=COLUMNS
+        )
+        self.assertEqual(
+            sql,
+            "SELECT `carrera`, `activo`, COUNT(*) AS `total`, AVG(`promedio`) AS `media`, "
+            "MAX(`edad`) AS `max_edad` FROM `estudiantes` GROUP BY `carrera`, `activo` "
+            "HAVING `total` > %s ORDER BY `media` DESC, `carrera` ASC LIMIT 10"
+        )
+        self.assertEqual(params, [1])
+
+    def test_invalid_inputs_rejected(self):
+        """Funciones, columnas y ordenaciones no válidas se rechazan"""
+        with self.assertRaises(WhereError):
+            parse_aggregates(operation="median", field="edad")
+        with self.assertRaises(WhereError):
+            build_aggregate_query("estudiantes", parse_aggregates(operation="sum", field="sueldo"),
+                                  columns=COLUMNS)
+        with self.assertRaises(WhereError):
+            build_aggregate_query("estudiantes", parse_aggregates(operation="count", field="*"),
+                                  order_by="edad", columns=COLUMNS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.tracing import (Tracer, InMemoryExporter, FileExporter, MongoTracingListener, parse_traceparent,
+                           trace_mysql_connection, current_span, inject, STATUS_ERROR)
+
+PARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+class FakeConnection:
+    """Conexión MySQL mínima: los cursores ejecutan con cmd_query."""
+
+    def __init__(self):
+        self.queries = []
+
+    def cmd_query(self, query):
+        self.queries.append(query)
+        return {"columns": []}
+
+class FailingConnection(FakeConnection):
+    """Conexión cuyas sentencias fallan con un mensaje que cita el valor."""
+
+    def cmd_query(self, query):
+        super().cmd_query(query)
+        raise ValueError("Duplicate entry 'secreto' for key 'PRIMARY'")
+
+class TestTracing(unittest.TestCase):
+    """Pruebas de las trazas distribuidas"""
+
+    def test_traceparent_and_head_sampling(self):
+        """El traceparent entrante decide el muestreo; sin él se aplica la tasa local"""
+        self.assertEqual(parse_traceparent(PARENT), ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True))
+        self.assertIsNone(parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01"))
+        self.assertIsNone(parse_traceparent("basura"))
+
+        exporter = InMemoryExporter()
+        tracer = Tracer('app', exporter, sample_rate=1)
+        span = tracer.start_trace('soap sql.select', PARENT.replace('-01', '-00'))
+        self.assertFalse(span.sampled)
+        self.assertEqual(span.trace_id, "4bf92f3577b34da6a3ce929d0e0e4736")
+        # Las peticiones no muestreadas propagan la decisión sin crear spans hijos
+        with tracer.span('session') as child:
+            self.assertIsNone(child)
+        self.assertTrue(inject({})['traceparent'].endswith('-00'))
+        tracer.end_trace(200)
+
+        tracer = Tracer('app', exporter, sample_rate=0)
+        self.assertFalse(tracer.start_trace('soap sql.select').sampled)
+        tracer.end_trace(200)
+        tracer.flush()
+        self.assertEqual(exporter.spans(), [])
+        self.assertIsNone(current_span())
+
+    def test_spans_for_phases_and_database_calls(self):
+        """La traza incluye las fases y los comandos de MySQL y MongoDB como hijos"""
+        exporter = InMemoryExporter()
+        tracer = Tracer('app', exporter, sample_rate=0)
+        root = tracer.start_trace('soap sql.select', PARENT, {"soap.operation": "select"})
+
+        conn = trace_mysql_connection(FakeConnection(), 'mysql', 'escuela')
+        with tracer.span('execute') as execute:
+            conn.cmd_query("SELECT * FROM alumnos")
+            listener = MongoTracingListener()
+            event = SimpleNamespace(command_name='find', command={"find": "notas"}, database_name='escuela',
+                                    request_id=7, connection_id=('mongodb', 27017), failure={"errmsg": "fallo"})
+            listener.started(event)
+            listener.failed(event)
+        tracer.end_trace(200)
+        tracer.flush()
+
+        spans = {span["name"]: span for span in exporter.spans()}
+        self.assertEqual(set(spans), {'soap sql.select', 'execute', 'mysql.query', 'mongodb.find'})
+        self.assertEqual(spans['soap sql.select']["parent_id"], "00f067aa0ba902b7")
+        self.assertEqual(spans['execute']["parent_id"], root.span_id)
+        self.assertEqual(spans['mysql.query']["parent_id"], execute.span_id)
+        self.assertEqual(spans['mysql.query']["attributes"]["db.statement"], "SELECT * FROM alumnos")
+        self.assertEqual(spans['mongodb.find']["attributes"]["db.mongodb.collection"], "notas")
+        self.assertEqual(spans['mongodb.find']["status"], STATUS_ERROR)
+        self.assertEqual(spans['soap sql.select']["attributes"]["http.status_code"], 200)
+        self.assertEqual(len(exporter.traces()), 1)
+
+    def test_mysql_statements_are_traced_without_values(self):
+        """Las sentencias y los errores de MySQL se registran sin sus literales"""
+        exporter = InMemoryExporter()
+        tracer = Tracer('app', exporter, sample_rate=1)
+        tracer.start_trace('soap auth.logout')
+
+        conn = trace_mysql_connection(FailingConnection(), 'mysql', 'soadb')
+        with self.assertRaises(ValueError):
+            conn.cmd_query(b"DELETE FROM sessions WHERE token = 'secreto' AND expires_at > '2026-01-01' LIMIT 1")
+        tracer.end_trace(200)
+        tracer.flush()
+
+        span = [span for span in exporter.spans() if span["name"] == 'mysql.query'][0]
+        self.assertEqual(span["attributes"]["db.statement"],
+                         "DELETE FROM sessions WHERE token = ? AND expires_at > ? LIMIT ?")
+        self.assertEqual(span["status_message"], "Duplicate entry ? for key ?")
+        self.assertNotIn('secreto', json.dumps(exporter.spans()))
+
+    def test_file_exporter_writes_otlp_json(self):
+        """El exportador de ficheros escribe una petición OTLP/JSON por traza"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traces.jsonl')
+            tracer = Tracer('soadb-app', FileExporter(path), sample_rate=1)
+            tracer.start_trace('soap nosql.findDocument', attributes={"request_bytes": 512})
+            with tracer.span('serialize'):
+                pass
+            tracer.end_trace(500)
+            tracer.flush()
+
+            with open(path, encoding='utf-8') as source:
+                request = json.loads(source.readline())
+        resource = request["resourceSpans"][0]
+        self.assertEqual(resource["resource"]["attributes"][0]["value"]["stringValue"], 'soadb-app')
+        spans = resource["scopeSpans"][0]["spans"]
+        self.assertEqual([span["name"] for span in spans], ['serialize', 'soap nosql.findDocument'])
+        root = spans[1]
+        self.assertEqual((root["kind"], root["parentSpanId"], root["status"]["code"]), (2, "", STATUS_ERROR))
+        self.assertEqual(spans[0]["parentSpanId"], root["spanId"])
+        self.assertIn({"key": "request_bytes", "value": {"intValue": "512"}}, root["attributes"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+
+# Agregar el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'app'))
+
+from utils.where_compiler import WhereCompiler, WhereError
+
+class TestWhereCompiler(unittest.TestCase):
+    """Pruebas del compilador de where_json a SQL parametrizado"""
+
+    def setUp(self):
+        self.compiler = WhereCompiler(cache_size=4)
+
+    def test_equality_keeps_legacy_behaviour(self):
+        """Un diccionario plano sigue generando igualdades unidas por AND"""
+        sql, params = self.compiler.compile({"nombre": "Juan", "edad": 20})
+        self.assertEqual(sql, "(`nombre` = %s AND `edad` = %s)")
+        self.assertEqual(params, ["Juan", 20])
+
+    def test_range_in_and_null_operators(self):
+        """Los operadores de rango, listas y nulos se traducen a predicados indexables"""
+        sql, params = self.compiler.compile({
+            "edad": {"$gte": 18, "$lt": 30},
+            "carrera": {"$in": ["Derecho", "Medicina"]},
+            "email": None,
+            "promedio": {"$between": [7, 9]}
+        })
+        self.assertEqual(
+            sql,
+            "(`edad` >= %s AND `edad` < %s AND `carrera` IN (%s, %s) "
+            "AND `email` IS NULL AND `promedio` BETWEEN %s AND %s)"
+        )
+        self.assertEqual(params, [18, 30, "Derecho", "Medicina", 7, 9])
+
+    def test_prefix_escapes_wildcards(self):
+        """$prefix escapa los comodines del valor y añade % al final"""
+        sql, params = self.compiler.compile({"nombre": {"$prefix": "50%_a"}})
+        self.assertEqual(sql, "`nombre` LIKE %s")
+        self.assertEqual(params, ["50\\%\\_a%"])
+
+    def test_or_groups(self):
+        """$or genera grupos entre paréntesis"""
+        sql, params = self.compiler.compile({
+            "activo": True,
+            "$or": [{"edad": {"$lt": 20}}, {"carrera": "Derecho", "edad": {"$ne": None}}]
+        })
+        self.assertEqual(
+            sql,
+            "(`activo` = %s AND (`edad` < %s OR (`carrera` = %s AND `edad` IS NOT NULL)))"
+        )
+        self.assertEqual(params, [True, 20, "Derecho"])
+
+    def test_cache_reuses_shape(self):
+        """Condiciones con la misma forma reutilizan el SQL compilado"""
+        self.compiler.compile({"edad": {"$gt": 1}})
+        sql, params = self.compiler.compile({"edad": {"$gt": 99}})
+        self.assertEqual(self.compiler.hits, 1)
+        self.assertEqual(params, [99])
+
+    def test_unknown_column_rejected(self):
+        """Las columnas que no existen en el catálogo se rechazan"""
+        with self.assertRaises(WhereError):
+            self.compiler.compile({"edad; DROP TABLE x": 1}, columns={"edad"})
+
+    def test_unknown_operator_rejected(self):
+        """Los operadores desconocidos se rechazan"""
+        with self.assertRaises(WhereError):
+            self.compiler.compile({"edad": {"$regex": "a"}})
+
+if __name__ == '__main__':
+    unittest.main()